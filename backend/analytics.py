@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Columnar cache of check-in history for team-wide trends
+
+Check-ins from the JSON backups, fallback logs and the Sheets mirror are
+loaded once into flat typed arrays with one entry per check-in, sorted by
+date. The arrays hold the day, the user as a code into a table of names, the
+check type, the mood as a code into a table of mood categories, and a blocker
+flag. The text of every answer goes into one UTF-8 arena per question, with
+an offsets array marking where each check-in's answer starts. A per-day index
+of row offsets turns any date range into a pair of slice bounds.
+
+Trend queries (mood distribution per week, blocker frequency per user) count
+codes over array slices with Counter and itertools.compress. Both run in C
+over the packed values instead of walking record dicts. The cache is a single
+binary file: a JSON header line with the name tables and the size of every
+array, followed by the raw arrays. It is rebuilt whenever one of the sources
+it was built from has changed.
+
+Usage:
+    python analytics.py build fallback_data ../desktop_app/checkins_backup.json --mirror sheets_mirror
+    python analytics.py moods --since 2025-01-01 --type start
+    python analytics.py blockers --since 2025-01-01
+"""
+
+import os
+import sys
+import json
+import argparse
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import date as Date, datetime
+from itertools import compress
+
+from tasktracker_shared.questionnaire import CHECK_TYPES, canonical_responses
+from digest import BLOCKER_QUESTION, MOOD_QUESTIONS, answer, mood_label, is_blocker
+
+FORMAT_VERSION = 1
+# Typed arrays saved in this order, before the answer arenas
+ARRAYS = ('day_keys', 'day_offsets', 'user_codes', 'mood_codes', 'mornings', 'blocked')
+_FLIP = bytes.maketrans(b'\x00\x01', b'\x01\x00')
+
+
+class AnalyticsError(ValueError):
+    pass
+
+
+def _ordinal(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').toordinal()
+    except (TypeError, ValueError):
+        raise AnalyticsError(f"not a YYYY-MM-DD date: {value!r}")
+
+
+class CheckinColumns:
+    """Check-in history as typed arrays, one entry per check-in"""
+
+    def __init__(self):
+        self.users = []                       # user code -> display name
+        self.moods = ['']                     # mood code -> category; 0 is no answer
+        self.questions = []                   # question ids with an answer arena
+        self.day_keys = array('i')            # distinct day ordinals, ascending
+        self.day_offsets = array('I', [0])    # first row of each day, then the row count
+        self.user_codes = array('I')
+        self.mood_codes = array('I')
+        self.mornings = b''                   # 1 for a check-in, 0 for a check-out
+        self.blocked = b''                    # 1 if the morning named a blocker
+        self.arenas = {}                      # question id -> (UTF-8 text, offsets)
+        self.sources = None
+
+    def __len__(self):
+        return len(self.user_codes)
+
+    @classmethod
+    def build(cls, records):
+        """Columns from check-in records; repeats of a check-in (same user, type, date and time) are skipped"""
+        rows = {}
+        for record in records:
+            user_name = (record.get('user_name') or '').strip()
+            check_type = CHECK_TYPES.get(record.get('check_type'), record.get('check_type'))
+            day = record.get('date') or (record.get('timestamp') or '')[:10]
+            time_ = record.get('time') or (record.get('timestamp') or '')[11:19]
+            if not user_name or check_type not in MOOD_QUESTIONS:
+                continue
+            try:
+                ordinal = _ordinal(day)
+            except AnalyticsError:
+                continue
+            key = (user_name.lower(), check_type, ordinal, time_)
+            if key in rows:
+                continue  # The same check-in from a backup and from the mirror
+            responses = canonical_responses(check_type, record.get('responses') or {})
+            texts = {question_id: answer({'responses': responses}, question_id) for question_id in responses}
+            rows[key] = (user_name, texts)
+
+        columns = cls()
+        user_index = {}
+        mood_index = {'': 0}
+        mornings = bytearray()
+        blocked = bytearray()
+        parts = {}
+        for key in sorted(rows, key=lambda key: (key[2], key[3], key[0], key[1])):
+            user_key, check_type, ordinal, _ = key
+            user_name, texts = rows[key]
+            row = len(columns.user_codes)
+
+            if not columns.day_keys or columns.day_keys[-1] != ordinal:
+                if columns.day_keys:
+                    columns.day_offsets.append(row)
+                columns.day_keys.append(ordinal)
+            code = user_index.get(user_key)
+            if code is None:
+                code = user_index[user_key] = len(columns.users)
+                columns.users.append(user_name)
+            columns.users[code] = user_name  # Latest spelling wins
+            columns.user_codes.append(code)
+
+            mood = mood_label(texts.get(MOOD_QUESTIONS[check_type], ''))
+            if mood not in mood_index:
+                mood_index[mood] = len(columns.moods)
+                columns.moods.append(mood)
+            columns.mood_codes.append(mood_index[mood])
+            mornings.append(check_type == 'start')
+            blocked.append(check_type == 'start' and is_blocker(texts.get(BLOCKER_QUESTION, '')))
+
+            for question_id in texts:
+                if question_id not in columns.arenas:
+                    # Earlier rows have no answer: their offsets all stay at 0
+                    columns.arenas[question_id] = (None, array('I', [0]) * (row + 1))
+                    parts[question_id] = []
+            for question_id, (_, offsets) in columns.arenas.items():
+                text = texts.get(question_id, '').encode('utf-8')
+                parts[question_id].append(text)
+                offsets.append(offsets[-1] + len(text))
+
+        if columns.day_keys:
+            columns.day_offsets.append(len(columns.user_codes))
+        columns.mornings = bytes(mornings)
+        columns.blocked = bytes(blocked)
+        columns.questions = sorted(columns.arenas)
+        columns.arenas = {question_id: (b''.join(parts[question_id]), columns.arenas[question_id][1])
+                          for question_id in columns.questions}
+        return columns
+
+    def answer(self, question_id, row):
+        """The answer of one check-in to a question, '' if it has none"""
+        text, offsets = self.arenas.get(question_id, (b'', None))
+        if offsets is None:
+            return ''
+        return text[offsets[row]:offsets[row + 1]].decode('utf-8')
+
+    def _rows(self, since=None, until=None):
+        """(first day, end day) indexes of a date range"""
+        first = bisect_left(self.day_keys, _ordinal(since)) if since else 0
+        end = bisect_right(self.day_keys, _ordinal(until)) if until else len(self.day_keys)
+        return first, max(first, end)
+
+    def mood_by_week(self, since=None, until=None, check_type=None):
+        """{week's Monday: {mood: count}}, most frequent mood first, for 'start', 'end' or both"""
+        if check_type:
+            check_type = CHECK_TYPES.get(check_type, check_type)
+            if check_type not in MOOD_QUESTIONS:
+                raise AnalyticsError("check type must be start or end")
+        mask = None
+        if check_type == 'start':
+            mask = self.mornings
+        elif check_type == 'end':
+            mask = self.mornings.translate(_FLIP)
+
+        weeks = {}
+        day, end = self._rows(since, until)
+        while day < end:
+            monday = self.day_keys[day] - (self.day_keys[day] - 1) % 7
+            week_end = bisect_left(self.day_keys, monday + 7, day, end)
+            first, last = self.day_offsets[day], self.day_offsets[week_end]
+            codes = self.mood_codes[first:last]
+            counts = Counter(compress(codes, mask[first:last]) if mask else codes)
+            del counts[0]
+            weeks[Date.fromordinal(monday).isoformat()] = {
+                self.moods[code]: count for code, count in sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+            }
+            day = week_end
+        return weeks
+
+    def blockers_by_user(self, since=None, until=None):
+        """{user: {'blockers', 'mornings', 'rate'}}, users with the most blockers first"""
+        day, end = self._rows(since, until)
+        first, last = self.day_offsets[day], self.day_offsets[end]
+        users = self.user_codes[first:last]
+        blockers = Counter(compress(users, self.blocked[first:last]))
+        mornings = Counter(compress(users, self.mornings[first:last]))
+        return {
+            self.users[code]: {'blockers': blockers[code], 'mornings': count,
+                               'rate': round(blockers[code] / count, 3)}
+            for code, count in sorted(mornings.items(), key=lambda item: (-blockers[item[0]], self.users[item[0]]))
+        }
+
+    def save(self, path):
+        layout = []
+        chunks = []
+        named = [(name, getattr(self, name)) for name in ARRAYS]
+        for question_id in self.questions:
+            text, offsets = self.arenas[question_id]
+            named.append((question_id + '.offsets', offsets))
+            named.append((question_id + '.text', text))
+        for name, values in named:
+            if isinstance(values, array):
+                layout.append([name, values.typecode, values.itemsize, len(values)])
+                chunks.append(values.tobytes())
+            else:
+                layout.append([name, 'B', 1, len(values)])
+                chunks.append(values)
+        header = {
+            'version': FORMAT_VERSION,
+            'byteorder': sys.byteorder,
+            'users': self.users,
+            'moods': self.moods,
+            'questions': self.questions,
+            'sources': self.sources,
+            'layout': layout
+        }
+
+        tmp_file = path + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            f.write(json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n')
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp_file, path)
+
+    @classmethod
+    def load(cls, path):
+        columns = cls()
+        with open(path, 'rb') as f:
+            header = json.loads(f.readline())
+            if header.get('version') != FORMAT_VERSION:
+                raise AnalyticsError("cache was written by another version")
+            values = {}
+            for name, typecode, itemsize, length in header['layout']:
+                data = f.read(itemsize * length)
+                if len(data) != itemsize * length:
+                    raise AnalyticsError("cache file is truncated")
+                if typecode == 'B':
+                    values[name] = data
+                    continue
+                values[name] = array(typecode)
+                if values[name].itemsize != itemsize:
+                    raise AnalyticsError("cache was written on another platform")
+                values[name].frombytes(data)
+                if header['byteorder'] != sys.byteorder:
+                    values[name].byteswap()
+
+        columns.users = header['users']
+        columns.moods = header['moods']
+        columns.questions = header['questions']
+        columns.sources = header['sources']
+        for name in ARRAYS:
+            setattr(columns, name, values[name])
+        columns.arenas = {question_id: (values[question_id + '.text'], values[question_id + '.offsets'])
+                          for question_id in columns.questions}
+        return columns
+
+
+def _state(path):
+    """[path, files, bytes, newest mtime] of a backup file or directory"""
+    files = size = newest = 0
+    if os.path.isdir(path):
+        paths = [os.path.join(root, name) for root, _, names in os.walk(path) for name in names]
+    else:
+        paths = [path] if os.path.exists(path) else []
+    for name in paths:
+        stat = os.stat(name)
+        files += 1
+        size += stat.st_size
+        newest = max(newest, stat.st_mtime_ns)
+    return [path, files, size, newest]
+
+
+def source_state(backups, mirror=None):
+    return {'backups': [_state(path) for path in backups], 'mirror': _state(mirror) if mirror else None}
+
+
+def iter_sources(backups, mirror=None):
+    """Check-ins from backups (JSON, JSONL, CSV or fallback directories), then the Sheets mirror"""
+    from checkin_io import read_records
+    for path in backups:
+        if os.path.exists(path):
+            yield from read_records(path)
+    if mirror and os.path.isdir(mirror):
+        from sheets_mirror import SheetsMirror
+        yield from SheetsMirror(mirror).iter_records()
+
+
+def open_cache(path, backups=None, mirror=None, rebuild=False):
+    """The cache at ``path``, rebuilt first if its sources changed
+
+    Without sources, those the cache was last built from are used.
+    """
+    columns = None
+    if not rebuild and os.path.exists(path):
+        try:
+            columns = CheckinColumns.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: analytics cache {path} is unreadable, rebuilding: {e}")
+    if backups is None and mirror is None:
+        if columns is None or not columns.sources:
+            raise AnalyticsError("no cache yet; build it from backups and/or --mirror first")
+        backups = [state[0] for state in columns.sources['backups']]
+        mirror = columns.sources['mirror'][0] if columns.sources['mirror'] else None
+
+    sources = source_state(backups, mirror)
+    if columns is not None and columns.sources == sources:
+        return columns
+    columns = CheckinColumns.build(iter_sources(backups, mirror))
+    columns.sources = sources
+    columns.save(path)
+    return columns
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Columnar cache of check-ins for mood and blocker trends')
+    parser.add_argument('--cache', default=os.environ.get('ANALYTICS_CACHE', 'analytics.cache'))
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build_cmd = commands.add_parser('build', help='build the cache from backups and the Sheets mirror')
+    build_cmd.add_argument('backups', nargs='*', help='JSON/JSONL/CSV backups or fallback directories')
+    build_cmd.add_argument('--mirror', help='sheets_mirror.py directory')
+
+    moods_cmd = commands.add_parser('moods', help='print the mood distribution per week')
+    moods_cmd.add_argument('--type', choices=['start', 'end'], help='only check-ins or check-outs')
+    blockers_cmd = commands.add_parser('blockers', help='print blocker frequency per user')
+    for command in (moods_cmd, blockers_cmd):
+        command.add_argument('--since', help='first date, YYYY-MM-DD')
+        command.add_argument('--until', help='last date, YYYY-MM-DD')
+
+    args = parser.parse_args()
+    try:
+        if args.command == 'build':
+            if not args.backups and not args.mirror:
+                parser.error("give at least one backup or --mirror")
+            columns = open_cache(args.cache, args.backups, args.mirror, rebuild=True)
+            print(f"{len(columns)} check-ins from {len(columns.users)} users over "
+                  f"{len(columns.day_keys)} days cached in {args.cache}")
+            return
+        columns = open_cache(args.cache)
+        if args.command == 'moods':
+            result = columns.mood_by_week(args.since, args.until, args.type)
+        else:
+            result = columns.blockers_by_user(args.since, args.until)
+    except AnalyticsError as e:
+        parser.error(str(e))
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
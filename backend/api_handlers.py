@@ -0,0 +1,215 @@
+"""
+Request handling shared by the Flask app (app.py) and the ASGI app (asgi.py)
+
+Each handler takes the parsed JSON body or query parameters and returns
+``(status, body, headers)``, where body is a dict to send as JSON, or text
+or bytes to send as they are. The two servers only translate requests and
+responses, so the /api routes behave the same whichever one is deployed.
+Handlers block on Sheets, fallback and session store I/O; asgi.py runs them
+in its thread pool.
+"""
+
+from datetime import datetime
+
+from chatbot import ChatBot
+from sheets_api import SheetsAPI
+from session_store import create_session_store
+from history_api import CheckinHistory, HistoryError
+from digest import DigestError, parse_date
+from tasktracker_shared.search_index import SearchError
+import metrics
+
+HISTORY_DISABLED = "Check-in history is not enabled"
+
+
+def error(status, message):
+    return status, {"error": message}, {}
+
+
+def ok(body, headers=None):
+    return 200, body, headers or {}
+
+
+class CheckinAPI:
+    """The /api routes, independent of the web framework serving them"""
+
+    def __init__(self, sheets_api, active_sessions):
+        self.sheets_api = sheets_api
+        self.active_sessions = active_sessions
+        self.checkin_history = CheckinHistory(sheets_api.checkin_store) if sheets_api.checkin_store else None
+
+    @classmethod
+    def create(cls):
+        """Build the API with the configured SheetsAPI and session store"""
+        api = cls(SheetsAPI(), create_session_store())
+        metrics.sessions_held.callback = lambda: len(api.active_sessions)
+        metrics.sheets_ready.callback = lambda: int(api.sheets_api.state == 'ready')
+        return api
+
+    def health(self):
+        sheets_api = self.sheets_api
+        return ok({
+            "status": "healthy",
+            "timestamp": datetime.now().isoformat(),
+            "sheets": sheets_api.status(),
+            "sessions": self.active_sessions.stats(),
+            "fallback_replay": sheets_api.replayer.stats() if sheets_api.replayer else None
+        })
+
+    def start_session(self, data):
+        """Initialize a new chat session"""
+        if data is None:
+            return error(400, "Invalid JSON body")
+        user_name = data.get('name', '').strip()
+        check_type = data.get('check_type', 'start')  # 'start' or 'end'
+
+        if not user_name:
+            return error(400, "Name is required")
+
+        session_id = f"{user_name}_{datetime.now().timestamp()}"
+        chatbot = ChatBot(user_name, check_type)
+
+        # Get first message
+        initial_message = chatbot.get_next_question()
+
+        self.active_sessions.set(session_id, {
+            'chatbot': chatbot.to_state(),
+            'user_name': user_name,
+            'check_type': check_type,
+            'started_at': datetime.now().isoformat()
+        })
+
+        return ok({
+            "session_id": session_id,
+            "message": initial_message,
+            "progress": chatbot.get_progress()
+        })
+
+    def send_message(self, data):
+        """Process user's message and return bot's response"""
+        if data is None:
+            return error(400, "Invalid JSON body")
+        session_id = data.get('session_id')
+        user_message = data.get('message', '').strip()
+
+        session = self.active_sessions.get(session_id) if session_id else None
+        if session is None:
+            return error(400, "Invalid session")
+
+        chatbot = ChatBot.from_state(session['chatbot'])
+
+        # Process user's answer
+        with metrics.chatbot_answer_seconds.time():
+            chatbot.process_answer(user_message)
+
+        # Check if conversation is complete
+        if chatbot.is_complete():
+            progress = {"current": chatbot.total_questions, "total": chatbot.total_questions}
+            # Save to Google Sheets
+            try:
+                self.sheets_api.save_checkin(
+                    user_name=session['user_name'],
+                    check_type=session['check_type'],
+                    responses=chatbot.get_responses()
+                )
+
+                # Clean up session
+                self.active_sessions.delete(session_id)
+
+                return ok({
+                    "message": "✅ All done! Your responses have been saved. Have a great day! 🌟",
+                    "completed": True,
+                    "progress": progress
+                })
+            except Exception as e:
+                return ok({
+                    "message": f"⚠️ Responses saved locally, but there was an issue with Google Sheets: {str(e)}",
+                    "completed": True,
+                    "progress": progress
+                })
+
+        # Get next question
+        next_message = chatbot.get_next_question()
+
+        session['chatbot'] = chatbot.to_state()
+        self.active_sessions.set(session_id, session)
+
+        return ok({
+            "message": next_message,
+            "completed": False,
+            "progress": chatbot.get_progress()
+        })
+
+    def cancel_session(self, data):
+        """Cancel an active session"""
+        session_id = (data or {}).get('session_id')
+
+        if session_id:
+            self.active_sessions.delete(session_id)
+
+        return ok({"message": "Session cancelled"})
+
+    def list_checkins(self, params, if_none_match=None, if_modified_since=None):
+        """Page through stored check-ins, filtered by user, date and type"""
+        if self.checkin_history is None:
+            return error(503, HISTORY_DISABLED)
+
+        try:
+            return self.checkin_history.respond(
+                params, if_none_match=if_none_match, if_modified_since=if_modified_since
+            )
+        except HistoryError as e:
+            return error(400, str(e))
+
+    def daily_digest(self, params):
+        """Team digest for one day (?date=YYYY-MM-DD, default today)"""
+        store = self.sheets_api.checkin_store
+        if store is None:
+            return error(503, HISTORY_DISABLED)
+
+        try:
+            date = parse_date(params.get('date'))
+        except DigestError as e:
+            return error(400, str(e))
+
+        return ok(store.digest(date))
+
+    def checkin_stats(self, params):
+        """One user's streaks and counts (?user=), or team participation with every user's"""
+        store = self.sheets_api.checkin_store
+        if store is None:
+            return error(503, HISTORY_DISABLED)
+
+        user = params.get('user')
+        if not user:
+            return ok(store.team_stats())
+
+        summary = store.user_stats(user)
+        if summary is None:
+            return error(404, "No check-ins for this user")
+        return ok(summary)
+
+    def search_checkins(self, params):
+        """Full-text search over check-in answers (?q=, user, since, until, limit)"""
+        store = self.sheets_api.checkin_store
+        if store is None:
+            return error(503, HISTORY_DISABLED)
+
+        try:
+            results = store.search(
+                params.get('q', ''),
+                user=params.get('user'),
+                start_date=params.get('since'),
+                end_date=params.get('until'),
+                limit=params.get('limit', 50)
+            )
+        except SearchError as e:
+            return error(400, str(e))
+
+        return ok({"results": results})
+
+    def scrape_metrics(self):
+        """Prometheus scrape target"""
+        if not metrics.ENABLED:
+            return error(404, "Metrics are disabled")
+        return ok(metrics.render(), {'Content-Type': metrics.CONTENT_TYPE})
@@ -1,111 +1,81 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, g
 from flask_cors import CORS
-from chatbot import ChatBot
-from sheets_api import SheetsAPI
+from api_handlers import CheckinAPI
+import metrics
 import os
-from datetime import datetime
+import time
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=['ETag', 'Last-Modified'])
 
 # Initialize components
-sheets_api = SheetsAPI()
-active_sessions = {}
+api = CheckinAPI.create()
+
+if metrics.ENABLED:
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+    
+    @app.after_request
+    def record_request(response):
+        started = g.get('request_started')
+        if started is not None:
+            endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+            metrics.observe_request(endpoint, request.method, response.status_code,
+                                    time.perf_counter() - started)
+        return response
+
+def respond(result):
+    """Turn a handler's (status, body, headers) into a Flask response"""
+    status, body, headers = result
+    if isinstance(body, dict):
+        return jsonify(body), status, headers
+    return Response(body, status=status, headers=headers)
+
+def json_body():
+    data = request.get_json(silent=True)
+    return data if isinstance(data, dict) else None
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "healthy", "timestamp": datetime.now().isoformat()})
+    return respond(api.health())
 
 @app.route('/api/start-session', methods=['POST'])
 def start_session():
-    """Initialize a new chat session"""
-    data = request.json
-    user_name = data.get('name', '').strip()
-    check_type = data.get('check_type', 'start')  # 'start' or 'end'
-    
-    if not user_name:
-        return jsonify({"error": "Name is required"}), 400
-    
-    session_id = f"{user_name}_{datetime.now().timestamp()}"
-    chatbot = ChatBot(user_name, check_type)
-    active_sessions[session_id] = {
-        'chatbot': chatbot,
-        'user_name': user_name,
-        'check_type': check_type,
-        'started_at': datetime.now().isoformat()
-    }
-    
-    # Get first message
-    initial_message = chatbot.get_next_question()
-    
-    return jsonify({
-        "session_id": session_id,
-        "message": initial_message,
-        "progress": chatbot.get_progress()
-    })
+    return respond(api.start_session(json_body()))
 
 @app.route('/api/send-message', methods=['POST'])
 def send_message():
-    """Process user's message and return bot's response"""
-    data = request.json
-    session_id = data.get('session_id')
-    user_message = data.get('message', '').strip()
-    
-    if not session_id or session_id not in active_sessions:
-        return jsonify({"error": "Invalid session"}), 400
-    
-    session = active_sessions[session_id]
-    chatbot = session['chatbot']
-    
-    # Process user's answer
-    chatbot.process_answer(user_message)
-    
-    # Check if conversation is complete
-    if chatbot.is_complete():
-        # Save to Google Sheets
-        try:
-            sheets_api.save_checkin(
-                user_name=session['user_name'],
-                check_type=session['check_type'],
-                responses=chatbot.get_responses()
-            )
-            
-            # Clean up session
-            del active_sessions[session_id]
-            
-            return jsonify({
-                "message": "✅ All done! Your responses have been saved. Have a great day! 🌟",
-                "completed": True,
-                "progress": {"current": chatbot.total_questions, "total": chatbot.total_questions}
-            })
-        except Exception as e:
-            return jsonify({
-                "message": f"⚠️ Responses saved locally, but there was an issue with Google Sheets: {str(e)}",
-                "completed": True,
-                "progress": {"current": chatbot.total_questions, "total": chatbot.total_questions}
-            })
-    
-    # Get next question
-    next_message = chatbot.get_next_question()
-    
-    return jsonify({
-        "message": next_message,
-        "completed": False,
-        "progress": chatbot.get_progress()
-    })
+    return respond(api.send_message(json_body()))
 
 @app.route('/api/cancel-session', methods=['POST'])
 def cancel_session():
-    """Cancel an active session"""
-    data = request.json
-    session_id = data.get('session_id')
-    
-    if session_id in active_sessions:
-        del active_sessions[session_id]
-    
-    return jsonify({"message": "Session cancelled"})
+    return respond(api.cancel_session(json_body()))
+
+@app.route('/api/checkins', methods=['GET'])
+def list_checkins():
+    return respond(api.list_checkins(
+        request.args,
+        if_none_match=request.headers.get('If-None-Match'),
+        if_modified_since=request.headers.get('If-Modified-Since')
+    ))
+
+@app.route('/api/digest', methods=['GET'])
+def daily_digest():
+    return respond(api.daily_digest(request.args))
+
+@app.route('/api/stats', methods=['GET'])
+def checkin_stats():
+    return respond(api.checkin_stats(request.args))
+
+@app.route('/api/search', methods=['GET'])
+def search_checkins():
+    return respond(api.search_checkins(request.args))
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics_endpoint():
+    return respond(api.scrape_metrics())
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=True)
-
@@ -0,0 +1,147 @@
+"""
+ASGI entry point for the check-in API
+
+Serves the same /api routes as the Flask app in app.py: both wrap the
+handlers in api_handlers.py. The handlers block on Sheets, fallback and
+session store I/O, so they run in a thread pool and one process can hold
+many in-flight check-ins:
+
+    uvicorn asgi:app --port 5000
+"""
+
+import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from api_handlers import CheckinAPI
+import metrics
+
+# Sheets calls block on the network, so give them plenty of threads
+io_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('ASGI_IO_THREADS', 64)),
+    thread_name_prefix='sheets-io'
+)
+
+api = CheckinAPI.create()
+
+
+async def run_io(func, *args, **kwargs):
+    """Run blocking I/O in the executor without tying up the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(io_executor, lambda: func(*args, **kwargs))
+
+
+async def respond(handler, *args, **kwargs):
+    """Run a handler in the executor and turn its (status, body, headers) into a response"""
+    status, body, headers = await run_io(handler, *args, **kwargs)
+    if isinstance(body, dict):
+        return JSONResponse(body, status_code=status, headers=headers)
+    return Response(body, status_code=status, headers=headers)
+
+
+async def read_json(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+async def health_check(request):
+    return await respond(api.health)
+
+
+async def start_session(request):
+    return await respond(api.start_session, await read_json(request))
+
+
+async def send_message(request):
+    return await respond(api.send_message, await read_json(request))
+
+
+async def cancel_session(request):
+    return await respond(api.cancel_session, await read_json(request))
+
+
+async def list_checkins(request):
+    return await respond(
+        api.list_checkins,
+        request.query_params,
+        if_none_match=request.headers.get('if-none-match'),
+        if_modified_since=request.headers.get('if-modified-since')
+    )
+
+
+async def daily_digest(request):
+    return await respond(api.daily_digest, request.query_params)
+
+
+async def checkin_stats(request):
+    return await respond(api.checkin_stats, request.query_params)
+
+
+async def search_checkins(request):
+    return await respond(api.search_checkins, request.query_params)
+
+
+async def metrics_endpoint(request):
+    return await respond(api.scrape_metrics)
+
+
+class MetricsMiddleware:
+    """Records latency and status of every HTTP request, labelled by route path"""
+
+    def __init__(self, app, paths):
+        self.app = app
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            endpoint = scope['path'] if scope['path'] in self.paths else 'unmatched'
+            metrics.observe_request(endpoint, scope['method'], status[0], time.perf_counter() - started)
+
+
+def shutdown():
+    io_executor.shutdown(wait=True)
+
+
+routes = [
+    Route('/api/health', health_check, methods=['GET']),
+    Route('/api/start-session', start_session, methods=['POST']),
+    Route('/api/send-message', send_message, methods=['POST']),
+    Route('/api/cancel-session', cancel_session, methods=['POST']),
+    Route('/api/checkins', list_checkins, methods=['GET']),
+    Route('/api/digest', daily_digest, methods=['GET']),
+    Route('/api/stats', checkin_stats, methods=['GET']),
+    Route('/api/search', search_checkins, methods=['GET']),
+    Route('/api/metrics', metrics_endpoint, methods=['GET'])
+]
+
+middleware = [Middleware(
+    CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'],
+    expose_headers=['ETag', 'Last-Modified']
+)]
+if metrics.ENABLED:
+    middleware.insert(0, Middleware(MetricsMiddleware, paths={route.path for route in routes}))
+
+app = Starlette(routes=routes, middleware=middleware, on_shutdown=[shutdown])
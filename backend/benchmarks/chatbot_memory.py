@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+ChatBot memory benchmark
+
+Compares the memory held by N concurrent sessions using the original
+per-session ChatBot (a fresh list of question dicts plus a responses dict of
+dicts) against the shared-template ChatBot, both as live objects and as the
+serialized state a session store keeps.
+
+Usage: python benchmarks/chatbot_memory.py [--sessions 10000] [--answers 3]
+"""
+
+import os
+import sys
+import json
+import argparse
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from chatbot import ChatBot  # noqa: E402
+
+
+class LegacyChatBot:
+    """The ChatBot representation before question sets were shared"""
+
+    def __init__(self, user_name, check_type='start'):
+        self.user_name = user_name
+        self.check_type = check_type
+        self.current_question_index = 0
+        self.responses = {}
+        if check_type == 'start':
+            self.questions = [
+                {"id": "energy_check", "question": "0️⃣ Energy Check: What's your energy drink or vibe this morning? ☕", "label": "Energy Check"},
+                {"id": "progress_yesterday", "question": "1️⃣ Progress: What key tasks did you complete yesterday? 📋", "label": "Yesterday's Progress"},
+                {"id": "today_focus", "question": "2️⃣ Today's Focus: What are the top 1–3 priorities you're focusing on today? 🎯", "label": "Today's Priorities"},
+                {"id": "blockers", "question": "3️⃣ Blockers: Anything slowing you down or you need help with? 🚧", "label": "Blockers"},
+                {"id": "state_of_mind", "question": "4️⃣ State of Mind: One word for how you're feeling as you start the day? 💭", "label": "State of Mind"}
+            ]
+            self.greeting = f"Good morning, {user_name}! 🌅 Let's do your start-of-day check-in."
+        else:
+            self.questions = [
+                {"id": "wins", "question": "1️⃣ Wins: What did you accomplish today (big or small)? 🎉", "label": "Today's Wins"},
+                {"id": "learnings", "question": "2️⃣ Learnings: Anything new you learned or discovered? 💡", "label": "Learnings"},
+                {"id": "stuck_points", "question": "3️⃣ Stuck Points: Any challenges you faced today? 🤔", "label": "Challenges"},
+                {"id": "tomorrow_prep", "question": "4️⃣ Tomorrow Prep: What will be your focus tomorrow? 🔜", "label": "Tomorrow's Focus"},
+                {"id": "mood_check", "question": "5️⃣ Mood Check: How are you ending the day? 🌙", "label": "Ending Mood"}
+            ]
+            self.greeting = f"Good evening, {user_name}! 🌇 Let's wrap up your day with a quick check-out."
+        self.total_questions = len(self.questions)
+        self.started = True
+
+    def process_answer(self, answer):
+        question = self.questions[self.current_question_index]
+        self.responses[question['id']] = {
+            'label': question['label'],
+            'answer': answer,
+            'timestamp': datetime.now().isoformat()
+        }
+        self.current_question_index += 1
+
+
+def measure(build, sessions):
+    """Return bytes allocated while building and holding ``sessions`` objects"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = [build(i) for i in range(sessions)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=10000)
+    parser.add_argument('--answers', type=int, default=3,
+                        help='answers already given in each session')
+    args = parser.parse_args()
+
+    def answer_all(bot, i):
+        for n in range(args.answers):
+            bot.process_answer(f"answer {n} from user {i}")
+        return bot
+
+    def legacy(i):
+        return answer_all(LegacyChatBot(f"user{i}", 'start' if i % 2 else 'end'), i)
+
+    def compact(i):
+        bot = ChatBot(f"user{i}", 'start' if i % 2 else 'end')
+        bot.started = True
+        return answer_all(bot, i)
+
+    def compact_state(i):
+        return json.dumps(compact(i).to_state(), separators=(',', ':'))
+
+    results = {
+        'legacy_objects': measure(legacy, args.sessions),
+        'compact_objects': measure(compact, args.sessions),
+        'compact_serialized': measure(compact_state, args.sessions)
+    }
+
+    print(f"{args.sessions} sessions, {args.answers} answers each")
+    for name, total in results.items():
+        print(f"  {name:<20} {total / 1024 / 1024:8.2f} MiB  {total / args.sessions:8.0f} B/session")
+    print(f"  serialized state sample: {compact_state(0)}")
+    print(f"  reduction: {results['legacy_objects'] / results['compact_objects']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""
+Check-in API load test
+
+Drives full conversations (start-session, one send-message per question,
+completion) against the Flask app or the ASGI app at a fixed concurrency.
+The apps are served in-process over real HTTP with SheetsAPI replaced by a
+stub that sleeps for an injectable latency, so runs are reproducible and
+never touch Google. Reports p50/p95/p99 latency per endpoint, throughput and
+how the active session store grew, and writes everything to JSON.
+
+Usage:
+    python benchmarks/load_test.py --app flask --concurrency 50 --conversations 1000
+    python benchmarks/load_test.py --app asgi --latency 0.3 --output asgi.json --compare flask.json
+    python benchmarks/load_test.py --url http://127.0.0.1:5000   # an already running server
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import logging
+import socket
+import argparse
+import platform
+import tempfile
+import threading
+import http.client
+from datetime import datetime
+from urllib.parse import urlsplit
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, BACKEND_DIR)
+
+
+class StubSheetsAPI:
+    """Stands in for SheetsAPI: each save just sleeps for the configured latency"""
+
+    def __init__(self, latency=0.0, jitter=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.saves = 0
+        self.checkin_store = None
+        self.replayer = None
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def status(self):
+        return {'state': 'stub', 'ready': True}
+
+    def save_checkin(self, user_name, check_type, responses):
+        with self._lock:
+            self.saves += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        return True
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(pct / 100.0 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    if not samples:
+        return {'count': 0}
+    return {
+        'count': len(samples),
+        'mean_ms': round(1000 * sum(samples) / len(samples), 3),
+        'p50_ms': round(1000 * percentile(samples, 50), 3),
+        'p95_ms': round(1000 * percentile(samples, 95), 3),
+        'p99_ms': round(1000 * percentile(samples, 99), 3),
+        'max_ms': round(1000 * samples[-1], 3)
+    }
+
+
+def deep_size(obj, seen=None):
+    """Approximate bytes held by an object graph of builtins"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    return size
+
+
+def session_store_bytes(store):
+    """Memory held by a MemorySessionStore, or the on-disk size of a SQLite one"""
+    sessions = getattr(store, '_sessions', None)
+    if sessions is not None:
+        with store._lock:
+            snapshot = dict(sessions)
+        return deep_size(snapshot)
+    path = getattr(store, 'path', None)
+    if path:
+        return sum(os.path.getsize(p) for p in (path, path + '-wal') if os.path.exists(p))
+    return None
+
+
+def rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class LocalServer:
+    """Serves app.py (werkzeug, threaded) or asgi.py (uvicorn) on a background thread"""
+
+    def __init__(self, kind, stub):
+        self.kind = kind
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+
+        if kind == 'flask':
+            import app as flask_module
+            from werkzeug.serving import make_server
+            flask_module.api.sheets_api = stub
+            self.active_sessions = flask_module.api.active_sessions
+            logging.getLogger('werkzeug').setLevel(logging.WARNING)  # no per-request log lines
+            self._server = make_server('127.0.0.1', self.port, flask_module.app, threaded=True)
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        else:
+            import uvicorn
+            import asgi as asgi_module
+            asgi_module.api.sheets_api = stub
+            self.active_sessions = asgi_module.api.active_sessions
+            config = uvicorn.Config(asgi_module.app, host='127.0.0.1', port=self.port,
+                                    log_level='warning', backlog=2048)
+            self._server = uvicorn.Server(config)
+            self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(('127.0.0.1', self.port), timeout=0.2).close()
+                return
+            except OSError:
+                time.sleep(0.05)
+        raise RuntimeError(f"{self.kind} server did not start")
+
+    def stop(self):
+        if self.kind == 'flask':
+            self._server.shutdown()
+        else:
+            self._server.should_exit = True
+        self._thread.join(timeout=10)
+
+
+class Client:
+    """One keep-alive connection per worker thread"""
+
+    def __init__(self, url, timeout=30):
+        parts = urlsplit(url)
+        cls = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.conn = cls(parts.hostname, parts.port, timeout=timeout)
+
+    def post(self, path, payload):
+        body = json.dumps(payload)
+        for attempt in (0, 1):
+            try:
+                self.conn.request('POST', path, body, {'Content-Type': 'application/json'})
+                response = self.conn.getresponse()
+                data = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # Server closed an idle keep-alive connection; reconnect once
+                self.conn.close()
+                if attempt:
+                    raise
+        if response.getheader('Connection', '').lower() == 'close':
+            self.conn.close()
+        return response.status, json.loads(data) if data else {}
+
+    def close(self):
+        self.conn.close()
+
+
+class LoadTest:
+    def __init__(self, url, concurrency, conversations, abandon=0.0, think_time=0.0, seed=0):
+        self.url = url
+        self.concurrency = concurrency
+        self.conversations = conversations
+        self.abandon = abandon
+        self.think_time = think_time
+        self.seed = seed
+        self.latencies = {'start-session': [], 'send-message': [], 'complete': []}
+        self.errors = 0
+        self.completed = 0
+        self.abandoned = 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def run(self):
+        workers = [threading.Thread(target=self._worker, args=(n,)) for n in range(self.concurrency)]
+        started = time.monotonic()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return time.monotonic() - started
+
+    def _take(self):
+        with self._lock:
+            if self._next >= self.conversations:
+                return None
+            self._next += 1
+            return self._next - 1
+
+    def _worker(self, n):
+        rng = random.Random(self.seed * 100003 + n)
+        client = Client(self.url)
+        local = {name: [] for name in self.latencies}
+        errors = completed = abandoned = 0
+        try:
+            while True:
+                i = self._take()
+                if i is None:
+                    break
+                try:
+                    outcome = self._conversation(client, i, rng, local)
+                except (OSError, http.client.HTTPException, ValueError):
+                    client.close()
+                    outcome = 'error'
+                if outcome == 'completed':
+                    completed += 1
+                elif outcome == 'abandoned':
+                    abandoned += 1
+                else:
+                    errors += 1
+        finally:
+            client.close()
+            with self._lock:
+                for name, samples in local.items():
+                    self.latencies[name].extend(samples)
+                self.errors += errors
+                self.completed += completed
+                self.abandoned += abandoned
+
+    def _conversation(self, client, i, rng, local):
+        check_type = 'start' if i % 2 == 0 else 'end'
+        abandon = rng.random() < self.abandon
+
+        t0 = time.perf_counter()
+        status, body = client.post('/api/start-session', {'name': f"load-user-{i}", 'check_type': check_type})
+        local['start-session'].append(time.perf_counter() - t0)
+        if status != 200:
+            return 'error'
+
+        session_id = body['session_id']
+        total = body['progress']['total']
+        for answer in range(total):
+            if abandon and answer == total // 2:
+                return 'abandoned'
+            if self.think_time:
+                time.sleep(rng.uniform(0, self.think_time))
+            t0 = time.perf_counter()
+            status, body = client.post('/api/send-message', {
+                'session_id': session_id,
+                'message': f"answer {answer} from user {i}"
+            })
+            elapsed = time.perf_counter() - t0
+            if status != 200:
+                return 'error'
+            local['complete' if body.get('completed') else 'send-message'].append(elapsed)
+            if body.get('completed'):
+                return 'completed'
+        return 'error'
+
+
+class SessionSampler:
+    """Samples the active session store size and process RSS while the test runs"""
+
+    def __init__(self, store, interval=0.5):
+        self.store = store
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def sample(self):
+        self.samples.append({
+            't': round(time.monotonic() - self._started, 3),
+            'sessions': len(self.store),
+            'store_bytes': session_store_bytes(self.store),
+            'rss_bytes': rss_bytes()
+        })
+
+    def start(self):
+        self._started = time.monotonic()
+        self.sample()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def summary(self):
+        first, last = self.samples[0], self.samples[-1]
+        peak = max(self.samples, key=lambda s: s['sessions'])
+
+        def growth(key):
+            if first[key] is None or last[key] is None:
+                return None
+            return last[key] - first[key]
+
+        return {
+            'before': first,
+            'peak': peak,
+            'after': last,
+            'session_growth': growth('sessions'),
+            'store_bytes_growth': growth('store_bytes'),
+            'rss_bytes_growth': growth('rss_bytes'),
+            'bytes_per_session': (
+                round(last['store_bytes'] / last['sessions'])
+                if last['sessions'] and last['store_bytes'] else None
+            ),
+            'samples': self.samples
+        }
+
+
+def remote_sessions(url):
+    """Session count reported by /api/health of an external server"""
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=10)
+    try:
+        conn.request('GET', '/api/health')
+        return json.loads(conn.getresponse().read()).get('sessions', {}).get('size')
+    except (OSError, ValueError, http.client.HTTPException):
+        return None
+    finally:
+        conn.close()
+
+
+def compare(current, previous):
+    print(f"\n  vs {previous['config'].get('label') or previous['environment']['started_at']}")
+    for name, now in current['endpoints'].items():
+        before = previous['endpoints'].get(name, {})
+        for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+            if now.get(key) is None or not before.get(key):
+                continue
+            change = 100.0 * (now[key] - before[key]) / before[key]
+            print(f"  {name:<14} {key:<7} {before[key]:9.2f} -> {now[key]:9.2f} ms  ({change:+.1f}%)")
+    old, new = previous['throughput'], current['throughput']
+    print(f"  {'throughput':<14} {'conv/s':<7} {old['conversations_per_s']:9.2f} -> "
+          f"{new['conversations_per_s']:9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--app', choices=['flask', 'asgi'], default='flask',
+                        help='app to serve in-process (ignored with --url)')
+    parser.add_argument('--url', help='load an already running server instead')
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--conversations', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='seconds the stub Sheets save takes')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='extra random save latency, up to this many seconds')
+    parser.add_argument('--abandon', type=float, default=0.0,
+                        help='fraction of conversations left unfinished halfway')
+    parser.add_argument('--think-time', type=float, default=0.0,
+                        help='random pause of up to this many seconds before each answer')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--label', help='name for this run in the JSON output')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', help='print changes against an earlier results file')
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+
+    server = sampler = None
+    if args.url:
+        url = args.url.rstrip('/')
+        sessions_before = remote_sessions(url)
+    else:
+        # Keep the app's fallback log, check-in index and session DB out of the tree
+        os.chdir(tempfile.mkdtemp(prefix='loadtest-'))
+        os.environ['CHECKIN_DB'] = ''
+        for name in ('SHEETS_API_URL', 'GOOGLE_SHEETS_CREDENTIALS'):
+            os.environ.pop(name, None)
+        stub = StubSheetsAPI(args.latency, args.jitter, args.seed)
+        server = LocalServer(args.app, stub)
+        server.start()
+        url = server.url
+        sampler = SessionSampler(server.active_sessions)
+        sampler.start()
+
+    test = LoadTest(url, args.concurrency, args.conversations, args.abandon, args.think_time, args.seed)
+    started_at = datetime.now().isoformat()
+    elapsed = test.run()
+
+    if server:
+        sampler.stop()
+        server.stop()
+        sessions = sampler.summary()
+    else:
+        sessions = {'before': {'sessions': sessions_before}, 'after': {'sessions': remote_sessions(url)}}
+
+    requests_made = sum(len(samples) for samples in test.latencies.values())
+    results = {
+        'config': dict(vars(args), app=None if args.url else args.app),
+        'environment': {
+            'started_at': started_at,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count()
+        },
+        'endpoints': {name: summarize(samples) for name, samples in test.latencies.items()},
+        'throughput': {
+            'elapsed_s': round(elapsed, 3),
+            'requests': requests_made,
+            'requests_per_s': round(requests_made / elapsed, 2),
+            'conversations_completed': test.completed,
+            'conversations_abandoned': test.abandoned,
+            'conversations_per_s': round(test.completed / elapsed, 2),
+            'errors': test.errors
+        },
+        'sessions': sessions
+    }
+
+    print(f"{args.conversations} conversations, concurrency {args.concurrency}, "
+          f"{'url ' + url if args.url else args.app + f', stub latency {args.latency}s'}")
+    for name, stats in results['endpoints'].items():
+        if stats['count']:
+            print(f"  {name:<14} n={stats['count']:<7} p50 {stats['p50_ms']:8.2f}  p95 {stats['p95_ms']:8.2f}  "
+                  f"p99 {stats['p99_ms']:8.2f}  max {stats['max_ms']:8.2f} ms")
+    t = results['throughput']
+    print(f"  {t['requests_per_s']:.1f} req/s, {t['conversations_per_s']:.1f} conversations/s, "
+          f"{t['errors']} errors in {t['elapsed_s']:.2f}s")
+    if sampler:
+        peak, after = sessions['peak'], sessions['after']
+        print(f"  sessions: peak {peak['sessions']} ({(peak['store_bytes'] or 0) / 1024:.1f} KiB), "
+              f"after {after['sessions']} ({(after['store_bytes'] or 0) / 1024:.1f} KiB), "
+              f"rss growth {(sessions['rss_bytes_growth'] or 0) / 1048576:.1f} MiB")
+
+    if previous:
+        compare(results, previous)
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"  results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
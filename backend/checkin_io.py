@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Streaming import/export of check-in history
+
+Reads and writes check-ins one record at a time so converting multi-GB
+backups keeps memory flat. Supported formats:
+
+    json    JSON array, as in fallback_data.json / checkins_backup.json
+    jsonl   JSON Lines, as in the fallback log segments
+    csv     one row per answer (date, time, timestamp, user, type, question, label, answer)
+    sheets  CSV of worksheet rows as written by SheetsAPI, prefixed with the date,
+            under a header row
+
+A fallback log directory can also be used as input.
+
+Usage:
+    python checkin_io.py convert checkins_backup.json history.jsonl
+    python checkin_io.py convert fallback_data/ export.csv --to sheets
+"""
+
+import io
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+
+from tasktracker_shared.sheet_layout import SHEET_HEADERS, DEFAULT_HEADERS, build_sheet_row
+from tasktracker_shared.questionnaire import question_set, check_type_for_label
+from tasktracker_shared.json_stream import CHUNK_SIZE, iter_json_array, iter_jsonl
+
+FORMATS = ('json', 'jsonl', 'csv', 'sheets')
+CSV_FIELDS = ['date', 'time', 'timestamp', 'user_name', 'check_type',
+              'question_id', 'label', 'answer', 'answered_at']
+
+
+class _CountingReader(io.RawIOBase):
+    """Binary reader that counts bytes consumed, for progress reporting"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = self.raw.readinto(buffer)
+        self.bytes_read += n or 0
+        return n
+
+    def close(self):
+        self.raw.close()
+        super().close()
+
+
+class Progress:
+    """Prints record count and throughput to stderr about once a second"""
+
+    def __init__(self, total_bytes=None, stream=sys.stderr, interval=1.0):
+        self.total_bytes = total_bytes
+        self.stream = stream
+        self.interval = interval
+        self.records = 0
+        self.bytes_read = 0
+        self.started = time.monotonic()
+        self._last = self.started
+
+    def update(self, records=1, bytes_read=None):
+        self.records += records
+        if bytes_read is not None:
+            self.bytes_read = bytes_read
+        now = time.monotonic()
+        if now - self._last >= self.interval:
+            self._last = now
+            self.report()
+
+    def report(self, final=False):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        line = (f"{self.records} records, {self.bytes_read / 1048576:.1f} MiB read, "
+                f"{self.records / elapsed:.0f} rec/s, {self.bytes_read / 1048576 / elapsed:.1f} MiB/s")
+        if self.total_bytes:
+            line += f", {100.0 * self.bytes_read / self.total_bytes:.0f}%"
+        self.stream.write(('done: ' if final else '') + line + '\n')
+        self.stream.flush()
+
+
+def detect_format(path):
+    if os.path.isdir(path):
+        return 'jsonl'
+    ext = os.path.splitext(path)[1].lower().lstrip('.')
+    if ext in ('json', 'jsonl', 'csv'):
+        return ext
+    if ext == 'ndjson':
+        return 'jsonl'
+    raise ValueError(f"Can't infer format from {path}; pass it explicitly")
+
+
+def iter_csv(stream):
+    """Group consecutive answer rows back into check-in records"""
+    record = None
+    for row in csv.DictReader(stream):
+        key = (row['timestamp'], row['user_name'], row['check_type'])
+        if record is None or key != record_key:
+            if record is not None:
+                yield record
+            record_key = key
+            record = {
+                'user_name': row['user_name'],
+                'check_type': row['check_type'],
+                'date': row['date'],
+                'time': row['time'],
+                'timestamp': row['timestamp'],
+                'responses': {}
+            }
+        if row['question_id']:
+            record['responses'][row['question_id']] = {
+                'label': row['label'],
+                'answer': row['answer'],
+                'timestamp': row['answered_at']
+            }
+    if record is not None:
+        yield record
+
+
+def iter_sheets(stream):
+    """Rebuild records from a 'sheets' CSV export"""
+    return iter_sheet_rows(csv.reader(stream))
+
+
+def iter_sheet_rows(rows):
+    """Rebuild records from date-prefixed worksheet rows, mapping answers to questions by column label
+
+    Without a header row the columns are those of a new worksheet. Rows under a
+    header that has none of their question set's labels (worksheets from before
+    the fixed column layout) are mapped by position instead.
+    """
+    labels = DEFAULT_HEADERS[len(SHEET_HEADERS):]
+    for row in rows:
+        if not row:
+            continue
+        if tuple(row[1:4]) == SHEET_HEADERS:
+            labels = tuple(row[4:])
+            continue
+        date, time_, user_name, type_label = row[:4]
+        check_type = check_type_for_label(type_label) or 'end'
+        questions = question_set(check_type).questions
+        by_label = {question.label: question for question in questions}
+        positional = not any(label in by_label for label in labels)
+        responses = {}
+        for n, answer in enumerate(row[4:]):
+            label = labels[n] if n < len(labels) else ''
+            if positional:
+                question = questions[n] if n < len(questions) else None
+            else:
+                question = by_label.get(label)
+                if question is None and not answer:
+                    continue  # another question set's column
+            responses[question.id if question else f"q{n + 1}"] = {
+                'label': question.label if question else label or f"Question {n + 1}",
+                'answer': answer
+            }
+        yield {
+            'user_name': user_name,
+            'check_type': check_type,
+            'date': date,
+            'time': time_,
+            'timestamp': f"{date}T{time_}",
+            'responses': responses
+        }
+
+
+def read_records(path, fmt=None, progress=None):
+    """Yield check-ins from a file or fallback log directory, one at a time"""
+    fmt = fmt or detect_format(path)
+
+    if os.path.isdir(path):
+        from fallback_store import FallbackStore
+        for record in FallbackStore(path).iter_records():
+            if progress:
+                progress.update()
+            yield record
+        return
+
+    raw = _CountingReader(open(path, 'rb'))
+    with io.TextIOWrapper(io.BufferedReader(raw, CHUNK_SIZE), encoding='utf-8', newline='') as stream:
+        if fmt == 'json':
+            records = iter_json_array(stream)
+        elif fmt == 'jsonl':
+            records = iter_jsonl(stream)
+        elif fmt == 'csv':
+            records = iter_csv(stream)
+        elif fmt == 'sheets':
+            records = iter_sheets(stream)
+        else:
+            raise ValueError(f"Unknown format: {fmt}")
+
+        for record in records:
+            if progress:
+                progress.update(bytes_read=raw.bytes_read)
+            yield record
+
+
+def write_records(records, path, fmt=None):
+    """Write check-ins to ``path`` as they arrive; returns how many were written"""
+    fmt = fmt or detect_format(path)
+    count = 0
+
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        if fmt == 'json':
+            f.write('[')
+            for record in records:
+                f.write(',\n  ' if count else '\n  ')
+                f.write(json.dumps(record, ensure_ascii=False))
+                count += 1
+            f.write('\n]\n' if count else ']\n')
+        elif fmt == 'jsonl':
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                count += 1
+        elif fmt == 'csv':
+            writer = csv.writer(f)
+            writer.writerow(CSV_FIELDS)
+            for record in records:
+                base = [record.get('date', ''), record.get('time', ''), record.get('timestamp', ''),
+                        record.get('user_name', ''), record.get('check_type', '')]
+                responses = record.get('responses') or {}
+                if not responses:
+                    writer.writerow(base + ['', '', '', ''])
+                for question_id, response in responses.items():
+                    writer.writerow(base + [question_id, response.get('label', ''),
+                                            response.get('answer', ''), response.get('timestamp', '')])
+                count += 1
+        elif fmt == 'sheets':
+            writer = csv.writer(f)
+            writer.writerow(['Date'] + list(DEFAULT_HEADERS))
+            for record in records:
+                writer.writerow([record.get('date', '')] + build_sheet_row(record))
+                count += 1
+        else:
+            raise ValueError(f"Unknown format: {fmt}")
+
+    return count
+
+
+def convert(src, dst, src_format=None, dst_format=None, show_progress=True):
+    """Stream every record from ``src`` into ``dst``; returns the record count"""
+    total = None if os.path.isdir(src) else os.path.getsize(src)
+    progress = Progress(total) if show_progress else None
+    count = write_records(read_records(src, src_format, progress), dst, dst_format)
+    if progress:
+        progress.report(final=True)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stream check-in history between formats')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    convert_cmd = commands.add_parser('convert', help='convert a backup to another format')
+    convert_cmd.add_argument('src', help='input file or fallback log directory')
+    convert_cmd.add_argument('dst', help='output file')
+    convert_cmd.add_argument('--from', dest='src_format', choices=FORMATS)
+    convert_cmd.add_argument('--to', dest='dst_format', choices=FORMATS)
+    convert_cmd.add_argument('--quiet', action='store_true', help='no progress output')
+
+    args = parser.parse_args()
+    convert(args.src, args.dst, args.src_format, args.dst_format, show_progress=not args.quiet)
+
+
+if __name__ == '__main__':
+    main()
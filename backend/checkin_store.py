@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Indexed local check-in store
+
+Keeps every check-in in a SQLite database indexed by user, date and check
+type, so history queries don't have to load and scan the JSON backups.
+Records from fallback_data.json, the fallback log and the desktop app's
+checkins_backup.json can be imported; re-importing the same file is a no-op.
+The daily team digest (digest.py), the full-text answer index
+(search_index.py) and per-user streaks (user_stats.py) live in the same
+database and are updated as each new check-in is stored.
+
+Usage:
+    python checkin_store.py import fallback_data.json ../desktop_app/checkins_backup.json
+    python checkin_store.py query --user Alice --since 2025-01-01 --type start
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import time
+import argparse
+import threading
+
+import digest
+import checkin_io
+from tasktracker_shared import search_index, user_stats
+from tasktracker_shared.questionnaire import CHECK_TYPES, canonical_responses
+from tasktracker_shared.records import record_key
+
+
+def normalize_check_type(check_type):
+    # The desktop app records 'morning'/'evening', the web app 'start'/'end'
+    return CHECK_TYPES.get(check_type, check_type)
+
+
+class CheckinStore:
+    """SQLite-backed check-in history with indexes on user, date and check type"""
+
+    def __init__(self, path='checkins.db'):
+        self.path = path
+        self._local = threading.local()
+
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS checkins ("
+                "id INTEGER PRIMARY KEY, "
+                "record_key TEXT NOT NULL UNIQUE, "
+                "user_name TEXT NOT NULL, "
+                "user_key TEXT NOT NULL, "
+                "date TEXT NOT NULL, "
+                "time TEXT, "
+                "check_type TEXT NOT NULL, "
+                "timestamp TEXT, "
+                "source TEXT, "
+                "data TEXT NOT NULL, "
+                "indexed_at REAL)"
+            )
+            # Databases created before indexed_at existed
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(checkins)")}
+            if 'indexed_at' not in columns:
+                conn.execute("ALTER TABLE checkins ADD COLUMN indexed_at REAL")
+            conn.execute("CREATE INDEX IF NOT EXISTS checkins_user_date ON checkins (user_key, date)")
+            conn.execute("CREATE INDEX IF NOT EXISTS checkins_date ON checkins (date)")
+            conn.execute("CREATE INDEX IF NOT EXISTS checkins_type_date ON checkins (check_type, date)")
+        digest.ensure_schema(conn)
+        if user_stats.ensure_schema(conn):
+            self._count_existing(conn)
+        try:
+            if search_index.ensure_schema(conn):
+                self._index_existing(conn)
+            self.searchable = True
+        except sqlite3.OperationalError as e:
+            # SQLite builds without FTS5
+            print(f"Warning: Full-text search is disabled: {e}")
+            self.searchable = False
+
+    def add(self, record, source='backend'):
+        """Index one check-in; returns False if it was already stored"""
+        return self._insert_many(self._conn(), [record], source) > 0
+
+    def import_records(self, records, source, batch_size=1000):
+        """Index an iterable of check-ins in batches; returns how many were new"""
+        conn = self._conn()
+        added = 0
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                added += self._insert_many(conn, batch, source)
+                batch = []
+        if batch:
+            added += self._insert_many(conn, batch, source)
+        return added
+
+    def import_file(self, path, batch_size=1000):
+        """Import a JSON array or JSON Lines backup, or a fallback log directory"""
+        return self.import_records(checkin_io.read_records(path),
+                                   source=os.path.basename(path.rstrip(os.sep)), batch_size=batch_size)
+
+    def query(self, user=None, start_date=None, end_date=None, check_type=None, limit=None):
+        """Return check-ins matching every given filter, oldest first"""
+        return [json.loads(data) for _, data in
+                self._select(user, start_date, end_date, check_type, limit)]
+
+    def page(self, user=None, start_date=None, end_date=None, check_type=None,
+             limit=50, after=None):
+        """Return (raw JSON rows, cursor) for one page; pass the cursor back as ``after``"""
+        rows = self._select(user, start_date, end_date, check_type, limit + 1, after)
+        more = len(rows) > limit
+        rows = rows[:limit]
+        cursor = rows[-1][0] if more and rows else None
+        return [data for _, data in rows], cursor
+
+    def version(self):
+        """(newest row id, when it was indexed); changes whenever a check-in is added"""
+        row = self._conn().execute(
+            "SELECT id, indexed_at FROM checkins ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+        return (row[0], row[1]) if row else (0, None)
+
+    def digest(self, date):
+        """The team digest of one YYYY-MM-DD day, read from its stored aggregate"""
+        return digest.read_day(self._conn(), date)
+
+    def user_stats(self, user):
+        """A user's last check-in, streaks and counts; None if they never checked in"""
+        return user_stats.user_summary(self._conn(), user)
+
+    def team_stats(self):
+        """Today's and recent participation, with every user's summary"""
+        conn = self._conn()
+        return dict(user_stats.team_participation(conn), users=user_stats.all_users(conn))
+
+    def search(self, query, user=None, start_date=None, end_date=None, limit=search_index.DEFAULT_LIMIT):
+        """Answers matching a full-text query (words, prefix*, "phrases"), newest first"""
+        if not self.searchable:
+            raise search_index.SearchError("Full-text search is not available")
+        return search_index.search(self._conn(), query, user, start_date, end_date, limit)
+
+    def _select(self, user, start_date, end_date, check_type, limit=None, after=None):
+        sql, params = self._where(user, start_date, end_date, check_type, after)
+        sql = (f"SELECT json_array(date, coalesce(time, ''), id), data FROM checkins{sql} "
+               f"ORDER BY date, coalesce(time, ''), id")
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [(json.loads(key), data) for key, data in self._conn().execute(sql, params)]
+
+    def count(self, user=None, start_date=None, end_date=None, check_type=None):
+        sql, params = self._where(user, start_date, end_date, check_type)
+        return self._conn().execute(f"SELECT COUNT(*) FROM checkins{sql}", params).fetchone()[0]
+
+    def _where(self, user, start_date, end_date, check_type, after=None):
+        clauses = []
+        params = []
+        if user:
+            clauses.append("user_key = ?")
+            params.append(user.strip().lower())
+        if start_date:
+            clauses.append("date >= ?")
+            params.append(start_date)
+        if end_date:
+            clauses.append("date <= ?")
+            params.append(end_date)
+        if check_type:
+            clauses.append("check_type = ?")
+            params.append(normalize_check_type(check_type))
+        if after is not None:
+            # Keyset pagination on the (date, time, id) sort order
+            clauses.append("(date, coalesce(time, ''), id) > (?, ?, ?)")
+            params.extend(after)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    _INSERT = (
+        "INSERT OR IGNORE INTO checkins "
+        "(record_key, user_name, user_key, date, time, check_type, timestamp, source, data, indexed_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+    )
+
+    def _insert_many(self, conn, records, source):
+        # Rows are inserted one by one so only check-ins that are actually new
+        # reach the digest, which is saved in the same transaction
+        added = 0
+        with conn:
+            batch = digest.DigestBatch(conn)
+            for record in records:
+                if record.get('responses'):
+                    # Older desktop records use their own question ids
+                    responses = canonical_responses(record.get('check_type', ''), record['responses'])
+                    if responses is not record['responses']:
+                        record = dict(record, responses=responses)
+                row = self._row(record, source)
+                if conn.execute(self._INSERT, row).rowcount > 0:
+                    batch.add(row[2], row[3], row[5], record)
+                    user_stats.record_checkin(conn, record)
+                    if self.searchable:
+                        search_index.index_record(conn, record, row[0])
+                    added += 1
+            batch.save()
+        return added
+
+    def _count_existing(self, conn):
+        """Count check-ins stored before the user stats existed, oldest first"""
+        cursor = conn.execute("SELECT data FROM checkins ORDER BY date, coalesce(time, ''), id")
+        with conn:
+            for (data,) in cursor:
+                user_stats.record_checkin(conn, json.loads(data))
+
+    def _index_existing(self, conn):
+        """Index check-ins stored before the search index existed"""
+        cursor = conn.execute("SELECT record_key, data FROM checkins ORDER BY id")
+        with conn:
+            for key, data in cursor:
+                search_index.index_record(conn, json.loads(data), key)
+
+    def _row(self, record, source):
+        user_name = record.get('user_name', '')
+        timestamp = record.get('timestamp', '')
+        return (
+            record_key(record),
+            user_name,
+            user_name.strip().lower(),
+            record.get('date') or timestamp[:10],
+            record.get('time'),
+            normalize_check_type(record.get('check_type', '')),
+            timestamp,
+            source,
+            json.dumps(record, ensure_ascii=False, separators=(',', ':')),
+            time.time()
+        )
+
+    def _conn(self):
+        # sqlite3 connections can't be shared between threads, so keep one per thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Indexed local check-in store')
+    parser.add_argument('--db', default=os.environ.get('CHECKIN_DB', 'checkins.db'))
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    import_cmd = commands.add_parser('import', help='import JSON or JSON Lines backups, or fallback log directories')
+    import_cmd.add_argument('paths', nargs='+')
+
+    query_cmd = commands.add_parser('query', help='print matching check-ins as JSON Lines')
+    query_cmd.add_argument('--user')
+    query_cmd.add_argument('--since', help='first date, YYYY-MM-DD')
+    query_cmd.add_argument('--until', help='last date, YYYY-MM-DD')
+    query_cmd.add_argument('--type', help='start/morning or end/evening')
+    query_cmd.add_argument('--limit', type=int)
+
+    args = parser.parse_args()
+    store = CheckinStore(args.db)
+
+    if args.command == 'import':
+        for path in args.paths:
+            added = store.import_file(path)
+            print(f"{path}: {added} new check-ins")
+    else:
+        for record in store.query(args.user, args.since, args.until, args.type, args.limit):
+            sys.stdout.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+if __name__ == '__main__':
+    main()
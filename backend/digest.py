@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Daily team digest
+
+For each day: who checked in and who checked out, the blockers raised in the
+morning, how people said they felt in the morning and in the evening, and the
+carry-over from each person's "Tomorrow's Focus" to what they reported as
+"Yesterday's Progress" on their next morning.
+
+Every day's digest is an aggregate row in the CheckinStore database, updated
+in the same transaction that stores a new check-in, so reading a day is one
+primary-key lookup however long the history grows. A plan is linked to the
+next morning through the (user, date) index from whichever side arrives
+last, so imports that are out of order still pair up. Databases that hold
+check-ins from before the digest existed are aggregated once on open.
+
+Usage:
+    python digest.py show --date 2025-01-02
+    python digest.py show --json
+    python digest.py rebuild
+"""
+
+import os
+import json
+import time
+import argparse
+from datetime import datetime
+
+# Question ids (see questions.json) the digest reads
+BLOCKER_QUESTION = 'blockers'
+PLAN_QUESTION = 'tomorrow_prep'
+PROGRESS_QUESTION = 'progress_yesterday'
+MOOD_QUESTIONS = {'start': 'state_of_mind', 'end': 'mood_check'}
+
+# Blocker answers that mean there is nothing blocking
+NO_BLOCKER = frozenset((
+    'none', 'no', 'nope', 'nothing', 'nil', 'n/a', 'na', '-', 'no blockers', 'all good', 'not really'
+))
+
+
+class DigestError(ValueError):
+    pass
+
+
+def parse_date(value):
+    """A YYYY-MM-DD date string, defaulting to today"""
+    if not value:
+        return datetime.now().strftime('%Y-%m-%d')
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        raise DigestError("date must be YYYY-MM-DD")
+
+
+def answer(record, question_id):
+    response = (record.get('responses') or {}).get(question_id)
+    if not isinstance(response, dict):
+        return ''
+    return str(response.get('answer') or '').strip()
+
+
+def _plain(text):
+    return ' '.join(text.lower().strip(' .!?').split())
+
+
+def mood_label(text):
+    """A mood answer as it is counted: lower case, spaces collapsed, at most 40 characters"""
+    return _plain(text)[:40]
+
+
+def is_blocker(text):
+    """True if a blocker answer names something, rather than saying there is nothing"""
+    return bool(text) and _plain(text) not in NO_BLOCKER
+
+
+def empty_day():
+    return {
+        'checked_in': {},
+        'checked_out': {},
+        'blockers': [],
+        'moods': {check_type: {} for check_type in MOOD_QUESTIONS},
+        'carry_over': {}
+    }
+
+
+def ensure_schema(conn):
+    """Create the digest table; aggregates existing check-ins if it is new"""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'digest_days'"
+    ).fetchone()
+    if exists:
+        return
+    with conn:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS digest_days ("
+            "date TEXT PRIMARY KEY, "
+            "data TEXT NOT NULL, "
+            "updated_at REAL)"
+        )
+    if conn.execute("SELECT 1 FROM checkins LIMIT 1").fetchone():
+        rebuild(conn)
+
+
+def rebuild(conn, batch_size=5000):
+    """Aggregate every stored check-in from scratch; returns how many were read"""
+    count = 0
+    with conn:
+        conn.execute("DELETE FROM digest_days")
+        batch = DigestBatch(conn)
+        cursor = conn.execute(
+            "SELECT user_key, date, check_type, data FROM checkins "
+            "ORDER BY date, coalesce(time, ''), id"
+        )
+        for user_key, date, check_type, data in cursor:
+            batch.add(user_key, date, check_type, json.loads(data))
+            count += 1
+            if count % batch_size == 0:
+                batch.save()
+        batch.save()
+    return count
+
+
+def read_day(conn, date):
+    """The digest of one day, as returned by /api/digest"""
+    row = conn.execute("SELECT data FROM digest_days WHERE date = ?", (date,)).fetchone()
+    return render(date, json.loads(row[0]) if row else empty_day())
+
+
+def render(date, day):
+    def by_time(entries):
+        return sorted(entries, key=lambda entry: (entry['time'], entry['user']))
+
+    checked_in = day['checked_in']
+    checked_out = day['checked_out']
+    return {
+        'date': date,
+        'checked_in': by_time(checked_in.values()),
+        'checked_out': by_time(checked_out.values()),
+        'not_checked_out': sorted(entry['user'] for key, entry in checked_in.items()
+                                  if key not in checked_out),
+        'blockers': by_time(day['blockers']),
+        'moods': {check_type: dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+                  for check_type, counts in day['moods'].items()},
+        'carry_over': sorted(day['carry_over'].values(), key=lambda entry: entry['user'])
+    }
+
+
+class DigestBatch:
+    """Digest updates for the check-ins stored in one transaction
+
+    Each day touched is loaded once, updated in memory for every check-in of
+    the batch and written back by ``save``, which must run inside the same
+    transaction as the inserts.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.days = {}
+
+    def day(self, date):
+        day = self.days.get(date)
+        if day is None:
+            row = self.conn.execute("SELECT data FROM digest_days WHERE date = ?", (date,)).fetchone()
+            day = self.days[date] = json.loads(row[0]) if row else empty_day()
+        return day
+
+    def add(self, user_key, date, check_type, record):
+        """Fold one newly stored check-in into its day"""
+        if not date or check_type not in MOOD_QUESTIONS:
+            return
+        user = record.get('user_name', '').strip() or user_key
+        entry = {'user': user, 'time': record.get('time') or ''}
+        day = self.day(date)
+
+        if check_type == 'start':
+            day['checked_in'][user_key] = entry
+            blocker = answer(record, BLOCKER_QUESTION)
+            if is_blocker(blocker):
+                day['blockers'].append(dict(entry, blocker=blocker))
+            plan = self.conn.execute(
+                "SELECT date, data FROM checkins WHERE user_key = ? AND date < ? AND check_type = 'end' "
+                "ORDER BY date DESC, coalesce(time, '') DESC, id DESC LIMIT 1",
+                (user_key, date)
+            ).fetchone()
+            if plan:
+                self._carry_over(day, user_key, user, plan[0], json.loads(plan[1]), record)
+        else:
+            day['checked_out'][user_key] = entry
+            # An evening imported after the morning that follows it
+            morning = self.conn.execute(
+                "SELECT date, data FROM checkins WHERE user_key = ? AND date > ? AND check_type = 'start' "
+                "ORDER BY date, coalesce(time, ''), id LIMIT 1",
+                (user_key, date)
+            ).fetchone()
+            if morning:
+                next_day = self.day(morning[0])
+                linked = next_day['carry_over'].get(user_key)
+                if linked is None or linked['planned_on'] <= date:
+                    self._carry_over(next_day, user_key, user, date, record, json.loads(morning[1]))
+
+        mood = mood_label(answer(record, MOOD_QUESTIONS[check_type]))
+        if mood:
+            counts = day['moods'][check_type]
+            counts[mood] = counts.get(mood, 0) + 1
+
+    def _carry_over(self, day, user_key, user, planned_on, evening, morning):
+        day['carry_over'][user_key] = {
+            'user': user,
+            'planned_on': planned_on,
+            'planned': answer(evening, PLAN_QUESTION),
+            'reported': answer(morning, PROGRESS_QUESTION)
+        }
+
+    def save(self):
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO digest_days (date, data, updated_at) VALUES (?, ?, ?)",
+            [(date, json.dumps(day, ensure_ascii=False, separators=(',', ':')), now)
+             for date, day in self.days.items()]
+        )
+        self.days = {}
+
+
+def format_digest(digest):
+    """Plain-text digest for the terminal or an email"""
+    lines = [f"Team digest for {digest['date']}"]
+
+    def names(entries):
+        return ', '.join(entry['user'] for entry in entries) or '-'
+
+    lines.append(f"Checked in ({len(digest['checked_in'])}): {names(digest['checked_in'])}")
+    lines.append(f"Checked out ({len(digest['checked_out'])}): {names(digest['checked_out'])}")
+    if digest['not_checked_out']:
+        lines.append(f"Not checked out: {', '.join(digest['not_checked_out'])}")
+
+    lines.append("Blockers:" if digest['blockers'] else "Blockers: none")
+    for blocker in digest['blockers']:
+        lines.append(f"  - {blocker['user']}: {blocker['blocker']}")
+
+    for check_type, title in (('start', 'Morning mood'), ('end', 'Evening mood')):
+        counts = digest['moods'].get(check_type)
+        if counts:
+            lines.append(f"{title}: " + ', '.join(f"{mood} x{count}" for mood, count in counts.items()))
+
+    if digest['carry_over']:
+        lines.append("Carry-over:")
+    for entry in digest['carry_over']:
+        lines.append(f"  - {entry['user']} planned on {entry['planned_on']}: {entry['planned'] or '-'}")
+        lines.append(f"    reported: {entry['reported'] or '-'}")
+    return '\n'.join(lines)
+
+
+def main():
+    from checkin_store import CheckinStore
+
+    parser = argparse.ArgumentParser(description='Daily team digest')
+    parser.add_argument('--db', default=os.environ.get('CHECKIN_DB', 'checkins.db'))
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    show_cmd = commands.add_parser('show', help="print a day's digest")
+    show_cmd.add_argument('--date', help='YYYY-MM-DD, default today')
+    show_cmd.add_argument('--json', action='store_true', help='print JSON instead of text')
+
+    commands.add_parser('rebuild', help='aggregate every stored check-in again')
+
+    args = parser.parse_args()
+    store = CheckinStore(args.db)
+
+    if args.command == 'rebuild':
+        print(f"{rebuild(store._conn())} check-ins aggregated")
+        return
+
+    try:
+        digest = store.digest(parse_date(args.date))
+    except DigestError as e:
+        parser.error(str(e))
+    print(json.dumps(digest, ensure_ascii=False, indent=2) if args.json else format_digest(digest))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Local fake of the Google Sheets v4 REST API
+
+Implements the subset of endpoints gspread uses in this project (spreadsheet
+metadata, addSheet/deleteSheet/updateSheetProperties batch updates, values
+get/batchGet/update/append) against in-memory spreadsheets, with optional
+per-request latency. Point the backend at it with SHEETS_API_URL:
+
+    python fake_sheets.py --port 8765 --latency 0.3
+    SHEETS_API_URL=http://127.0.0.1:8765 gunicorn app:app
+"""
+
+import re
+import json
+import time
+import argparse
+import threading
+from urllib.parse import urlsplit, parse_qs, unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+GOOGLE_SHEETS_URL = 'https://sheets.googleapis.com'
+
+_CELL = re.compile(r'^([A-Za-z]*)(\d*)$')
+
+
+class RedirectSession(requests.Session):
+    """requests session that sends Sheets API calls to another base URL"""
+
+    def __init__(self, base_url):
+        super().__init__()
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, url, *args, **kwargs):
+        if url.startswith(GOOGLE_SHEETS_URL):
+            url = self.base_url + url[len(GOOGLE_SHEETS_URL):]
+        return super().request(method, url, *args, **kwargs)
+
+
+def connect(base_url):
+    """Return an unauthenticated gspread client talking to ``base_url``"""
+    import gspread
+    return gspread.Client(None, session=RedirectSession(base_url))
+
+
+class FakeSheetsError(Exception):
+    def __init__(self, code, message, status='INVALID_ARGUMENT'):
+        super().__init__(message)
+        self.code = code
+        self.status = status
+
+
+def _column_index(letters):
+    index = 0
+    for char in letters.upper():
+        index = index * 26 + ord(char) - 64
+    return index
+
+
+def _column_letters(index):
+    letters = ''
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def split_range(a1):
+    """Split ``'Title'!A1:B2`` into (title, cells)"""
+    if a1.startswith("'"):
+        end = 1
+        while True:
+            end = a1.index("'", end)
+            if a1[end + 1:end + 2] == "'":
+                end += 2
+                continue
+            break
+        title = a1[1:end].replace("''", "'")
+        rest = a1[end + 1:]
+    else:
+        title, _, rest = a1.partition('!')
+        rest = '!' + rest if rest else ''
+    return title, rest[1:] if rest.startswith('!') else rest
+
+
+def parse_cells(cells):
+    """Return 1-based (row0, col0, row1, col1) bounds; None means open-ended"""
+    if not cells:
+        return 1, 1, None, None
+    start, _, end = cells.partition(':')
+    m0, m1 = _CELL.match(start), _CELL.match(end or start)
+    if not m0 or not m1:
+        raise FakeSheetsError(400, f"Unable to parse range: {cells}")
+    col0 = _column_index(m0.group(1)) if m0.group(1) else 1
+    row0 = int(m0.group(2)) if m0.group(2) else 1
+    col1 = _column_index(m1.group(1)) if m1.group(1) else None
+    row1 = int(m1.group(2)) if m1.group(2) else None
+    return row0, col0, row1, col1
+
+
+class FakeSpreadsheetStore:
+    """In-memory spreadsheets plus per-operation call counters"""
+
+    def __init__(self):
+        self.spreadsheets = {}
+        self.calls = {}
+        self.lock = threading.Lock()
+        self._next_sheet_id = 1
+
+    def count(self, operation):
+        self.calls[operation] = self.calls.get(operation, 0) + 1
+
+    def spreadsheet(self, spreadsheet_id):
+        if spreadsheet_id not in self.spreadsheets:
+            self.spreadsheets[spreadsheet_id] = {'title': f"Fake {spreadsheet_id}", 'sheets': []}
+            self.add_sheet(spreadsheet_id, {'title': 'Sheet1'})
+        return self.spreadsheets[spreadsheet_id]
+
+    def sheet(self, spreadsheet_id, title, a1):
+        for sheet in self.spreadsheet(spreadsheet_id)['sheets']:
+            if sheet['properties']['title'] == title:
+                return sheet
+        raise FakeSheetsError(400, f"Unable to parse range: {a1}")
+
+    def metadata(self, spreadsheet_id):
+        book = self.spreadsheet(spreadsheet_id)
+        return {
+            'spreadsheetId': spreadsheet_id,
+            'properties': {'title': book['title'], 'locale': 'en_US', 'timeZone': 'Etc/GMT'},
+            'sheets': [{'properties': sheet['properties']} for sheet in book['sheets']]
+        }
+
+    def add_sheet(self, spreadsheet_id, properties):
+        book = self.spreadsheet(spreadsheet_id)
+        title = properties['title']
+        if any(sheet['properties']['title'] == title for sheet in book['sheets']):
+            raise FakeSheetsError(
+                400, f'Invalid requests[0].addSheet: A sheet with the name "{title}" already exists. '
+                     'Please enter another name.'
+            )
+        grid = properties.get('gridProperties', {})
+        sheet_properties = {
+            'sheetId': self._next_sheet_id,
+            'title': title,
+            'index': len(book['sheets']),
+            'sheetType': 'GRID',
+            'gridProperties': {
+                'rowCount': grid.get('rowCount', 1000),
+                'columnCount': grid.get('columnCount', 26)
+            }
+        }
+        self._next_sheet_id += 1
+        book['sheets'].append({'properties': sheet_properties, 'values': []})
+        return sheet_properties
+
+    def delete_sheet(self, spreadsheet_id, sheet_id):
+        book = self.spreadsheet(spreadsheet_id)
+        book['sheets'] = [s for s in book['sheets'] if s['properties']['sheetId'] != sheet_id]
+
+    def resize_sheet(self, spreadsheet_id, properties):
+        """Apply the gridProperties of an updateSheetProperties request (gspread's resize)"""
+        book = self.spreadsheet(spreadsheet_id)
+        for sheet in book['sheets']:
+            if sheet['properties']['sheetId'] == properties['sheetId']:
+                sheet['properties']['gridProperties'].update(properties.get('gridProperties', {}))
+                return
+        raise FakeSheetsError(400, f"No grid with id: {properties['sheetId']}")
+
+    def get_values(self, spreadsheet_id, a1):
+        title, cells = split_range(a1)
+        sheet = self.sheet(spreadsheet_id, title, a1)
+        row0, col0, row1, col1 = parse_cells(cells)
+        if cells and ':' not in cells:
+            row1, col1 = row0, col0
+        rows = sheet['values'][row0 - 1:row1]
+        values = [row[col0 - 1:col1] for row in rows]
+        while values and not values[-1]:
+            values.pop()
+        result = {'range': a1, 'majorDimension': 'ROWS'}
+        if values:
+            result['values'] = values
+        return result
+
+    def update_values(self, spreadsheet_id, a1, values):
+        title, cells = split_range(a1)
+        sheet = self.sheet(spreadsheet_id, title, a1)
+        row0, col0, _, _ = parse_cells(cells)
+        self._write(sheet, row0, col0, values)
+        return {
+            'spreadsheetId': spreadsheet_id,
+            'updatedRange': a1,
+            'updatedRows': len(values),
+            'updatedColumns': max((len(row) for row in values), default=0),
+            'updatedCells': sum(len(row) for row in values)
+        }
+
+    def append_values(self, spreadsheet_id, a1, values):
+        title, _ = split_range(a1)
+        sheet = self.sheet(spreadsheet_id, title, a1)
+        row0 = len(sheet['values']) + 1
+        self._write(sheet, row0, 1, values)
+        last = _column_letters(max((len(row) for row in values), default=1))
+        updated = f"'{title}'!A{row0}:{last}{row0 + len(values) - 1}"
+        result = {
+            'spreadsheetId': spreadsheet_id,
+            'updates': {
+                'spreadsheetId': spreadsheet_id,
+                'updatedRange': updated,
+                'updatedRows': len(values),
+                'updatedColumns': max((len(row) for row in values), default=0),
+                'updatedCells': sum(len(row) for row in values)
+            }
+        }
+        if row0 > 1:
+            result['tableRange'] = f"'{title}'!A1:{last}{row0 - 1}"
+        return result
+
+    def _write(self, sheet, row0, col0, values):
+        rows = sheet['values']
+        while len(rows) < row0 - 1 + len(values):
+            rows.append([])
+        for offset, new in enumerate(values):
+            row = rows[row0 - 1 + offset]
+            if len(row) < col0 - 1 + len(new):
+                row.extend([''] * (col0 - 1 + len(new) - len(row)))
+            row[col0 - 1:col0 - 1 + len(new)] = [str(v) for v in new]
+        grid = sheet['properties']['gridProperties']
+        grid['rowCount'] = max(grid['rowCount'], len(rows))
+        grid['columnCount'] = max(grid['columnCount'], max((len(r) for r in rows), default=0))
+
+
+class FakeSheetsHandler(BaseHTTPRequestHandler):
+    """Routes Sheets v4 REST calls to a FakeSpreadsheetStore"""
+
+    store = None
+    latency = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def _dispatch(self, method):
+        if self.latency:
+            time.sleep(self.latency)
+
+        parts = urlsplit(self.path)
+        path = parts.path
+        query = parse_qs(parts.query)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}') if length else {}
+
+        try:
+            if path == '/_fake/stats':
+                with self.store.lock:
+                    return self._send(200, {'calls': dict(self.store.calls)})
+            if path == '/_fake/reset' and method == 'POST':
+                with self.store.lock:
+                    self.store.spreadsheets.clear()
+                    self.store.calls.clear()
+                return self._send(200, {})
+
+            prefix = '/v4/spreadsheets/'
+            if not path.startswith(prefix):
+                raise FakeSheetsError(404, f"Unknown path {path}", 'NOT_FOUND')
+            rest = path[len(prefix):]
+
+            with self.store.lock:
+                result = self._route(method, rest, query, body)
+            self._send(200, result)
+        except FakeSheetsError as e:
+            self._send(e.code, {'error': {'code': e.code, 'message': str(e), 'status': e.status}})
+
+    def _route(self, method, rest, query, body):
+        store = self.store
+
+        if method == 'GET' and '/' not in rest and ':' not in rest:
+            store.count('get_metadata')
+            return store.metadata(unquote(rest))
+
+        if method == 'POST' and rest.endswith(':batchUpdate') and '/' not in rest:
+            spreadsheet_id = unquote(rest[:-len(':batchUpdate')])
+            replies = []
+            for request in body.get('requests', []):
+                if 'addSheet' in request:
+                    store.count('add_sheet')
+                    properties = store.add_sheet(spreadsheet_id, request['addSheet']['properties'])
+                    replies.append({'addSheet': {'properties': properties}})
+                elif 'deleteSheet' in request:
+                    store.count('delete_sheet')
+                    store.delete_sheet(spreadsheet_id, request['deleteSheet']['sheetId'])
+                    replies.append({})
+                elif 'updateSheetProperties' in request:
+                    store.count('update_sheet_properties')
+                    store.resize_sheet(spreadsheet_id, request['updateSheetProperties']['properties'])
+                    replies.append({})
+                else:
+                    raise FakeSheetsError(400, f"Unsupported request: {list(request)}")
+            return {'spreadsheetId': spreadsheet_id, 'replies': replies}
+
+        spreadsheet_id, _, values_path = rest.partition('/values')
+        spreadsheet_id = unquote(spreadsheet_id)
+
+        if method == 'GET' and values_path == ':batchGet':
+            store.count('values_batch_get')
+            return {
+                'spreadsheetId': spreadsheet_id,
+                'valueRanges': [store.get_values(spreadsheet_id, a1) for a1 in query.get('ranges', [])]
+            }
+
+        if not values_path.startswith('/'):
+            raise FakeSheetsError(404, f"Unknown path {rest}", 'NOT_FOUND')
+        a1 = unquote(values_path[1:])
+
+        if method == 'POST' and a1.endswith(':append'):
+            store.count('values_append')
+            return store.append_values(spreadsheet_id, a1[:-len(':append')], body.get('values', []))
+        if method == 'PUT':
+            store.count('values_update')
+            return store.update_values(spreadsheet_id, a1, body.get('values', []))
+        if method == 'GET':
+            store.count('values_get')
+            return store.get_values(spreadsheet_id, a1)
+
+        raise FakeSheetsError(404, f"Unknown path {rest}", 'NOT_FOUND')
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeSheetsServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Clients hold many connections open at once during load tests
+    request_queue_size = 256
+
+
+def make_server(host='127.0.0.1', port=8765, latency=0.0):
+    """Create a fake Sheets server; call serve_forever() or run it in a thread"""
+    handler = type('Handler', (FakeSheetsHandler,), {
+        'store': FakeSpreadsheetStore(),
+        'latency': latency
+    })
+    return FakeSheetsServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local fake Google Sheets API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds to wait before answering each request')
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.latency)
+    print(f"Fake Sheets API listening on http://{args.host}:{args.port} (latency {args.latency}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
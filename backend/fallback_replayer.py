@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Replays check-ins from the local fallback log into Google Sheets
+
+Usage:
+    python fallback_replayer.py status
+    python fallback_replayer.py replay
+"""
+
+import os
+import sys
+import random
+import argparse
+import threading
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+import gspread
+
+import metrics
+from tasktracker_shared.records import record_key
+from tasktracker_shared.sheet_layout import build_sheet_row
+
+
+class FallbackReplayer:
+    """Outbox over the fallback log: pushes pending check-ins to Sheets once it is reachable.
+
+    A record is pending until its key is listed in ``synced.log`` next to the
+    fallback segments. Each pass groups pending records by date, reads the
+    Timestamp/Name/Type columns of that date's worksheet once, and appends only
+    the rows that are not already there with a single ``append_rows`` call, so
+    a pass that is interrupted after appending but before marking records
+    synced never duplicates them. Failed passes back off exponentially, and a
+    429 waits at least as long as Retry-After says. Segments from past days
+    are deleted once every record in them is synced.
+    """
+
+    SYNCED_FILE = 'synced.log'
+    LOCK_FILE = 'replay.lock'
+
+    def __init__(self, sheets_api, interval=60.0, base_delay=5.0, max_delay=900.0):
+        self.sheets_api = sheets_api
+        self.store = sheets_api.fallback_store
+        self.interval = interval
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.synced_path = os.path.join(self.store.directory, self.SYNCED_FILE)
+        self.lock_path = os.path.join(self.store.directory, self.LOCK_FILE)
+
+        self.replayed = 0
+        self.failures = 0
+        self.last_error = None
+        self._delay = 0.0
+        self._clean_signature = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='fallback-replayer', daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        """Run a pass now instead of waiting for the next interval"""
+        self._wake.set()
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(5)
+
+    def stats(self):
+        return {
+            'replayed': self.replayed,
+            'failures': self.failures,
+            'backoff_seconds': round(self._delay, 1),
+            'last_error': self.last_error
+        }
+
+    def pending(self, synced=None):
+        """Fallback records whose key is not yet in the synced log"""
+        synced = self._load_synced() if synced is None else synced
+        return [record for record in self.store.iter_records() if record_key(record) not in synced]
+
+    def replay_once(self):
+        """Push every pending record; returns how many reached Sheets"""
+        signature = self._signature()
+        if signature == self._clean_signature:
+            return 0
+
+        with open(self.lock_path, 'a') as lock:
+            if fcntl:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return 0  # another worker is replaying
+
+            synced = self._load_synced()
+            by_date = {}
+            for record in self.pending(synced):
+                date = record.get('date') or record.get('timestamp', '')[:10]
+                by_date.setdefault(date, []).append(record)
+
+            pushed = 0
+            for sheet_name in sorted(by_date):
+                records = by_date[sheet_name]
+                pushed += self._replay_date(sheet_name, records)
+                self._mark_synced(records)
+                synced.update(record_key(record) for record in records)
+
+            self._compact(synced)
+            self._clean_signature = self._signature()
+
+        if pushed:
+            print(f"Replayed {pushed} fallback check-ins to Google Sheets")
+        return pushed
+
+    def _replay_date(self, sheet_name, records):
+        """Append the records missing from one date's worksheet in a single call"""
+        worksheet = self.sheets_api._get_worksheet(sheet_name)
+        with self.sheets_api.quota.limit('read'), metrics.sheets_call('get_values'):
+            existing = {tuple(row[:3]) for row in worksheet.get_values('A:C')}
+
+        missing = []
+        for record in records:
+            identity = tuple(str(cell) for cell in build_sheet_row(record)[:3])
+            if identity not in existing:
+                existing.add(identity)
+                missing.append(record)
+
+        if missing:
+            self.sheets_api._save_batch_to_sheets(sheet_name, missing)
+            self.replayed += len(missing)
+            metrics.fallback_replayed.inc(amount=len(missing))
+        return len(missing)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.replay_once()
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                self._delay = self._next_delay(e)
+                print(f"Fallback replay failed, retrying in {self._delay:.0f}s: {e}")
+            else:
+                self._delay = 0.0
+                self.last_error = None
+
+            self._wake.wait(self._delay or self.interval)
+            self._wake.clear()
+
+    def _next_delay(self, error):
+        delay = min(max(self._delay * 2, self.base_delay), self.max_delay)
+        response = getattr(error, 'response', None)
+        if isinstance(error, gspread.exceptions.APIError) and getattr(response, 'status_code', None) == 429:
+            # Quota exhausted: per-minute quotas refill after a minute at most
+            retry_after = response.headers.get('Retry-After', '')
+            delay = max(delay, float(retry_after) if retry_after.isdigit() else 60.0)
+        return delay * random.uniform(1.0, 1.25)
+
+    def _load_synced(self):
+        if not os.path.exists(self.synced_path):
+            return set()
+        with open(self.synced_path, 'r', encoding='utf-8') as f:
+            return {line.rstrip('\n') for line in f if line.strip()}
+
+    def _mark_synced(self, records):
+        with open(self.synced_path, 'a', encoding='utf-8') as f:
+            f.write(''.join(record_key(record) + '\n' for record in records))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _compact(self, synced):
+        """Delete fully synced segments from past days and prune the synced log"""
+        today = datetime.now().strftime('%Y-%m-%d')
+
+        done = []
+        for path in self.store.segments():
+            name = os.path.basename(path)
+            if name[len(self.store.prefix):].startswith(today):
+                continue  # other workers may still be appending to today's segments
+            if all(record_key(record) in synced for record in self.store.iter_segment(path)):
+                done.append(path)
+        if not done:
+            return
+
+        self.store.drop_segments(done)
+        still_referenced = {record_key(record) for record in self.store.iter_records()}
+        tmp_path = self.synced_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(''.join(key + '\n' for key in sorted(synced & still_referenced)))
+        os.replace(tmp_path, self.synced_path)
+
+    def _signature(self):
+        """Cheap fingerprint of the fallback log, to skip passes when nothing changed"""
+        paths = self.store.segments()
+        if self.store.legacy_file:
+            paths.append(self.store.legacy_file)
+        signature = []
+        for path in paths:
+            try:
+                signature.append((path, os.path.getsize(path)))
+            except OSError:
+                pass
+        return tuple(signature)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay fallback check-ins into Google Sheets')
+    parser.add_argument('command', choices=['status', 'replay'])
+    args = parser.parse_args()
+
+    # Replay in the foreground only; don't start the app's background threads
+    os.environ['SHEETS_ASYNC_WRITES'] = '0'
+    os.environ['FALLBACK_REPLAY'] = '0'
+    from sheets_api import SheetsAPI
+    sheets_api = SheetsAPI()
+    replayer = FallbackReplayer(sheets_api)
+
+    pending = replayer.pending()
+    if args.command == 'status':
+        print(f"{len(pending)} check-ins pending in {sheets_api.fallback_store.directory}")
+        return
+    if not sheets_api.wait_ready(60):
+        sys.exit(f"Google Sheets is not available ({sheets_api.last_error}); nothing replayed")
+    print(f"{replayer.replay_once()} of {len(pending)} pending check-ins appended "
+          f"(the rest were already in the sheet)")
+
+
+if __name__ == '__main__':
+    main()
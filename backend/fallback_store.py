@@ -0,0 +1,208 @@
+import os
+import json
+import time
+import threading
+from datetime import datetime
+
+from checkin_io import iter_json_array
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+class FallbackStore:
+    """Append-only, segmented JSON Lines log for check-ins that could not reach Google Sheets.
+
+    Each record is written as one line with a single ``write`` on an O_APPEND
+    descriptor, so saving costs the same no matter how much history exists and
+    several worker processes can append to the same segment without losing
+    records. Segments are named ``<prefix><date>-<seq>.jsonl`` and roll over
+    when the date changes or the current one grows past ``max_segment_bytes``.
+    """
+
+    SEGMENT_SUFFIX = '.jsonl'
+
+    def __init__(self, directory='fallback_data', max_segment_bytes=8 * 1024 * 1024,
+                 fsync_every=16, fsync_interval=1.0, legacy_file=None, prefix='fallback-'):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_segment_bytes = max_segment_bytes
+        self.fsync_every = max(1, fsync_every)
+        self.fsync_interval = fsync_interval
+        self.legacy_file = legacy_file
+
+        self._fd = None
+        self._segment_path = None
+        self._segment_date = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._new_segment = False
+        self._lock = threading.Lock()
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def append(self, record):
+        """Append one record and fsync once the batch threshold is reached"""
+        line = self._line(record)
+
+        with self._lock:
+            self._write(line)
+            self._unsynced += 1
+            if (self._unsynced >= self.fsync_every
+                    or time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync()
+
+    def append_many(self, records):
+        """Append several records with one write and one fsync"""
+        data = b''.join(self._line(record) for record in records)
+        if not data:
+            return
+
+        with self._lock:
+            self._write(data)
+            self._unsynced += 1
+            self._sync()
+
+    @staticmethod
+    def _line(record):
+        return (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+    def _write(self, data):
+        fd = self._current_fd(len(data))
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            os.write(fd, data)
+        finally:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def sync(self):
+        """Flush appended records to disk"""
+        with self._lock:
+            self._sync()
+
+    def close(self):
+        """Sync and close the current segment"""
+        with self._lock:
+            self._close()
+
+    def rotate(self):
+        """Close the current segment; the next append starts a new one"""
+        with self._lock:
+            self._close()
+            self._new_segment = True
+
+    def clear(self):
+        """Close and delete every segment"""
+        with self._lock:
+            self._close()
+            for path in self.segments():
+                os.remove(path)
+
+    def drop_segments(self, paths):
+        """Delete the given segments, except the one this process is appending to"""
+        with self._lock:
+            for path in paths:
+                if path != self._segment_path and os.path.exists(path):
+                    os.remove(path)
+
+    def _sync(self):
+        if self._fd is not None and self._unsynced:
+            os.fsync(self._fd)
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _close(self):
+        if self._fd is not None:
+            self._sync()
+            os.close(self._fd)
+            self._fd = None
+            self._segment_path = None
+
+    def segments(self):
+        """Return segment paths in write order"""
+        names = [
+            name for name in os.listdir(self.directory)
+            if name.startswith(self.prefix) and name.endswith(self.SEGMENT_SUFFIX)
+        ]
+        return [os.path.join(self.directory, name) for name in sorted(names)]
+
+    def __iter__(self):
+        return self.iter_records()
+
+    def iter_records(self):
+        """Yield every stored record, oldest first, including the legacy JSON file"""
+        if self.legacy_file and os.path.exists(self.legacy_file):
+            with open(self.legacy_file, 'r', encoding='utf-8') as f:
+                yield from iter_json_array(f)
+
+        for path in self.segments():
+            yield from self.iter_segment(path)
+
+    @staticmethod
+    def iter_segment(path):
+        """Yield the records of one segment file"""
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # Torn write from a crash mid-append; reopening the segment ended it
+                    # with a newline, so the records after it are on lines of their own
+                    continue
+
+    def _current_fd(self, incoming):
+        """Return the descriptor to append to, rotating by date or size"""
+        today = datetime.now().strftime('%Y-%m-%d')
+
+        if self._fd is not None:
+            if self._segment_date != today:
+                self._close()
+            elif os.fstat(self._fd).st_size + incoming > self.max_segment_bytes:
+                self._close()
+
+        if self._fd is None:
+            self._segment_path = self._pick_segment(today, incoming)
+            self._segment_date = today
+            self._fd = os.open(self._segment_path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+            self._new_segment = False
+            self._end_torn_line(self._fd)
+
+        return self._fd
+
+    @staticmethod
+    def _end_torn_line(fd):
+        """Newline-terminate a last line left unfinished by a crash, so appends start on a new line"""
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            size = os.fstat(fd).st_size
+            if size:
+                os.lseek(fd, size - 1, os.SEEK_SET)
+                if os.read(fd, 1) != b'\n':
+                    os.write(fd, b'\n')
+        finally:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def _pick_segment(self, date, incoming):
+        """Find the newest segment for ``date`` that still has room"""
+        prefix = f"{self.prefix}{date}-"
+        seqs = [
+            int(name[len(prefix):-len(self.SEGMENT_SUFFIX)])
+            for name in os.listdir(self.directory)
+            if name.startswith(prefix) and name.endswith(self.SEGMENT_SUFFIX)
+            and name[len(prefix):-len(self.SEGMENT_SUFFIX)].isdigit()
+        ]
+        seq = max(seqs) if seqs else 0
+        path = os.path.join(self.directory, f"{prefix}{seq:04d}{self.SEGMENT_SUFFIX}")
+
+        if os.path.exists(path) and (self._new_segment
+                                     or os.path.getsize(path) + incoming > self.max_segment_bytes):
+            seq += 1
+            path = os.path.join(self.directory, f"{prefix}{seq:04d}{self.SEGMENT_SUFFIX}")
+
+        return path
@@ -0,0 +1,110 @@
+"""
+Read side of the check-in API: GET /api/checkins
+
+Pages through the local CheckinStore with an opaque keyset cursor and
+user/date/type filters. Every response carries an ETag and Last-Modified
+derived from the store version, which is checked before any query runs, so
+a dashboard polling an unchanged history gets a 304 without touching the
+data. Serialized pages are also kept in a small LRU keyed by ETag.
+"""
+
+import json
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+FILTERS = ('user', 'date', 'since', 'until', 'type')
+
+
+class HistoryError(ValueError):
+    pass
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        date, time_, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return [str(date), str(time_), int(row_id)]
+    except (ValueError, TypeError):
+        raise HistoryError("Invalid cursor")
+
+
+class CheckinHistory:
+    """Builds cacheable /api/checkins responses from a CheckinStore"""
+
+    def __init__(self, store, cache_size=64):
+        self.store = store
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def respond(self, args, if_none_match=None, if_modified_since=None):
+        """Return (status, body bytes, headers) for a query-string mapping"""
+        params = {name: args.get(name) for name in FILTERS + ('limit', 'cursor') if args.get(name)}
+        try:
+            limit = min(max(int(params.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+        except ValueError:
+            raise HistoryError("limit must be an integer")
+        after = decode_cursor(params['cursor']) if 'cursor' in params else None
+
+        version, indexed_at = self.store.version()
+        digest = hashlib.sha1(json.dumps(sorted(params.items())).encode()).hexdigest()[:16]
+        etag = f'W/"{version}-{digest}"'
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if indexed_at:
+            headers['Last-Modified'] = formatdate(int(indexed_at), usegmt=True)
+
+        if self._not_modified(etag, indexed_at, if_none_match, if_modified_since):
+            return 304, b'', headers
+
+        with self._lock:
+            body = self._cache.get(etag)
+            if body is not None:
+                self._cache.move_to_end(etag)
+        if body is None:
+            body = self._render(params, limit, after)
+            with self._lock:
+                self._cache[etag] = body
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        headers['Content-Type'] = 'application/json'
+        return 200, body, headers
+
+    def _render(self, params, limit, after):
+        date = params.get('date')
+        rows, cursor = self.store.page(
+            user=params.get('user'),
+            start_date=date or params.get('since'),
+            end_date=date or params.get('until'),
+            check_type=params.get('type'),
+            limit=limit,
+            after=after
+        )
+        # Rows are already JSON in the store; splice them in instead of re-encoding
+        next_cursor = json.dumps(encode_cursor(cursor)) if cursor else 'null'
+        return (
+            '{"checkins":[' + ','.join(rows) + '],"next_cursor":' + next_cursor + '}'
+        ).encode('utf-8')
+
+    @staticmethod
+    def _not_modified(etag, indexed_at, if_none_match, if_modified_since):
+        if if_none_match:
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            weak = etag[2:] if etag.startswith('W/') else etag
+            return '*' in tags or etag in tags or weak in tags
+        if if_modified_since and indexed_at:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(indexed_at) <= since
+        return False
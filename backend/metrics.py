@@ -0,0 +1,224 @@
+"""
+In-process metrics in Prometheus text format
+
+Counters and histograms are plain Python objects guarded by one lock each,
+so recording costs a bisect and a few integer additions. Set
+METRICS_ENABLED=0 to turn every recording call into a no-op and hide
+/api/metrics.
+"""
+
+import os
+import time
+import threading
+from bisect import bisect_left
+
+ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+
+# Seconds; covers a fast cached request up to a slow Sheets round trip
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        if not ENABLED:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket (+Inf last), sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        if not ENABLED:
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def time(self, *labels):
+        """Context manager observing the duration of its block"""
+        return _Timer(self, labels) if ENABLED else _NULL_TIMER
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._series.items())
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Gauge whose value is read from a callback when metrics are scraped"""
+
+    def __init__(self, name, help_text, callback=None):
+        self.name = name
+        self.help = help_text
+        self.callback = callback
+
+    def render(self):
+        if self.callback is None:
+            return []
+        try:
+            value = self.callback()
+        except Exception:
+            return []
+        if value is None:
+            return []
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge",
+                f"{self.name} {_number(value)}"]
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'started')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+        return False
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _SheetsCall:
+    __slots__ = ('call', 'started')
+
+    def __init__(self, call):
+        self.call = call
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        sheets_call_seconds.observe(time.perf_counter() - self.started, self.call)
+        sheets_calls.inc(self.call, 'ok' if exc_type is None else 'error')
+        return False
+
+
+def sheets_call(call):
+    """Context manager counting and timing one Google Sheets API call"""
+    return _SheetsCall(call) if ENABLED else _NULL_TIMER
+
+
+http_requests = Counter(
+    'checkin_http_requests_total', 'HTTP requests handled.', ('endpoint', 'method', 'status'))
+http_request_seconds = Histogram(
+    'checkin_http_request_duration_seconds', 'HTTP request latency.', ('endpoint', 'method'))
+chatbot_answer_seconds = Histogram(
+    'checkin_chatbot_answer_duration_seconds', 'Time spent in ChatBot.process_answer.',
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01))
+sheets_calls = Counter(
+    'checkin_sheets_api_calls_total', 'Google Sheets API calls by type and outcome.', ('call', 'outcome'))
+sheets_call_seconds = Histogram(
+    'checkin_sheets_api_call_duration_seconds', 'Google Sheets API call latency.', ('call',))
+sheets_throttled = Counter(
+    'checkin_sheets_throttled_total', 'Sheets API calls delayed by the client-side quota.', ('kind',))
+sheets_throttle_seconds = Counter(
+    'checkin_sheets_throttle_wait_seconds_total', 'Time spent waiting for Sheets API quota.', ('kind',))
+sheets_coalesced = Counter(
+    'checkin_sheets_coalesced_total', 'Worksheet lookups served by an identical in-flight call.')
+worksheet_cache = Counter(
+    'checkin_worksheet_cache_total', 'Worksheet handle cache lookups.', ('result',))
+fallback_writes = Counter(
+    'checkin_fallback_writes_total', 'Check-ins written to the local fallback log.')
+fallback_write_seconds = Histogram(
+    'checkin_fallback_write_duration_seconds', 'Fallback log write latency.')
+fallback_replayed = Counter(
+    'checkin_fallback_replayed_total', 'Fallback check-ins replayed into Google Sheets.')
+sessions_held = Gauge('checkin_active_sessions', 'Conversations held in the session store.')
+sheets_ready = Gauge('checkin_sheets_ready', '1 once the Google Sheets connection is up.')
+writer_pending = Gauge('checkin_sheets_writer_pending', 'Check-ins queued for the background Sheets writer.')
+
+METRICS = [
+    http_requests, http_request_seconds, chatbot_answer_seconds,
+    sheets_calls, sheets_call_seconds, sheets_throttled, sheets_throttle_seconds,
+    sheets_coalesced, worksheet_cache,
+    fallback_writes, fallback_write_seconds, fallback_replayed, sessions_held, sheets_ready, writer_pending
+]
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def record_throttle(kind, waited):
+    sheets_throttled.inc(kind)
+    sheets_throttle_seconds.inc(kind, amount=waited)
+
+
+def observe_request(endpoint, method, status, seconds):
+    if not ENABLED:
+        return
+    http_requests.inc(endpoint, method, str(status))
+    http_request_seconds.observe(seconds, endpoint, method)
+
+
+def render():
+    """Every metric in the Prometheus text exposition format"""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
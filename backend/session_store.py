@@ -0,0 +1,205 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+class MemorySessionStore:
+    """In-process session store with sliding TTL and LRU eviction.
+
+    Entries are kept in an OrderedDict in least-recently-used order. Because
+    every entry shares the same TTL and access refreshes it, expired entries
+    always sit at the front, so pruning them is amortised O(1).
+    """
+
+    def __init__(self, ttl=3600, max_sessions=10000):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, session_id):
+        """Return the session or None if it is unknown or expired"""
+        now = time.time()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] < now:
+                del self._sessions[session_id]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._sessions[session_id] = (now + self.ttl, entry[1])
+            self._sessions.move_to_end(session_id)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, session_id, session):
+        now = time.time()
+        with self._lock:
+            self._sessions[session_id] = (now + self.ttl, session)
+            self._sessions.move_to_end(session_id)
+            self._prune(now)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'size': len(self._sessions),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _prune(self, now):
+        while self._sessions:
+            session_id, (expires_at, _) = next(iter(self._sessions.items()))
+            if expires_at >= now and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[session_id]
+            self.evictions += 1
+
+
+class SQLiteSessionStore:
+    """Session store in a local SQLite file shared by every worker process.
+
+    Sessions are looked up by primary key, stored as JSON, and pruned by TTL
+    and least-recent access every ``prune_every`` writes. As in the memory
+    store, every hit slides the TTL and counts as an access. Hit, miss and
+    eviction counters are per process.
+    """
+
+    def __init__(self, path='sessions.db', ttl=3600, max_sessions=10000, prune_every=100):
+        self.path = path
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "id TEXT PRIMARY KEY, data TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_access ON sessions (last_access)")
+
+    def get(self, session_id):
+        """Return the session or None if it is unknown or expired; a hit refreshes its TTL"""
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT data, expires_at FROM sessions WHERE id = ?", (session_id,)
+        ).fetchone()
+
+        if row is None:
+            self._count(misses=1)
+            return None
+        if row[1] < now:
+            self.delete(session_id)
+            self._count(misses=1, evictions=1)
+            return None
+
+        with conn:
+            conn.execute(
+                "UPDATE sessions SET expires_at = ?, last_access = ? WHERE id = ?",
+                (now + self.ttl, now, session_id)
+            )
+        self._count(hits=1)
+        return json.loads(row[0])
+
+    def set(self, session_id, session):
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (id, data, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (session_id, json.dumps(session, separators=(',', ':')), now + self.ttl, now)
+            )
+
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.prune_every == 0
+        if prune:
+            self._prune(now)
+
+    def delete(self, session_id):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def stats(self):
+        with self._lock:
+            stats = {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+        stats['backend'] = 'sqlite'
+        stats['size'] = len(self)
+        return stats
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def _prune(self, now):
+        conn = self._conn()
+        with conn:
+            evicted = conn.execute("DELETE FROM sessions WHERE expires_at < ?", (now,)).rowcount
+            overflow = len(self) - self.max_sessions
+            if overflow > 0:
+                evicted += conn.execute(
+                    "DELETE FROM sessions WHERE id IN "
+                    "(SELECT id FROM sessions ORDER BY last_access LIMIT ?)", (overflow,)
+                ).rowcount
+        self._count(evictions=evicted)
+
+    def _count(self, hits=0, misses=0, evictions=0):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            self.evictions += evictions
+
+    def _conn(self):
+        # sqlite3 connections can't be shared between threads, so keep one per thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+
+def create_session_store():
+    """Build the session store selected by the SESSION_STORE environment variable"""
+    backend = os.environ.get('SESSION_STORE', 'memory')
+    ttl = int(os.environ.get('SESSION_TTL', 3600))
+    max_sessions = int(os.environ.get('SESSION_MAX', 10000))
+
+    if backend == 'sqlite':
+        return SQLiteSessionStore(
+            path=os.environ.get('SESSION_DB_PATH', 'sessions.db'),
+            ttl=ttl,
+            max_sessions=max_sessions
+        )
+    if backend != 'memory':
+        raise ValueError(f"Unknown SESSION_STORE: {backend}")
+    return MemorySessionStore(ttl=ttl, max_sessions=max_sessions)
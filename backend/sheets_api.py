@@ -1,33 +1,204 @@
 import os
 import json
+import atexit
+import time
+import threading
 from datetime import datetime
 import gspread
 from google.oauth2.service_account import Credentials
+from google.auth.transport.requests import AuthorizedSession, Request
+from requests.adapters import HTTPAdapter
+from fallback_store import FallbackStore
+from sheets_writer import SheetsWriter
+from fallback_replayer import FallbackReplayer
+from tasktracker_shared.sheets_quota import SheetsQuota, Coalescer
+from checkin_store import CheckinStore
+from tasktracker_shared.sheet_layout import SheetLayout, column_letter, worksheet_rows
+import metrics
+
+# Refresh access tokens this many seconds before they expire
+TOKEN_REFRESH_MARGIN = 300
+
+
+_DEFAULT_LAYOUT = SheetLayout()
+
+
+class WorksheetCache:
+    """Worksheet handles and column layouts keyed by date, keeping only the newest dates"""
+    
+    def __init__(self, max_dates=3):
+        self.max_dates = max_dates
+        self._entries = {}
+        self._lock = threading.Lock()
+    
+    def get(self, sheet_name):
+        with self._lock:
+            return self._entries.get(sheet_name)
+    
+    def put(self, sheet_name, worksheet, layout):
+        with self._lock:
+            self._entries[sheet_name] = {'worksheet': worksheet, 'layout': layout}
+            # Dates sort lexically, so the oldest date is always the smallest key
+            while len(self._entries) > self.max_dates:
+                del self._entries[min(self._entries)]
+    
+    def set_layout(self, sheet_name, layout):
+        with self._lock:
+            if sheet_name in self._entries:
+                self._entries[sheet_name]['layout'] = layout
+    
+    def invalidate(self, sheet_name=None):
+        """Forget one date, or everything when no date is given"""
+        with self._lock:
+            if sheet_name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(sheet_name, None)
+
 
 class SheetsAPI:
     def __init__(self):
         self.client = None
         self.spreadsheet = None
         self.fallback_file = 'fallback_data.json'
+        self.fallback_store = FallbackStore(
+            directory=os.environ.get('FALLBACK_DIR', 'fallback_data'),
+            max_segment_bytes=int(os.environ.get('FALLBACK_SEGMENT_BYTES', 8 * 1024 * 1024)),
+            fsync_every=int(os.environ.get('FALLBACK_FSYNC_EVERY', 16)),
+            legacy_file=self.fallback_file
+        )
+        atexit.register(self.fallback_store.close)
+        self.writer = None
+        self.replayer = None
         
-        # Try to initialize Google Sheets connection
-        try:
-            self._initialize_sheets()
-        except Exception as e:
-            print(f"Warning: Could not initialize Google Sheets: {e}")
-            print("Will use local fallback storage")
+        # Local indexed copy of every check-in for history queries
+        checkin_db = os.environ.get('CHECKIN_DB', 'checkins.db')
+        self.checkin_store = CheckinStore(checkin_db) if checkin_db else None
+        self.worksheet_cache = WorksheetCache(int(os.environ.get('SHEETS_CACHE_DATES', 3)))
+        # New date worksheets are sized for a morning and evening row per member
+        self.team_size = int(os.environ.get('TEAM_SIZE', 20))
+        
+        # Stay inside the per-minute Sheets quotas instead of hitting 429s
+        self.quota = SheetsQuota(
+            reads_per_minute=int(os.environ.get('SHEETS_READS_PER_MINUTE', 60)),
+            writes_per_minute=int(os.environ.get('SHEETS_WRITES_PER_MINUTE', 60)),
+            burst=int(os.environ.get('SHEETS_QUOTA_BURST', 10)),
+            on_throttle=metrics.record_throttle
+        )
+        self.worksheet_lookups = Coalescer(on_coalesce=metrics.sheets_coalesced.inc)
+        
+        # Connect to Google Sheets in the background so the worker starts serving at once
+        self.credentials = None
+        self.token_cache = os.environ.get('SHEETS_TOKEN_CACHE', '')
+        self.state = 'connecting'
+        self.last_error = None
+        self.connected_at = None
+        self.init_wait = float(os.environ.get('SHEETS_INIT_WAIT', 5.0))
+        self._ready = threading.Event()
+        self._connector = threading.Thread(target=self._connect, name='sheets-connect', daemon=True)
+        self._connector.start()
+    
+    def _connect(self):
+        """Initialize Sheets with retries, start the writers, then keep the token fresh"""
+        delay = 5.0
+        while True:
+            try:
+                self._initialize_sheets()
+                break
+            except SheetsNotConfigured as e:
+                print(f"Warning: Could not initialize Google Sheets: {e}")
+                print("Will use local fallback storage")
+                self.state = 'unconfigured'
+                self.last_error = str(e)
+                self._ready.set()
+                return
+            except Exception as e:
+                if self.state == 'connecting':
+                    print(f"Warning: Could not initialize Google Sheets: {e}")
+                    print("Will use local fallback storage until it is reachable")
+                self.state = 'error'
+                self.last_error = str(e)
+                # Requests waiting on the first attempt go to fallback instead
+                self._ready.set()
+                time.sleep(delay)
+                delay = min(delay * 2, 300.0)
+        
+        self._start_background_writers()
+        self.state = 'ready'
+        self.last_error = None
+        self.connected_at = datetime.now().isoformat()
+        self._ready.set()
+        
+        if self.credentials is not None:
+            self._keep_token_fresh()
+    
+    def _start_background_writers(self):
+        # Queue check-ins and write them to Sheets in batches from a background thread
+        if os.environ.get('SHEETS_ASYNC_WRITES', '1') != '0':
+            self.writer = SheetsWriter(
+                self,
+                queue_dir=os.environ.get('SHEETS_QUEUE_DIR', 'sheets_queue'),
+                flush_interval=float(os.environ.get('SHEETS_FLUSH_INTERVAL', 2.0)),
+                batch_size=int(os.environ.get('SHEETS_BATCH_SIZE', 50)),
+                drain_timeout=float(os.environ.get('SHEETS_DRAIN_TIMEOUT', 10.0))
+            )
+            metrics.writer_pending.callback = self.writer.pending_count
+        
+        # Push check-ins that fell back to local storage once Sheets is reachable again
+        if os.environ.get('FALLBACK_REPLAY', '1') != '0':
+            self.replayer = FallbackReplayer(
+                self,
+                interval=float(os.environ.get('FALLBACK_REPLAY_INTERVAL', 60.0)),
+                max_delay=float(os.environ.get('FALLBACK_REPLAY_MAX_DELAY', 900.0))
+            )
+            self.replayer.start()
+            atexit.register(self.replayer.close)
+    
+    def wait_ready(self, timeout=None):
+        """Block until the first connection attempt has finished; True if Sheets is usable"""
+        self._ready.wait(timeout)
+        return self.state == 'ready'
+    
+    def status(self):
+        """Connection state for /api/health"""
+        expires_in = None
+        if self.credentials is not None and self.credentials.expiry:
+            expires_in = int((self.credentials.expiry - datetime.utcnow()).total_seconds())
+        return {
+            'state': self.state,
+            'ready': self.state == 'ready',
+            'connected_at': self.connected_at,
+            'token_expires_in': expires_in,
+            'error': self.last_error
+        }
     
     def _initialize_sheets(self):
         """Initialize connection to Google Sheets"""
+        pool_size = int(os.environ.get('SHEETS_POOL_SIZE', 32))
+        
+        # Local fake Sheets server (see fake_sheets.py), no credentials needed
+        api_url = os.environ.get('SHEETS_API_URL')
+        if api_url:
+            from fake_sheets import connect
+            client = connect(api_url)
+            _mount_pool(client.session, pool_size)
+            with self.quota.limit('read'), metrics.sheets_call('open_spreadsheet'):
+                self.spreadsheet = client.open_by_key(os.environ.get('SPREADSHEET_ID', 'local'))
+            self.client = client
+            return
+        
         # Check if credentials are available
         creds_json = os.environ.get('GOOGLE_SHEETS_CREDENTIALS')
         spreadsheet_id = os.environ.get('SPREADSHEET_ID')
         
         if not creds_json or not spreadsheet_id:
-            raise Exception("Google Sheets credentials not configured")
+            raise SheetsNotConfigured("Google Sheets credentials not configured")
         
         # Parse credentials
-        creds_dict = json.loads(creds_json)
+        try:
+            creds_dict = json.loads(creds_json)
+        except ValueError as e:
+            raise SheetsNotConfigured(f"GOOGLE_SHEETS_CREDENTIALS is not valid JSON: {e}")
         
         # Define the scope
         scope = [
@@ -35,14 +206,63 @@ class SheetsAPI:
             'https://www.googleapis.com/auth/drive'
         ]
         
-        # Create credentials
+        # Create credentials, reusing a token another worker already fetched
         credentials = Credentials.from_service_account_info(creds_dict, scopes=scope)
+        self._load_cached_token(credentials)
         
-        # Authorize the client
-        self.client = gspread.authorize(credentials)
+        # One pooled, authorized session shared by every thread in this worker
+        session = AuthorizedSession(credentials)
+        _mount_pool(session, pool_size)
+        client = gspread.Client(auth=credentials, session=session)
         
         # Open the spreadsheet
-        self.spreadsheet = self.client.open_by_key(spreadsheet_id)
+        with self.quota.limit('read'), metrics.sheets_call('open_spreadsheet'):
+            self.spreadsheet = client.open_by_key(spreadsheet_id)
+        self.client = client
+        self.credentials = credentials
+        self._store_cached_token(credentials)
+    
+    def _keep_token_fresh(self):
+        """Refresh the access token shortly before it expires, off the request path"""
+        while True:
+            expiry = self.credentials.expiry
+            wait = (expiry - datetime.utcnow()).total_seconds() - TOKEN_REFRESH_MARGIN if expiry else 0
+            time.sleep(max(wait, 30))
+            if self._load_cached_token(self.credentials):
+                continue
+            try:
+                self.credentials.refresh(Request())
+                self._store_cached_token(self.credentials)
+            except Exception as e:
+                # AuthorizedSession still refreshes on demand if this keeps failing
+                print(f"Warning: Could not refresh Google Sheets token: {e}")
+    
+    def _load_cached_token(self, credentials):
+        """Adopt a cached token that is valid for a while yet; returns True if one was used"""
+        if not self.token_cache or not os.path.exists(self.token_cache):
+            return False
+        try:
+            with open(self.token_cache, 'r') as f:
+                cached = json.load(f)
+            expiry = datetime.fromisoformat(cached['expiry'])
+        except (OSError, ValueError, KeyError):
+            return False
+        if (expiry - datetime.utcnow()).total_seconds() <= TOKEN_REFRESH_MARGIN:
+            return False
+        if credentials.expiry and credentials.expiry >= expiry:
+            return False
+        credentials.token = cached['token']
+        credentials.expiry = expiry
+        return True
+    
+    def _store_cached_token(self, credentials):
+        if not self.token_cache or not credentials.token or not credentials.expiry:
+            return
+        tmp_path = f"{self.token_cache}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'token': credentials.token, 'expiry': credentials.expiry.isoformat()}, f)
+        os.replace(tmp_path, self.token_cache)
     
     def save_checkin(self, user_name, check_type, responses):
         """Save check-in data to Google Sheets or fallback storage"""
@@ -53,6 +273,20 @@ class SheetsAPI:
             **responses
         }
         
+        if self.checkin_store:
+            try:
+                self.checkin_store.add(data)
+            except Exception as e:
+                print(f"Warning: Could not index check-in locally: {e}")
+        
+        # Right after start-up, give the background connection a moment to finish
+        if self.state == 'connecting':
+            self._ready.wait(self.init_wait)
+        
+        if self.writer:
+            self.writer.submit(data)
+            return True
+        
         if self.spreadsheet:
             try:
                 self._save_to_sheets(data)
@@ -67,49 +301,122 @@ class SheetsAPI:
     
     def _save_to_sheets(self, data):
         """Save data to Google Sheets"""
-        sheet_name = data['date']
+        self._save_batch_to_sheets(data['date'], [data])
+    
+    def _save_batch_to_sheets(self, sheet_name, records):
+        """Append several check-ins for one date with a single API call"""
+        cached = self.worksheet_cache.get(sheet_name) is not None
+        try:
+            self._append_records(sheet_name, records)
+        except gspread.exceptions.APIError as e:
+            if not cached or not _is_missing_worksheet(e):
+                raise
+            # Worksheet was deleted outside the app; drop the stale handle and retry once
+            self.worksheet_cache.invalidate(sheet_name)
+            self._append_records(sheet_name, records)
+    
+    def _append_records(self, sheet_name, records):
+        worksheet, layout = self._get_sheet(sheet_name)
+        missing = layout.missing_labels(records)
+        if missing:
+            layout = self._add_columns(sheet_name, worksheet, layout, missing)
+        rows = [layout.row(data) for data in records]
+        
+        # One contiguous block of rows under the table that starts at A1. An append
+        # rather than an update of computed rows, so concurrent workers never overwrite
+        # each other's rows
+        with self.quota.limit('write'), metrics.sheets_call('append_rows'):
+            worksheet.append_rows(rows, table_range='A1')
+    
+    def _get_worksheet(self, sheet_name):
+        """Return the worksheet for a date, creating it with headers if needed"""
+        return self._get_sheet(sheet_name)[0]
+    
+    def _get_sheet(self, sheet_name):
+        """Return (worksheet, SheetLayout) for a date, reading the header at most once"""
+        cached = self.worksheet_cache.get(sheet_name)
+        if cached:
+            metrics.worksheet_cache.inc('hit')
+            return cached['worksheet'], cached['layout']
+        metrics.worksheet_cache.inc('miss')
         
+        # Threads missing the cache for the same date share one lookup
+        return self.worksheet_lookups.run(sheet_name, lambda: self._open_worksheet(sheet_name))
+    
+    def _open_worksheet(self, sheet_name):
+        """Look up or create a date's worksheet and cache its handle and layout"""
+        headers = None
         try:
             # Try to get existing worksheet
-            worksheet = self.spreadsheet.worksheet(sheet_name)
+            with self.quota.limit('read'), metrics.sheets_call('worksheet_lookup'):
+                worksheet = self.spreadsheet.worksheet(sheet_name)
         except gspread.exceptions.WorksheetNotFound:
-            # Create new worksheet for this date
-            worksheet = self.spreadsheet.add_worksheet(title=sheet_name, rows=100, cols=20)
-            
-            # Add headers
-            headers = ['Timestamp', 'Name', 'Type']
-            for response in data['responses'].values():
-                headers.append(response['label'])
-            worksheet.append_row(headers)
-        
-        # Prepare row data
-        row = [
-            data['time'],
-            data['user_name'],
-            '🌅 Morning Check-in' if data['check_type'] == 'start' else '🌇 Evening Check-out'
-        ]
+            try:
+                # Create new worksheet for this date, sized for the team
+                with self.quota.limit('write'), metrics.sheets_call('add_worksheet'):
+                    worksheet = self.spreadsheet.add_worksheet(
+                        title=sheet_name, rows=worksheet_rows(self.team_size), cols=len(_DEFAULT_LAYOUT.headers)
+                    )
+            except gspread.exceptions.APIError:
+                # Another worker created it first
+                with self.quota.limit('read'), metrics.sheets_call('worksheet_lookup'):
+                    worksheet = self.spreadsheet.worksheet(sheet_name)
+            else:
+                headers = []
         
-        for response in data['responses'].values():
-            row.append(response['answer'])
+        if headers is None:
+            with self.quota.limit('read'), metrics.sheets_call('row_values'):
+                headers = worksheet.row_values(1)
+        if headers:
+            layout = SheetLayout(headers)
+        else:
+            # New (or still empty) worksheet: a column for every question
+            layout = _DEFAULT_LAYOUT
+            with self.quota.limit('write'), metrics.sheets_call('update_header'):
+                worksheet.update(range_name='A1', values=[list(layout.headers)])
         
-        # Append the row
-        worksheet.append_row(row)
+        self.worksheet_cache.put(sheet_name, worksheet, layout)
+        return worksheet, layout
+    
+    def _add_columns(self, sheet_name, worksheet, layout, labels):
+        """Extend an older worksheet's header with columns for answer labels it lacks"""
+        extended = layout.extended(labels)
+        if len(extended.headers) > worksheet.col_count:
+            with self.quota.limit('write'), metrics.sheets_call('add_cols'):
+                worksheet.add_cols(len(extended.headers) - worksheet.col_count)
+        with self.quota.limit('write'), metrics.sheets_call('update_header'):
+            worksheet.update(range_name=f"{column_letter(len(layout.headers))}1", values=[list(labels)])
+        self.worksheet_cache.set_layout(sheet_name, extended)
+        return extended
+    
+    def get_headers(self, sheet_name):
+        """Return the header row for a date's worksheet, reading it at most once"""
+        return list(self._get_sheet(sheet_name)[1].headers)
     
     def _save_to_fallback(self, data):
-        """Save data to local JSON file as fallback"""
-        # Load existing data
-        if os.path.exists(self.fallback_file):
-            with open(self.fallback_file, 'r') as f:
-                all_data = json.load(f)
-        else:
-            all_data = []
-        
-        # Append new data
-        all_data.append(data)
-        
-        # Save back to file
-        with open(self.fallback_file, 'w') as f:
-            json.dump(all_data, f, indent=2)
-        
-        print(f"Data saved to fallback file: {self.fallback_file}")
+        """Append data to the local fallback log"""
+        with metrics.fallback_write_seconds.time():
+            self.fallback_store.append(data)
+        metrics.fallback_writes.inc()
+        print(f"Data saved to fallback log: {self.fallback_store.directory}")
+    
+    def iter_fallback(self):
+        """Iterate over every check-in saved to fallback storage"""
+        return self.fallback_store.iter_records()
+
+
+class SheetsNotConfigured(Exception):
+    """Credentials or spreadsheet id missing or invalid; retrying won't help"""
+
+
+def _mount_pool(session, pool_size):
+    """Keep enough pooled connections for every I/O thread to reuse one"""
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
 
+def _is_missing_worksheet(error):
+    """True if a Sheets API error means the target worksheet no longer exists"""
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status == 404 or (status == 400 and 'Unable to parse range' in str(error))
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Local mirror of every date worksheet
+
+Pulls the whole spreadsheet over the SheetsAPI connection with batched range
+reads instead of opening worksheets one by one. A sync makes one metadata call
+to list the worksheets with their grid sizes, then asks only for what may have
+changed, packing up to ``ranges_per_call`` ranges into each
+``values_batch_get`` and running those calls on a few threads within the read
+quota. Appends fill the rows a worksheet was created with before growing it,
+so a worksheet whose rows are all mirrored is skipped until its row count
+grows; others are read from their first unmirrored row. A header row is read
+when it isn't cached, when the column count changed, or when new rows are
+wider than it. A first sync downloads everything; re-running it with nothing
+new costs the metadata call plus one read for the worksheets that still have
+empty rows.
+
+Each worksheet is stored column by column in ``<date>.json`` (header plus one
+list per column) and ``manifest.json`` keeps the row count, header and grid
+column count of every mirrored worksheet. New rows are written at the
+manifest's row count, so a sync interrupted between the two files is repaired
+by the next one without duplicating rows. Edits to rows that were already
+mirrored are only picked up by ``--full``.
+
+Usage:
+    python sheets_mirror.py sync
+    python sheets_mirror.py sync --full
+    python sheets_mirror.py status
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+DATE_TITLE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+# Wide enough for every question column a worksheet can have
+LAST_COLUMN = 'ZZ'
+
+
+def _quote(title):
+    return "'" + title.replace("'", "''") + "'"
+
+
+class SheetsMirror:
+    """Column-oriented copy of the date worksheets in ``directory``"""
+
+    def __init__(self, directory='sheets_mirror', ranges_per_call=100, workers=4):
+        self.directory = directory
+        self.ranges_per_call = ranges_per_call
+        self.workers = workers
+        self.manifest_path = os.path.join(directory, 'manifest.json')
+        os.makedirs(directory, exist_ok=True)
+
+    def manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {'sheets': {}}
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def titles(self):
+        """Mirrored worksheet titles, oldest date first"""
+        return sorted(self.manifest()['sheets'])
+
+    def sync(self, spreadsheet, quota, full=False):
+        """Bring the mirror up to date; returns counts of calls, sheets and new rows"""
+        manifest = {'sheets': {}} if full else self.manifest()
+        known = manifest['sheets']
+
+        with quota.limit('read'), metrics.sheets_call('fetch_metadata'):
+            metadata = spreadsheet.fetch_sheet_metadata(params={
+                'fields': 'sheets.properties(sheetId,title,gridProperties(rowCount,columnCount))'
+            })
+        current = {}
+        for sheet in metadata.get('sheets', ()):
+            properties = sheet['properties']
+            if DATE_TITLE.match(properties['title']):
+                grid = properties.get('gridProperties', {})
+                current[properties['title']] = (properties['sheetId'], grid.get('rowCount', 0),
+                                                grid.get('columnCount', 0))
+
+        removed = [title for title in known if title not in current
+                   or known[title].get('sheet_id') != current[title][0]
+                   or not os.path.exists(self._sheet_path(title))]
+        for title in removed:
+            # Deleted, created again under the same date, or lost locally
+            del known[title]
+            path = self._sheet_path(title)
+            if os.path.exists(path):
+                os.remove(path)
+
+        # Index into the fetched ranges of each worksheet's header and new rows, if requested
+        wanted = {}
+        ranges = []
+        for title in sorted(current):
+            _, grid_rows, grid_columns = current[title]
+            entry = known.get(title)
+            header_at = rows_at = None
+            if entry is None or entry.get('columns') != grid_columns:
+                header_at = len(ranges)
+                ranges.append(f"{_quote(title)}!1:1")
+            if entry is None or entry['rows'] + 1 < grid_rows:
+                rows_at = len(ranges)
+                ranges.append(f"{_quote(title)}!A{(entry['rows'] if entry else 0) + 2}:{LAST_COLUMN}")
+            wanted[title] = [header_at, rows_at]
+        value_ranges, calls = self._batch_get_all(spreadsheet, quota, ranges)
+
+        # Labels added in spare columns don't change the column count; rows wider
+        # than the cached header give them away
+        stale = [title for title, (header_at, rows_at) in wanted.items()
+                 if header_at is None and rows_at is not None
+                 and any(len(row) > len(known[title]['header']) for row in value_ranges[rows_at].get('values', ()))]
+        headers, header_calls = self._batch_get_all(spreadsheet, quota, [f"{_quote(title)}!1:1" for title in stale])
+        for title, value_range in zip(stale, headers):
+            wanted[title][0] = len(value_ranges)
+            value_ranges.append(value_range)
+
+        new_rows = 0
+        for title, (header_at, rows_at) in wanted.items():
+            sheet_id, _, grid_columns = current[title]
+            entry = known.get(title) or {'sheet_id': sheet_id, 'rows': 0, 'header': []}
+            header = entry['header'] if header_at is None else (value_ranges[header_at].get('values') or [[]])[0]
+            rows = [] if rows_at is None else value_ranges[rows_at].get('values') or []
+            if rows or header != entry['header'] or title not in known:
+                self._write_sheet(title, header, entry['rows'], rows)
+                new_rows += len(rows)
+            known[title] = {'sheet_id': sheet_id, 'rows': entry['rows'] + len(rows),
+                            'header': header, 'columns': grid_columns}
+
+        self._write_json(self.manifest_path, manifest)
+        return {
+            'calls': 1 + calls + header_calls,
+            'sheets': len(current),
+            'new_rows': new_rows,
+            'removed': len(removed)
+        }
+
+    def _batch_get_all(self, spreadsheet, quota, ranges):
+        """Value ranges for ``ranges`` in order, and the number of calls it took"""
+        chunks = [ranges[i:i + self.ranges_per_call] for i in range(0, len(ranges), self.ranges_per_call)]
+        if not chunks:
+            return [], 0
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='sheets-mirror') as pool:
+            results = list(pool.map(lambda chunk: self._batch_get(spreadsheet, quota, chunk), chunks))
+        return [value_range for result in results for value_range in result], len(chunks)
+
+    def _batch_get(self, spreadsheet, quota, ranges):
+        with quota.limit('read'), metrics.sheets_call('values_batch_get'):
+            response = spreadsheet.values_batch_get(ranges)
+        return response.get('valueRanges', [])
+
+    def columns(self, title):
+        """(header, columns) of a mirrored worksheet; each column lists one cell per row"""
+        path = self._sheet_path(title)
+        if not os.path.exists(path):
+            return [], []
+        with open(path, 'r', encoding='utf-8') as f:
+            sheet = json.load(f)
+        return sheet['header'], sheet['columns']
+
+    def rows(self, title):
+        """Data rows of a mirrored worksheet, rebuilt from its columns"""
+        _, columns = self.columns(title)
+        return [list(row) for row in zip(*columns)]
+
+    def iter_rows(self):
+        """Every worksheet as date-prefixed rows under its header, as in a 'sheets' export"""
+        for title in self.titles():
+            header, columns = self.columns(title)
+            if header:
+                yield ['Date'] + header
+            for row in zip(*columns):
+                yield [title, *row]
+
+    def iter_records(self):
+        """Check-in records rebuilt from every mirrored row"""
+        from checkin_io import iter_sheet_rows
+        return iter_sheet_rows(self.iter_rows())
+
+    def _write_sheet(self, title, header, start, rows):
+        _, columns = self.columns(title)
+        width = max([len(header), len(columns)] + [len(row) for row in rows])
+        # Rows past ``start`` are from an interrupted sync and get written again
+        columns = [column[:start] for column in columns]
+        columns.extend([''] * start for _ in range(width - len(columns)))
+        for row in rows:
+            for index, column in enumerate(columns):
+                column.append(row[index] if index < len(row) else '')
+        self._write_json(self._sheet_path(title), {'header': header, 'columns': columns})
+
+    def _sheet_path(self, title):
+        return os.path.join(self.directory, f"{title}.json")
+
+    @staticmethod
+    def _write_json(path, data):
+        tmp_file = path + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_file, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mirror every date worksheet locally')
+    parser.add_argument('command', choices=['sync', 'status'])
+    parser.add_argument('--dir', default=os.environ.get('SHEETS_MIRROR_DIR', 'sheets_mirror'))
+    parser.add_argument('--full', action='store_true', help='download every row again')
+    parser.add_argument('--workers', type=int, default=4, help='parallel batch reads')
+    args = parser.parse_args()
+
+    mirror = SheetsMirror(args.dir, workers=args.workers)
+    if args.command == 'status':
+        sheets = mirror.manifest()['sheets']
+        print(f"{len(sheets)} worksheets, {sum(entry['rows'] for entry in sheets.values())} rows in {args.dir}")
+        return
+
+    # Sync in the foreground only; don't start the app's background threads
+    os.environ['SHEETS_ASYNC_WRITES'] = '0'
+    os.environ['FALLBACK_REPLAY'] = '0'
+    from sheets_api import SheetsAPI
+    sheets_api = SheetsAPI()
+    if not sheets_api.wait_ready(60):
+        sys.exit(f"Google Sheets is not available ({sheets_api.last_error}); nothing synced")
+
+    result = mirror.sync(sheets_api.spreadsheet, sheets_api.quota, full=args.full)
+    print(f"{result['new_rows']} new rows from {result['sheets']} worksheets in {result['calls']} API calls"
+          + (f", {result['removed']} removed" if result['removed'] else ""))
+
+
+if __name__ == '__main__':
+    main()
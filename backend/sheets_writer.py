@@ -0,0 +1,227 @@
+import os
+import uuid
+import atexit
+import shutil
+import threading
+from fallback_store import FallbackStore
+
+
+class SheetsWriter:
+    """Background writer that coalesces queued check-ins into batched Sheets appends.
+
+    ``submit`` journals the record to a local, fsynced log and returns; a
+    daemon thread wakes every ``flush_interval`` seconds (or as soon as
+    ``batch_size`` rows are waiting), groups pending rows by date and writes
+    each group with a single ``append_rows`` call. Each process journals into
+    its own ``worker-<pid>`` directory so rows left behind by a worker that
+    died before flushing are picked up by the next one to start.
+
+    Written rows are listed in an ack log. The journal is emptied whenever
+    the queue drains; under steady traffic it is rotated once it passes
+    ``compact_bytes`` instead: rows still waiting are journaled again in a new
+    segment with one write and one fsync, and the older segments and the ack
+    log are dropped.
+    """
+
+    ACK_FILE = 'acked.log'
+
+    def __init__(self, sheets_api, queue_dir='sheets_queue', flush_interval=2.0,
+                 batch_size=50, drain_timeout=10.0, compact_bytes=1024 * 1024):
+        self.sheets_api = sheets_api
+        self.queue_dir = queue_dir
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.drain_timeout = drain_timeout
+        self.compact_bytes = compact_bytes
+
+        self.worker_dir = os.path.join(queue_dir, f"worker-{os.getpid()}")
+        self.ack_path = os.path.join(self.worker_dir, self.ACK_FILE)
+
+        self._pending = []
+        self._inflight = 0
+        self._stopping = False
+        self._cond = threading.Condition()
+
+        recovered, claimed = self._recover_orphans()
+        self.journal = FallbackStore(self.worker_dir, fsync_every=1, prefix='queue-')
+        # Journal the recovered rows before deleting the directories they came from
+        self.journal.append_many(recovered)
+        self._pending.extend(recovered)
+        for path in claimed:
+            shutil.rmtree(path, ignore_errors=True)
+        if recovered:
+            print(f"Recovered {len(recovered)} queued check-ins for Google Sheets")
+
+        self._thread = threading.Thread(target=self._run, name='sheets-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, data):
+        """Durably queue a check-in for the next batch"""
+        entry = {'id': uuid.uuid4().hex, 'data': data}
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("Sheets writer is shut down")
+            self.journal.append(entry)
+            self._pending.append(entry)
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+        return entry['id']
+
+    def pending_count(self):
+        """Number of queued rows not yet written"""
+        with self._cond:
+            return len(self._pending) + self._inflight
+
+    def close(self):
+        """Stop accepting rows and drain the queue before returning"""
+        with self._cond:
+            if self._stopping:
+                return
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join(self.drain_timeout)
+        if self._thread.is_alive() or self._pending:
+            print(f"Warning: Sheets writer did not drain in {self.drain_timeout}s; "
+                  f"remaining rows stay queued in {self.worker_dir}")
+        else:
+            self.journal.close()
+            try:
+                os.rmdir(self.worker_dir)
+            except OSError:
+                pass
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._stopping and len(self._pending) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                batch, self._pending = self._pending, []
+                self._inflight = len(batch)
+                stopping = self._stopping
+
+            retry = self._flush(batch) if batch else []
+
+            with self._cond:
+                self._inflight = 0
+                # Rows that reached neither Sheets nor the fallback go first in the next batch
+                self._pending[:0] = retry
+                if batch:
+                    self._compact_journal()
+                if stopping and (retry or not self._pending):
+                    return
+
+    def _flush(self, batch):
+        """Write one batch, one append_rows call per date worksheet; returns the rows to try again"""
+        by_date = {}
+        for entry in batch:
+            by_date.setdefault(entry['data']['date'], []).append(entry)
+
+        retry = []
+        for sheet_name, entries in by_date.items():
+            records = [entry['data'] for entry in entries]
+            try:
+                self.sheets_api._save_batch_to_sheets(sheet_name, records)
+            except Exception as e:
+                print(f"Error saving batch to Google Sheets: {e}")
+                saved = []
+                for entry in entries:
+                    try:
+                        self.sheets_api._save_to_fallback(entry['data'])
+                    except Exception as fallback_error:
+                        print(f"Error saving check-in to fallback storage, keeping it queued: {fallback_error}")
+                        retry.append(entry)
+                    else:
+                        saved.append(entry)
+                entries = saved
+            try:
+                self._ack(entry['id'] for entry in entries)
+            except OSError as e:
+                # Only matters if this process dies before the journal is compacted
+                print(f"Warning: Could not record written check-ins in {self.ack_path}: {e}")
+        return retry
+
+    def _ack(self, ids):
+        with open(self.ack_path, 'a') as f:
+            f.write(''.join(f"{record_id}\n" for record_id in ids))
+
+    def _compact_journal(self):
+        """Drop written rows from the journal; called under the lock with nothing in flight"""
+        try:
+            if not self._pending:
+                self._reset_journal()
+            elif sum(os.path.getsize(path) for path in self.journal.segments()) >= self.compact_bytes:
+                self._rotate_journal()
+        except OSError as e:
+            print(f"Warning: Could not compact the Sheets queue journal: {e}")
+
+    def _reset_journal(self):
+        """Drop the journal once everything in it has been written"""
+        self.journal.clear()
+        if os.path.exists(self.ack_path):
+            os.remove(self.ack_path)
+
+    def _rotate_journal(self):
+        """Start a new journal holding only the rows still waiting"""
+        written = self.journal.segments()
+        self.journal.rotate()
+        self.journal.append_many(self._pending)
+        # Segments before the acks: a crash in between must not replay written rows
+        self.journal.drop_segments(written)
+        if os.path.exists(self.ack_path):
+            os.remove(self.ack_path)
+
+    def _recover_orphans(self):
+        """Claim the journals of workers that exited before flushing; returns (rows, claimed dirs)
+
+        A crash after the rows were journaled again but before the claimed
+        directories were deleted leaves the same rows in both, so acks are
+        gathered from every claimed directory first and each id is kept once.
+        """
+        claimed = []
+        if not os.path.isdir(self.queue_dir):
+            return [], claimed
+
+        for name in sorted(os.listdir(self.queue_dir)):
+            path = os.path.join(self.queue_dir, name)
+            owner = name.split('-')[1] if name.count('-') >= 1 else ''
+            if not owner.isdigit():
+                continue
+            # A directory carrying our own pid was left by an earlier process
+            if int(owner) != os.getpid() and _pid_alive(int(owner)):
+                continue
+
+            # Claim the directory so two new workers don't replay it twice
+            target = os.path.join(self.queue_dir, f"claimed-{os.getpid()}-{uuid.uuid4().hex[:8]}")
+            try:
+                os.rename(path, target)
+            except OSError:
+                continue
+            claimed.append(target)
+
+        seen = set()
+        for path in claimed:
+            ack_path = os.path.join(path, self.ACK_FILE)
+            if os.path.exists(ack_path):
+                with open(ack_path) as f:
+                    seen.update(line.strip() for line in f)
+
+        recovered = []
+        for path in claimed:
+            for entry in FallbackStore(path, prefix='queue-'):
+                # A crash mid-rotation leaves waiting rows in two segments
+                if entry['id'] not in seen:
+                    seen.add(entry['id'])
+                    recovered.append(entry)
+
+        return recovered, claimed
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
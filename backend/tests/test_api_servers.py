@@ -0,0 +1,96 @@
+import json
+import importlib
+
+import pytest
+from starlette.testclient import TestClient
+
+from api_handlers import CheckinAPI
+from checkin_store import CheckinStore
+from session_store import MemorySessionStore
+
+
+class FakeSheets:
+    state = 'unconfigured'
+    replayer = None
+
+    def __init__(self, checkin_store):
+        self.checkin_store = checkin_store
+
+    def status(self):
+        return {'state': self.state}
+
+    def save_checkin(self, user_name, check_type, responses):
+        self.checkin_store.add({'user_name': user_name, 'check_type': check_type,
+                                'date': '2025-01-06', 'time': '09:00:00',
+                                'timestamp': '2025-01-06T09:00:00', 'responses': responses})
+
+
+def flask_client(module):
+    client = module.app.test_client()
+
+    def request(method, path, body=None, headers=None):
+        response = client.open(path, method=method, data=body, headers=headers,
+                               content_type='application/json' if body is not None else None)
+        return response.status_code, response.get_data(), response.headers
+    return request
+
+
+def asgi_client(module):
+    client = TestClient(module.app)
+
+    def request(method, path, body=None, headers=None):
+        if body is not None:
+            headers = dict(headers or {}, **{'Content-Type': 'application/json'})
+        response = client.request(method, path, content=body, headers=headers)
+        return response.status_code, response.content, response.headers
+    return request
+
+
+@pytest.fixture(params=[('app', flask_client), ('asgi', asgi_client)], ids=['flask', 'asgi'])
+def request_api(request, tmp_path, monkeypatch):
+    # Importing a server builds its default SheetsAPI, which writes to the working directory
+    monkeypatch.chdir(tmp_path)
+    name, make_client = request.param
+    module = importlib.import_module(name)
+    store = CheckinStore(str(tmp_path / 'checkins.db'))
+    monkeypatch.setattr(module, 'api', CheckinAPI(FakeSheets(store), MemorySessionStore()))
+    send = make_client(module)
+
+    def call(method, path, data=None, raw=None, headers=None):
+        body = json.dumps(data).encode() if data is not None else raw
+        status, content, response_headers = send(method, path, body, headers)
+        is_json = response_headers.get('Content-Type', '').startswith('application/json')
+        return status, json.loads(content) if is_json and content else content, response_headers
+    return call
+
+
+def test_check_in_conversation(request_api):
+    assert request_api('POST', '/api/start-session', {'name': ''})[:2] == (400, {'error': 'Name is required'})
+    assert request_api('POST', '/api/start-session', raw=b'{not json')[:2] == (400, {'error': 'Invalid JSON body'})
+
+    status, body, _ = request_api('POST', '/api/start-session', {'name': 'Ann'})
+    assert status == 200
+    session_id = body['session_id']
+
+    for _ in range(20):
+        status, body, _ = request_api('POST', '/api/send-message',
+                                      {'session_id': session_id, 'message': 'Shipping the API'})
+        assert status == 200
+        if body['completed']:
+            break
+    assert body['completed'] and body['message'].startswith('✅')
+
+    status, body, _ = request_api('POST', '/api/send-message', {'session_id': session_id, 'message': 'x'})
+    assert (status, body) == (400, {'error': 'Invalid session'})
+    assert request_api('POST', '/api/cancel-session', raw=b'')[:2] == (200, {'message': 'Session cancelled'})
+
+
+def test_history_routes(request_api):
+    status, body, headers = request_api('GET', '/api/checkins')
+    assert status == 200
+    assert request_api('GET', '/api/checkins', headers={'If-None-Match': headers['ETag']})[0] == 304
+    assert request_api('GET', '/api/checkins?cursor=%25')[:2] == (400, {'error': 'Invalid cursor'})
+    assert request_api('GET', '/api/digest?date=tomorrow')[0] == 400
+    assert request_api('GET', '/api/stats?user=Nobody')[:2] == (404, {'error': 'No check-ins for this user'})
+    assert request_api('GET', '/api/search?q=deploy')[:2] == (200, {'results': []})
+    assert request_api('GET', '/api/health')[1]['sheets'] == {'state': 'unconfigured'}
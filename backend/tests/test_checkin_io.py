@@ -0,0 +1,33 @@
+import os
+import sys
+import json
+import subprocess
+
+from checkin_io import read_records, write_records
+
+
+RECORDS = [
+    {'user_name': 'Zoë', 'check_type': 'morning', 'date': '2025-01-06', 'time': '09:00:00',
+     'timestamp': '2025-01-06T09:00:00', 'score': -12.5e3, 'late': False, 'note': None,
+     'responses': {'q1': {'label': 'Plan "A" \\ 😀', 'answer': 'ship it'}}},
+    12345,
+    'text',
+    [],
+]
+
+
+def test_sheets_export_without_sheets_client(tmp_path):
+    src = tmp_path / 'backup.json'
+    src.write_text(json.dumps(RECORDS[:1]))
+    dst = tmp_path / 'export.csv'
+
+    assert write_records(read_records(str(src)), str(dst), 'sheets') == 1
+    header, row = dst.read_text(encoding='utf-8').splitlines()
+    assert row.startswith('2025-01-06,09:00:00,Zoë,')
+
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    loaded = subprocess.run(
+        [sys.executable, '-c', "import sys, checkin_io; print(sorted({'gspread', 'sheets_api', 'checkin_store'} & set(sys.modules)))"],
+        cwd=backend, capture_output=True, text=True, check=True
+    ).stdout.strip()
+    assert loaded == '[]'
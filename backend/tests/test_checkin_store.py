@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from checkin_store import CheckinStore
+from fallback_store import FallbackStore
+
+
+def checkin(n):
+    return {'user_name': f'User {n}', 'check_type': 'start', 'date': '2025-01-06',
+            'time': f'09:00:{n:02d}', 'timestamp': f'2025-01-06T09:00:{n:02d}', 'responses': {}}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CheckinStore(str(tmp_path / 'checkins.db'))
+
+
+def test_import_file_streams_in_batches(store, tmp_path, monkeypatch):
+    path = tmp_path / 'checkins_backup.json'
+    path.write_text(json.dumps([checkin(n) for n in range(5)], indent=2))
+    batches = []
+    insert_many = store._insert_many
+    monkeypatch.setattr(store, '_insert_many',
+                        lambda conn, records, source: batches.append(len(records)) or insert_many(conn, records, source))
+    monkeypatch.setattr(json, 'load', None)  # the backup is never read whole
+
+    assert store.import_file(str(path), batch_size=2) == 5
+    assert batches == [2, 2, 1]
+    assert store.import_file(str(path), batch_size=2) == 0
+    assert len(store.query()) == 5
+
+
+def test_import_file_reads_json_lines_and_fallback_logs(store, tmp_path):
+    path = tmp_path / 'history.jsonl'
+    path.write_text(''.join(json.dumps(checkin(n)) + '\n' for n in range(3)))
+    fallback = FallbackStore(str(tmp_path / 'fallback_data'))
+    for n in range(2, 5):
+        fallback.append(checkin(n))
+    fallback.close()
+
+    assert store.import_file(str(path)) == 3
+    assert store.import_file(fallback.directory) == 2
+    assert [record['user_name'] for record in store.query(user='User 4')] == ['User 4']
@@ -0,0 +1,106 @@
+import json
+import contextlib
+
+import pytest
+
+from fallback_store import FallbackStore
+from fallback_replayer import FallbackReplayer
+from tasktracker_shared.sheet_layout import build_sheet_row
+
+
+class FakeQuota:
+    def limit(self, kind):
+        return contextlib.nullcontext()
+
+
+class FakeWorksheet:
+    def __init__(self):
+        self.rows = [['Timestamp', 'Name', 'Type']]
+
+    def get_values(self, range_name):
+        return [row[:3] for row in self.rows]
+
+
+class FakeSheetsAPI:
+    def __init__(self, directory):
+        self.fallback_store = FallbackStore(directory)
+        self.quota = FakeQuota()
+        self.worksheets = {}
+        self.append_calls = 0
+
+    def _get_worksheet(self, sheet_name):
+        return self.worksheets.setdefault(sheet_name, FakeWorksheet())
+
+    def _save_batch_to_sheets(self, sheet_name, records):
+        self.append_calls += 1
+        self._get_worksheet(sheet_name).rows.extend(build_sheet_row(record) for record in records)
+
+
+def checkin(name, date='2025-01-06', time='09:00:00'):
+    return {'user_name': name, 'check_type': 'start', 'date': date, 'time': time,
+            'timestamp': f'{date}T{time}', 'responses': {}}
+
+
+@pytest.fixture
+def sheets_api(tmp_path):
+    return FakeSheetsAPI(str(tmp_path))
+
+
+def names(worksheet):
+    return [row[1] for row in worksheet.rows[1:]]
+
+
+def test_replay_once_per_record(sheets_api):
+    sheets_api.fallback_store.append(checkin('Ann'))
+    sheets_api.fallback_store.append(checkin('Bob'))
+    replayer = FallbackReplayer(sheets_api)
+
+    assert replayer.replay_once() == 2
+    assert replayer.pending() == []
+
+    sheets_api.fallback_store.append(checkin('Cy'))
+    assert replayer.replay_once() == 1
+    assert names(sheets_api.worksheets['2025-01-06']) == ['Ann', 'Bob', 'Cy']
+    assert sheets_api.append_calls == 2
+
+
+def test_crash_before_marking_synced_does_not_duplicate(sheets_api, monkeypatch):
+    sheets_api.fallback_store.append(checkin('Ann'))
+    sheets_api.fallback_store.append(checkin('Bob'))
+    replayer = FallbackReplayer(sheets_api)
+
+    def crash(records):
+        raise OSError("killed")
+    monkeypatch.setattr(replayer, '_mark_synced', crash)
+    with pytest.raises(OSError):
+        replayer.replay_once()
+    monkeypatch.undo()
+
+    # A fresh process replays the same records; the worksheet already has them
+    replayer = FallbackReplayer(sheets_api)
+    assert replayer.replay_once() == 0
+    assert replayer.pending() == []
+    assert names(sheets_api.worksheets['2025-01-06']) == ['Ann', 'Bob']
+
+
+def test_skips_rows_already_in_worksheet(sheets_api):
+    sheets_api._get_worksheet('2025-01-06').rows.append(build_sheet_row(checkin('Ann')))
+    sheets_api.fallback_store.append(checkin('Ann'))
+    sheets_api.fallback_store.append(checkin('Ann', time='17:00:00'))
+
+    assert FallbackReplayer(sheets_api).replay_once() == 1
+    assert names(sheets_api.worksheets['2025-01-06']) == ['Ann', 'Ann']
+
+
+def test_drops_synced_past_segments(sheets_api, tmp_path):
+    # A past day's segment with a torn final line, then today's segment
+    past = tmp_path / 'fallback-2025-01-06-0000.jsonl'
+    past.write_text(json.dumps(checkin('Ann')) + '\n{"user_name": "Bo')
+    sheets_api.fallback_store.append(checkin('Cy', date='2025-01-07'))
+    replayer = FallbackReplayer(sheets_api)
+
+    assert replayer.replay_once() == 2
+    assert not past.exists()
+    assert len(sheets_api.fallback_store.segments()) == 1
+    with open(replayer.synced_path, encoding='utf-8') as f:
+        assert f.read() == 'Cy|start|2025-01-07T09:00:00\n'
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from fallback_store import FallbackStore
+
+
+def checkin(n):
+    return {'user_name': f'User {n}', 'date': '2025-01-06', 'time': '09:00:00'}
+
+
+def test_append_after_torn_write(tmp_path):
+    store = FallbackStore(str(tmp_path))
+    store.append(checkin(1))
+    store.close()
+
+    # A crash mid-append leaves a final line without its newline
+    segment, = store.segments()
+    with open(segment, 'ab') as f:
+        f.write(b'{"user_name": "User 2", "da')
+
+    store = FallbackStore(str(tmp_path))
+    store.append(checkin(3))
+    store.append(checkin(4))
+    store.close()
+
+    assert [record['user_name'] for record in store] == ['User 1', 'User 3', 'User 4']
+
+
+def test_reopen_clean_segment_adds_no_blank_line(tmp_path):
+    store = FallbackStore(str(tmp_path))
+    store.append(checkin(1))
+    store.close()
+    store.append(checkin(2))
+    store.close()
+
+    segment, = store.segments()
+    with open(segment, 'rb') as f:
+        assert f.read().count(b'\n') == 2
+
+
+def test_legacy_file_read_before_segments(tmp_path):
+    legacy = tmp_path / 'fallback_data.json'
+    legacy.write_text(json.dumps([checkin(1), checkin(2)]))
+
+    store = FallbackStore(str(tmp_path / 'log'), legacy_file=str(legacy))
+    store.append(checkin(3))
+    store.close()
+
+    assert [record['user_name'] for record in store] == ['User 1', 'User 2', 'User 3']
+
+
+def test_malformed_legacy_file(tmp_path):
+    legacy = tmp_path / 'fallback_data.json'
+    legacy.write_text('[{"user_name": "User 1"}, {"user_name": User 2}]')
+
+    store = FallbackStore(str(tmp_path / 'log'), legacy_file=str(legacy))
+    with pytest.raises(ValueError):
+        list(store)
@@ -0,0 +1,55 @@
+import pytest
+
+import session_store
+from session_store import MemorySessionStore, SQLiteSessionStore
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(session_store.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def make_store(request, tmp_path):
+    def make(**kwargs):
+        if request.param == 'memory':
+            return MemorySessionStore(**kwargs)
+        return SQLiteSessionStore(path=str(tmp_path / 'sessions.db'), prune_every=1, **kwargs)
+    return make
+
+
+def test_get_slides_the_ttl(make_store, clock):
+    store = make_store(ttl=100)
+    store.set('a', {'n': 1})
+
+    clock.now += 80
+    assert store.get('a') == {'n': 1}
+    clock.now += 80
+    assert store.get('a') == {'n': 1}
+    clock.now += 101
+    assert store.get('a') is None
+
+
+def test_lru_eviction_ranks_by_last_access(make_store, clock):
+    store = make_store(ttl=1000, max_sessions=2)
+    store.set('a', {'n': 1})
+    clock.now += 1
+    store.set('b', {'n': 2})
+    clock.now += 1
+    assert store.get('a') == {'n': 1}
+    clock.now += 1
+    store.set('c', {'n': 3})
+
+    assert store.get('b') is None
+    assert store.get('a') == {'n': 1}
+    assert store.get('c') == {'n': 3}
@@ -0,0 +1,93 @@
+import re
+import contextlib
+
+from sheets_mirror import SheetsMirror
+
+RANGE = re.compile(r"^'(.+)'!(?:1:1|A(\d+):ZZ)$")
+
+
+class FakeQuota:
+    def limit(self, kind):
+        return contextlib.nullcontext()
+
+
+class FakeSpreadsheet:
+    """Worksheets as lists of rows (header first) in a grid of ``rows`` x ``columns``"""
+
+    def __init__(self):
+        self.sheets = {}
+        self.requested = []
+
+    def add_sheet(self, title, header, rows=5, columns=5):
+        self.sheets[title] = {'id': len(self.sheets), 'values': [header], 'rows': rows, 'columns': columns}
+
+    def append(self, title, *rows):
+        sheet = self.sheets[title]
+        sheet['values'].extend(rows)
+        sheet['rows'] = max(sheet['rows'], len(sheet['values']))
+
+    def fetch_sheet_metadata(self, params=None):
+        return {'sheets': [
+            {'properties': {'sheetId': sheet['id'], 'title': title,
+                            'gridProperties': {'rowCount': sheet['rows'], 'columnCount': sheet['columns']}}}
+            for title, sheet in self.sheets.items()
+        ]}
+
+    def values_batch_get(self, ranges):
+        self.requested.append(list(ranges))
+        value_ranges = []
+        for name in ranges:
+            title, start = RANGE.match(name).groups()
+            values = self.sheets[title]['values']
+            values = values[:1] if start is None else values[int(start) - 1:]
+            value_ranges.append({'values': values} if values else {})
+        return {'valueRanges': value_ranges}
+
+
+def test_sync_skips_mirrored_sheets_and_cached_headers(tmp_path):
+    spreadsheet = FakeSpreadsheet()
+    spreadsheet.add_sheet('2025-01-06', ['Timestamp', 'Name', 'Type'], rows=3)
+    spreadsheet.append('2025-01-06', ['09:00', 'Ann', 'Start'], ['17:00', 'Ann', 'End'])
+    spreadsheet.add_sheet('2025-01-07', ['Timestamp', 'Name', 'Type'], rows=5)
+    spreadsheet.append('2025-01-07', ['09:00', 'Ann', 'Start'])
+    mirror = SheetsMirror(str(tmp_path))
+
+    assert mirror.sync(spreadsheet, FakeQuota())['new_rows'] == 3
+
+    # The full worksheet is skipped; the other is read past its mirrored rows, without its header
+    spreadsheet.requested.clear()
+    spreadsheet.append('2025-01-07', ['09:05', 'Bob', 'Start'])
+    result = mirror.sync(spreadsheet, FakeQuota())
+    assert result == {'calls': 2, 'sheets': 2, 'new_rows': 1, 'removed': 0}
+    assert spreadsheet.requested == [["'2025-01-07'!A3:ZZ"]]
+    assert mirror.rows('2025-01-07') == [['09:00', 'Ann', 'Start'], ['09:05', 'Bob', 'Start']]
+
+    # Growing the full worksheet's grid brings it back
+    spreadsheet.requested.clear()
+    spreadsheet.append('2025-01-06', ['09:10', 'Cy', 'Start'])
+    assert mirror.sync(spreadsheet, FakeQuota())['new_rows'] == 1
+    assert spreadsheet.requested == [["'2025-01-06'!A4:ZZ", "'2025-01-07'!A4:ZZ"]]
+
+
+def test_sync_rereads_header_when_columns_change(tmp_path):
+    spreadsheet = FakeSpreadsheet()
+    spreadsheet.add_sheet('2025-01-06', ['Timestamp', 'Name', 'Type'], rows=10, columns=3)
+    mirror = SheetsMirror(str(tmp_path))
+    mirror.sync(spreadsheet, FakeQuota())
+
+    # A label added in a new column
+    sheet = spreadsheet.sheets['2025-01-06']
+    sheet['values'][0] = ['Timestamp', 'Name', 'Type', 'Plan']
+    sheet['columns'] = 4
+    spreadsheet.append('2025-01-06', ['09:00', 'Ann', 'Start', 'ship'])
+    mirror.sync(spreadsheet, FakeQuota())
+    assert mirror.columns('2025-01-06')[0] == ['Timestamp', 'Name', 'Type', 'Plan']
+
+    # A label added in a spare column, seen from a row wider than the cached header
+    sheet['values'][0] = ['Timestamp', 'Name', 'Type', 'Plan', 'Blockers']
+    spreadsheet.append('2025-01-06', ['09:05', 'Bob', 'Start', 'test', 'none'])
+    result = mirror.sync(spreadsheet, FakeQuota())
+    assert result['calls'] == 3
+    assert mirror.columns('2025-01-06')[0] == ['Timestamp', 'Name', 'Type', 'Plan', 'Blockers']
+    assert mirror.rows('2025-01-06') == [['09:00', 'Ann', 'Start', 'ship', ''],
+                                         ['09:05', 'Bob', 'Start', 'test', 'none']]
@@ -0,0 +1,179 @@
+import os
+import json
+import time
+import atexit
+import shutil
+import threading
+
+import pytest
+
+import fallback_store
+from fallback_store import FallbackStore
+from sheets_writer import SheetsWriter
+
+
+class FakeSheetsAPI:
+    def __init__(self):
+        self.rows = []
+        self.fallback = []
+        self.sheets_errors = 0
+        self.fallback_errors = 0
+        self.on_save = None
+        self.lock = threading.Lock()
+
+    def _save_batch_to_sheets(self, sheet_name, records):
+        if self.on_save:
+            self.on_save()
+        with self.lock:
+            if self.sheets_errors:
+                self.sheets_errors -= 1
+                raise RuntimeError("Sheets is down")
+            self.rows.extend(record['user_name'] for record in records)
+
+    def _save_to_fallback(self, record):
+        with self.lock:
+            if self.fallback_errors:
+                self.fallback_errors -= 1
+                raise OSError("disk full")
+            self.fallback.append(record['user_name'])
+
+
+def checkin(n):
+    return {'user_name': f'User {n}', 'date': '2025-01-06', 'time': '09:00:00'}
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def journal_bytes(writer):
+    return sum(os.path.getsize(path) for path in writer.journal.segments())
+
+
+@pytest.fixture
+def make_writer(tmp_path):
+    writers = []
+
+    def make(sheets_api, **kwargs):
+        kwargs.setdefault('flush_interval', 0.01)
+        writer = SheetsWriter(sheets_api, queue_dir=str(tmp_path / 'queue'), **kwargs)
+        writers.append(writer)
+        return writer
+
+    yield make
+    for writer in writers:
+        writer.close()
+
+
+def test_journal_stays_bounded_under_steady_traffic(make_writer):
+    sheets_api = FakeSheetsAPI()
+    writer = make_writer(sheets_api, batch_size=1, compact_bytes=2048)
+    submitted = iter(range(10**6))
+
+    # A new check-in arrives during every flush, so the queue never drains
+    sheets_api.on_save = lambda: writer.submit(checkin(next(submitted)))
+    writer.submit(checkin(next(submitted)))
+    wait_for(lambda: len(sheets_api.rows) >= 400)
+
+    with writer._cond:
+        assert writer._pending or writer._inflight
+        assert journal_bytes(writer) < 4096
+        acked = os.path.getsize(writer.ack_path) if os.path.exists(writer.ack_path) else 0
+        assert acked < 4096
+
+
+def test_fallback_error_keeps_the_writer_running(make_writer):
+    sheets_api = FakeSheetsAPI()
+    sheets_api.sheets_errors = 1
+    sheets_api.fallback_errors = 1
+    writer = make_writer(sheets_api)
+
+    writer.submit(checkin(1))
+    wait_for(lambda: sheets_api.rows or sheets_api.fallback)
+    assert writer._thread.is_alive()
+
+    writer.submit(checkin(2))
+    wait_for(lambda: writer.pending_count() == 0)
+    assert sorted(sheets_api.rows + sheets_api.fallback) == ['User 1', 'User 2']
+
+
+def test_orphaned_rows_are_recovered_once(tmp_path, make_writer):
+    orphan = tmp_path / 'queue' / 'worker-999999999'
+    journal = FallbackStore(str(orphan), fsync_every=1, prefix='queue-')
+    entries = [{'id': f'id{n}', 'data': checkin(n)} for n in range(3)]
+    for entry in entries:
+        journal.append(entry)
+    # Crashed mid-rotation: the waiting row was journaled again in a new segment
+    journal.rotate()
+    journal.append(entries[2])
+    journal.close()
+    (orphan / SheetsWriter.ACK_FILE).write_text('id0\n')
+
+    sheets_api = FakeSheetsAPI()
+    make_writer(sheets_api)
+    wait_for(lambda: len(sheets_api.rows) >= 2)
+    time.sleep(0.05)
+
+    assert sorted(sheets_api.rows) == ['User 1', 'User 2']
+    assert not orphan.exists()
+
+
+def test_recovered_rows_survive_a_crash_before_cleanup(tmp_path, make_writer, monkeypatch):
+    queue_dir = tmp_path / 'queue'
+    orphan = FallbackStore(str(queue_dir / 'worker-999999999'), fsync_every=1, prefix='queue-')
+    for n in range(3):
+        orphan.append({'id': f'id{n}', 'data': checkin(n)})
+    orphan.close()
+    (queue_dir / 'worker-999999999' / SheetsWriter.ACK_FILE).write_text('id0\n')
+
+    # The recovering worker journals the rows, then dies before deleting the claimed directory
+    monkeypatch.setattr(shutil, 'rmtree', lambda *args, **kwargs: None)
+    crashed = SheetsWriter(FakeSheetsAPI(), queue_dir=str(queue_dir), flush_interval=60)
+    atexit.unregister(crashed.close)
+    with crashed._cond:
+        crashed._pending = []
+        crashed._stopping = True
+        crashed._cond.notify()
+    crashed._thread.join(5)
+    crashed.journal.close()
+    monkeypatch.undo()
+    assert len(os.listdir(queue_dir)) == 2
+
+    sheets_api = FakeSheetsAPI()
+    make_writer(sheets_api)
+    wait_for(lambda: len(sheets_api.rows) >= 2)
+    time.sleep(0.05)
+
+    assert sorted(sheets_api.rows) == ['User 1', 'User 2']
+    assert not [name for name in os.listdir(queue_dir) if name.startswith('claimed-')]
+
+
+def test_rotation_fsyncs_once(make_writer, monkeypatch):
+    writer = make_writer(FakeSheetsAPI(), flush_interval=60, batch_size=1000)
+    for n in range(50):
+        writer.submit(checkin(n))
+
+    fsyncs = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(fallback_store.os, 'fsync', lambda fd: fsyncs.append(fd) or real_fsync(fd))
+    with writer._cond:
+        writer._rotate_journal()
+
+    assert len(fsyncs) == 1
+    assert [json.loads(line)['id'] for path in writer.journal.segments() for line in open(path)] == \
+        [entry['id'] for entry in writer._pending]
+
+
+def test_rotated_journal_replays_only_unwritten_rows(tmp_path):
+    queue_dir = tmp_path / 'queue'
+    store = FallbackStore(str(queue_dir), fsync_every=1, prefix='queue-')
+    store.append({'id': 'a'})
+    old = store.segments()
+    store.rotate()
+    store.append({'id': 'b'})
+    store.drop_segments(old)
+
+    assert [json.loads(line)['id'] for path in store.segments() for line in open(path)] == ['b']
@@ -1,11 +1,12 @@
 # -*- mode: python ; coding: utf-8 -*-
+from PyInstaller.utils.hooks import collect_data_files
 
 
 a = Analysis(
     ['tasktracker_modern.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    datas=collect_data_files('tasktracker_shared'),
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,42 @@
+"""
+Run blocking work off the Tk main thread
+
+Tkinter widgets may only be touched from the main thread, so jobs run in a
+small thread pool and their results are queued; the main loop drains the
+queue every ``poll_ms`` through ``root.after`` and calls each job's
+callback there.
+"""
+
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BackgroundRunner:
+    def __init__(self, root, max_workers=2, poll_ms=50):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tk-io')
+        self._results = queue.Queue()
+        self.root.after(self.poll_ms, self._poll)
+
+    def submit(self, func, *args, on_done=None):
+        """Run ``func(*args)`` in the pool; ``on_done(result, error)`` runs on the Tk thread"""
+        future = self._pool.submit(func, *args)
+        if on_done is not None:
+            future.add_done_callback(lambda f: self._results.put((on_done, f)))
+        return future
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+
+    def _poll(self):
+        try:
+            while True:
+                try:
+                    on_done, future = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                error = future.exception()
+                on_done(None if error else future.result(), error)
+        finally:
+            self.root.after(self.poll_ms, self._poll)
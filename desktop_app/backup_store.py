@@ -0,0 +1,143 @@
+"""
+Crash-safe local backup of check-ins
+
+checkins_backup.json is a snapshot; changes since the last snapshot go to an
+append-only journal next to it (checkins_backup.journal), one JSON line per
+change written and fsynced in a single call, so a save costs the same however
+long the history is. Once the journal passes ``compact_bytes``, ``append``
+says so and the caller runs ``compact`` off the UI thread; it folds the
+journal into a new snapshot, written to a temp file, fsynced and renamed over
+the old one. A crash can therefore lose at most the line being written, never the
+history. Replaying the journal is idempotent, so a crash between the rename
+and the journal's removal only leaves entries the snapshot already has.
+
+Every read and write holds an exclusive lock on checkins_backup.lock, so two
+app instances can share one backup.
+"""
+
+import os
+import json
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def record_identity(record):
+    return (record.get('user_name'), record.get('check_type'), record.get('timestamp'))
+
+
+class BackupStore:
+    def __init__(self, path, compact_bytes=256 * 1024):
+        self.path = path
+        base = os.path.splitext(path)[0]
+        self.journal_path = base + '.journal'
+        self.lock_path = base + '.lock'
+        self.compact_bytes = compact_bytes
+
+    def append(self, record):
+        """Add one check-in; returns True once the journal is due for compaction"""
+        return self._log({'add': record})
+
+    def mark_synced(self, identities):
+        """Flag the pending check-ins with these ``record_identity`` values as saved to Sheets;
+        returns as ``append``"""
+        return self._log({'synced': [list(identity) for identity in identities]})
+
+    def load(self):
+        """Every check-in, oldest first: the snapshot with the journal applied"""
+        with self._locked():
+            return self._read()
+
+    def compact(self):
+        """Fold the journal into a new snapshot"""
+        with self._locked():
+            if os.path.exists(self.journal_path):
+                self._compact()
+
+    def _log(self, entry):
+        line = (json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+        with self._locked():
+            with open(self.journal_path, 'a+b') as f:
+                size = f.seek(0, os.SEEK_END)
+                if size:
+                    f.seek(size - 1)
+                    if f.read(1) != b'\n':
+                        # Keep a line torn by a crash from swallowing this one
+                        line = b'\n' + line
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+                size += len(line)
+        return size >= self.compact_bytes
+
+    def _read(self):
+        records = []
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+        if not os.path.exists(self.journal_path):
+            return records
+
+        seen = {record_identity(record) for record in records}
+        pending = {record_identity(record): record for record in records
+                   if record.get('sheets_status') == 'pending'}
+
+        with open(self.journal_path, 'rb') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn write from a crash mid-append
+                    continue
+                if 'add' in entry:
+                    record = entry['add']
+                    identity = record_identity(record)
+                    if identity in seen:
+                        continue
+                    seen.add(identity)
+                    records.append(record)
+                    if record.get('sheets_status') == 'pending':
+                        pending[identity] = record
+                elif 'synced' in entry:
+                    for identity in entry['synced']:
+                        record = pending.pop(tuple(identity), None)
+                        if record is not None:
+                            record['sheets_status'] = 'synced'
+        return records
+
+    def _compact(self):
+        records = self._read()
+        tmp_file = self.path + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(records, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.path)
+        os.remove(self.journal_path)
+
+    @contextmanager
+    def _locked(self):
+        with open(self.lock_path, 'a+b') as f:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                while True:
+                    try:
+                        # Gives up with OSError after about 10 s of retrying
+                        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        continue
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
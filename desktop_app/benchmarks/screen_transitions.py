@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Question screen transition timing
+
+Steps a check-in back and forth through the questions of one of the desktop
+apps and times every Next/Back press until Tk has finished redrawing. Each run
+measures two modes: "rebuild" throws the question screen away before every
+press, which is what every transition used to cost, and "reuse" keeps the
+persistent screen and only updates its text, progress bar and answer box.
+
+Google Sheets is never contacted. Tk needs a display; on a headless machine
+run under xvfb-run.
+
+Usage:
+    python benchmarks/screen_transitions.py
+    python benchmarks/screen_transitions.py --app classic --presses 500
+"""
+
+import os
+import sys
+import math
+import time
+import argparse
+import importlib
+import tkinter as tk
+
+DESKTOP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, DESKTOP_DIR)
+
+from tasktracker_shared.questionnaire import question_set  # noqa: E402
+
+APPS = {'modern': 'tasktracker_modern', 'classic': 'tasktracker_app'}
+
+
+def make_app(name):
+    module = importlib.import_module(APPS[name])
+
+    class BenchmarkApp(module.TaskTrackerApp):
+        def init_google_sheets(self):
+            # Stay offline; the app then behaves as if Sheets is not configured
+            pass
+
+    root = tk.Tk()
+    return root, BenchmarkApp(root)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not samples:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(samples)))
+    return samples[rank - 1]
+
+
+def time_transitions(root, app, presses, rebuild):
+    """Seconds taken by each of ``presses`` Next/Back presses, including the redraw"""
+    app.user_name = 'Benchmark'
+    app.check_type = 'morning'
+    app.questions = question_set('morning').questions
+    app.current_question = 0
+    app.responses = {}
+    app.question_screen = None
+    app.show_question_screen()
+    root.update()
+
+    last = len(app.questions) - 1
+    forward = True
+    samples = []
+    for _ in range(presses):
+        if app.current_question == last:
+            forward = False
+        elif app.current_question == 0:
+            forward = True
+        if forward:
+            app.answer_text.delete('1.0', 'end')
+            app.answer_text.insert('1.0', f"Answer to question {app.current_question + 1}")
+
+        started = time.perf_counter()
+        if rebuild:
+            app.question_screen = None  # the next show_question_screen builds from scratch
+        if forward:
+            app.next_question()
+        else:
+            app.prev_question()
+        root.update()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        'presses': len(ordered),
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3),
+        'p50_ms': round(percentile(ordered, 50) * 1000, 3),
+        'p95_ms': round(percentile(ordered, 95) * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--app', choices=sorted(APPS), default='modern')
+    parser.add_argument('--presses', type=int, default=200,
+                        help='Next/Back presses to time in each mode')
+    args = parser.parse_args()
+
+    root, app = make_app(args.app)
+    results = {}
+    try:
+        for mode in ('rebuild', 'reuse'):
+            results[mode] = summarize(time_transitions(root, app, args.presses, mode == 'rebuild'))
+    finally:
+        app.background.shutdown()
+        root.destroy()
+
+    print(f"{args.app} app, {args.presses} presses per mode")
+    print(f"{'mode':<8} {'mean':>9} {'p50':>9} {'p95':>9} {'max':>9}  (ms)")
+    for mode, stats in results.items():
+        print(f"{mode:<8} {stats['mean_ms']:>9.3f} {stats['p50_ms']:>9.3f} "
+              f"{stats['p95_ms']:>9.3f} {stats['max_ms']:>9.3f}")
+    if results['reuse']['mean_ms']:
+        print(f"reuse is {results['rebuild']['mean_ms'] / results['reuse']['mean_ms']:.1f}x faster per transition")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Desktop app startup time report
+
+Launches a desktop app the way a user would and reports the time until the
+welcome window has been drawn, plus a breakdown of what importing the app
+module costs (from ``python -X importtime``). The Google client libraries are
+only loaded once the window is up, so they must not show up in the import
+breakdown; the report fails if they do.
+
+Time to first paint runs from just before the process is started until the
+app prints its first completed redraw, which it does when
+TASKTRACKER_STARTUP_REPORT=1 is set. Pass --exe to measure a PyInstaller
+build instead of the script (the import breakdown is skipped for frozen
+builds). Exits with status 1 when the median is over --budget seconds. Tk
+needs a display; on a headless machine run under xvfb-run.
+
+Usage:
+    python benchmarks/startup_time.py
+    python benchmarks/startup_time.py --app classic --runs 10
+    python benchmarks/startup_time.py --exe dist/TaskTracker --budget 1.5
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+DESKTOP_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+APPS = {'modern': 'tasktracker_modern', 'classic': 'tasktracker_app'}
+
+# Loaded on demand when the app connects; importing them at startup is a regression
+DEFERRED = ('gspread', 'google', 'requests')
+
+
+def import_breakdown(module):
+    """Self import time in seconds per top-level package, for ``import module``"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=DESKTOP_DIR, capture_output=True, text=True, check=True)
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        packages[package] = packages.get(package, 0.0) + int(self_us) / 1e6
+    return packages
+
+
+def time_to_first_paint(command, timeout):
+    """Seconds from launching ``command`` until it reports its first paint"""
+    env = dict(os.environ, TASKTRACKER_STARTUP_REPORT='1')
+    started = time.time()
+    process = subprocess.Popen(command, cwd=DESKTOP_DIR, env=env,
+                               stdout=subprocess.PIPE, text=True)
+    try:
+        deadline = started + timeout
+        for line in process.stdout:
+            if line.startswith('first-paint '):
+                return float(line.split()[1]) - started
+            if time.time() > deadline:
+                break
+        raise RuntimeError(f"{command[-1]} never reported its first paint")
+    finally:
+        process.kill()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--app', choices=sorted(APPS), default='modern')
+    parser.add_argument('--exe', help='measure this PyInstaller build instead of the script')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=1.0,
+                        help='fail when the median time to first paint exceeds this many seconds')
+    parser.add_argument('--top', type=int, default=10, help='packages to list in the breakdown')
+    parser.add_argument('--timeout', type=float, default=30.0)
+    args = parser.parse_args()
+
+    ok = True
+    if args.exe:
+        command = [os.path.abspath(args.exe)]
+    else:
+        module = APPS[args.app]
+        command = [sys.executable, os.path.join(DESKTOP_DIR, module + '.py')]
+
+        packages = import_breakdown(module)
+        total = sum(packages.values())
+        print(f"import {module}: {total * 1000:.1f} ms")
+        for package, seconds in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"  {package:<24} {seconds * 1000:>8.1f} ms  {seconds / total:>6.1%}")
+        eager = [package for package in DEFERRED if package in packages]
+        if eager:
+            ok = False
+            print(f"  imported at startup but should be deferred: {', '.join(eager)}")
+        print()
+
+    samples = sorted(time_to_first_paint(command, args.timeout) for _ in range(args.runs))
+    median = samples[len(samples) // 2]
+    print(f"time to first paint over {args.runs} runs: median {median * 1000:.0f} ms, "
+          f"min {samples[0] * 1000:.0f} ms, max {samples[-1] * 1000:.0f} ms")
+    if median > args.budget:
+        ok = False
+        print(f"over the {args.budget:.2f} s budget")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -20,6 +20,7 @@ pyinstaller --onefile \
     --name="TaskTracker" \
     --add-data="credentials.json:." \
     --add-data="config.json:." \
+    --collect-data=tasktracker_shared \
     tasktracker_modern.py
 
 echo ""
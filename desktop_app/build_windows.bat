@@ -21,6 +21,7 @@ pyinstaller --onefile ^
     --name="TaskTracker" ^
     --add-data="credentials.json;." ^
     --add-data="config.json;." ^
+    --collect-data=tasktracker_shared ^
     --icon=NONE ^
     tasktracker_modern.py
 
@@ -0,0 +1,245 @@
+"""
+Outbox for check-ins that could not be saved to Google Sheets
+
+Every check-in is kept in the local backup (see backup_store.py) with a
+``sheets_status`` of ``synced`` or ``pending``. A background thread pushes pending ones to Sheets,
+one ``append_rows`` call per date, skipping rows the worksheet already has
+so a replay never duplicates a check-in. Records written before the outbox
+existed have no status and are left alone. Rows are laid out in the same
+fixed columns as the web app's (see sheet_layout.py).
+"""
+
+import random
+import threading
+
+from backup_store import BackupStore, record_identity
+from tasktracker_shared.sheets_quota import SheetsQuota, Coalescer
+from tasktracker_shared.sheet_layout import SheetLayout, column_letter, worksheet_rows
+
+
+class SheetsOutbox:
+    def __init__(self, backup_file, quota=None, team_size=20, base_delay=5.0, max_delay=600.0):
+        self.backup_file = backup_file
+        self.backup = BackupStore(backup_file)
+        self.quota = quota or SheetsQuota()
+        self.team_size = team_size
+        self.lookups = Coalescer()
+        # date -> (worksheet, SheetLayout), so the header is read once per worksheet
+        self.sheets = {}
+        self._sheets_lock = threading.Lock()
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lock = threading.Lock()
+        # record_identity of every check-in waiting for Sheets; read from the backup on first use
+        self._pending = None
+        # Held while rows are being pushed, so a replay never races a live save
+        self.sync_lock = threading.Lock()
+        self._thread = None
+        self._wake = threading.Event()
+
+    def save(self, data, synced):
+        """Add a check-in to the backup, marked synced or pending; returns True once it is due for ``compact``"""
+        record = dict(data, sheets_status='synced' if synced else 'pending')
+        with self.lock:
+            due = self.backup.append(record)
+            if not synced and self._pending is not None:
+                self._pending.add(record_identity(record))
+        return due
+
+    def compact(self):
+        """Fold the backup journal into checkins_backup.json"""
+        try:
+            with self.lock:
+                self.backup.compact()
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not compact the local backup: {e}")
+
+    def records(self):
+        """Every check-in in the backup"""
+        with self.lock:
+            return self.backup.load()
+
+    def is_pending(self, record):
+        """True while the backup still has this check-in waiting for Sheets"""
+        with self.lock:
+            return record_identity(record) in self._pending_identities()
+
+    def pending_count(self):
+        with self.lock:
+            return len(self._pending_identities())
+
+    def _pending_identities(self):
+        if self._pending is None:
+            self._pending = {record_identity(record) for record in self.backup.load()
+                             if record.get('sheets_status') == 'pending'}
+        return self._pending
+
+    def start(self, spreadsheet):
+        """Replay pending check-ins in the background; a no-op without a spreadsheet"""
+        if spreadsheet is None:
+            return
+        if self._thread and self._thread.is_alive():
+            self._wake.set()
+            return
+        self._thread = threading.Thread(target=self._run, args=(spreadsheet,),
+                                        name='sheets-outbox', daemon=True)
+        self._thread.start()
+
+    def replay_once(self, spreadsheet):
+        """Push every pending check-in; returns how many rows were appended"""
+        with self.sync_lock:
+            return self._replay_pending(spreadsheet)
+
+    def _replay_pending(self, spreadsheet):
+        with self.lock:
+            pending = [record for record in self.backup.load() if record.get('sheets_status') == 'pending']
+            # Another app instance may have pushed some since the set was loaded
+            self._pending = {record_identity(record) for record in pending}
+        if not pending:
+            return 0
+
+        by_date = {}
+        for record in pending:
+            by_date.setdefault(record['date'], []).append(record)
+
+        appended = 0
+        done = set()
+        try:
+            for sheet_name in sorted(by_date):
+                appended += self._replay_date(spreadsheet, sheet_name, by_date[sheet_name])
+                done.update(record_identity(record) for record in by_date[sheet_name])
+        finally:
+            if done:
+                self.mark_synced(done)
+        return appended
+
+    def upload(self, spreadsheet, record):
+        """Push one check-in saved as pending; returns False if a replay already pushed it"""
+        with self.sync_lock:
+            # A replay may have taken the lock between the local save and now
+            if not self.is_pending(record):
+                return False
+            self.append(spreadsheet, record['date'], [record])
+            self.mark_synced({record_identity(record)})
+        return True
+
+    def append(self, spreadsheet, sheet_name, records):
+        """Write check-ins for one date as one contiguous block of rows"""
+        worksheet, layout = self.get_worksheet(spreadsheet, sheet_name)
+        try:
+            missing = layout.missing_labels(records)
+            if missing:
+                layout = self._add_columns(sheet_name, worksheet, layout, missing)
+            with self.quota.limit('write'):
+                worksheet.append_rows([layout.row(data) for data in records], table_range='A1')
+        except Exception:
+            # The worksheet may have been deleted or edited; look it up again next time
+            self.sheets.pop(sheet_name, None)
+            raise
+
+    def get_worksheet(self, spreadsheet, sheet_name):
+        """(worksheet, SheetLayout) for a date, created if needed; concurrent callers share one lookup"""
+        cached = self.sheets.get(sheet_name)
+        if cached:
+            return cached
+        return self.lookups.run(
+            sheet_name, lambda: self._open_worksheet(spreadsheet, sheet_name)
+        )
+
+    def _open_worksheet(self, spreadsheet, sheet_name):
+        import gspread  # loaded on first use to keep app startup fast
+
+        headers = None
+        try:
+            with self.quota.limit('read'):
+                worksheet = spreadsheet.worksheet(sheet_name)
+        except gspread.exceptions.WorksheetNotFound:
+            try:
+                with self.quota.limit('write'):
+                    worksheet = spreadsheet.add_worksheet(title=sheet_name, rows=worksheet_rows(self.team_size),
+                                                          cols=len(SheetLayout().headers))
+            except gspread.exceptions.APIError:
+                # The web app or another desktop created it first
+                with self.quota.limit('read'):
+                    worksheet = spreadsheet.worksheet(sheet_name)
+            else:
+                headers = []
+
+        if headers is None:
+            with self.quota.limit('read'):
+                headers = worksheet.row_values(1)
+        if headers:
+            layout = SheetLayout(headers)
+        else:
+            layout = SheetLayout()
+            with self.quota.limit('write'):
+                worksheet.update(range_name='A1', values=[list(layout.headers)])
+
+        self._cache_sheet(sheet_name, worksheet, layout)
+        return worksheet, layout
+
+    def _cache_sheet(self, sheet_name, worksheet, layout):
+        with self._sheets_lock:
+            self.sheets[sheet_name] = (worksheet, layout)
+            # Only today's and maybe yesterday's worksheets are written to
+            while len(self.sheets) > 3:
+                del self.sheets[min(self.sheets)]
+
+    def _add_columns(self, sheet_name, worksheet, layout, labels):
+        """Extend an older worksheet's header with columns for answer labels it lacks"""
+        extended = layout.extended(labels)
+        if len(extended.headers) > worksheet.col_count:
+            with self.quota.limit('write'):
+                worksheet.add_cols(len(extended.headers) - worksheet.col_count)
+        with self.quota.limit('write'):
+            worksheet.update(range_name=f"{column_letter(len(layout.headers))}1", values=[list(labels)])
+        self._cache_sheet(sheet_name, worksheet, extended)
+        return extended
+
+    def _replay_date(self, spreadsheet, sheet_name, records):
+        worksheet, layout = self.get_worksheet(spreadsheet, sheet_name)
+        with self.quota.limit('read'):
+            existing = {tuple(row[:3]) for row in worksheet.get_values('A:C')}
+        missing = []
+        for record in records:
+            identity = tuple(str(cell) for cell in layout.row(record)[:3])
+            if identity not in existing:
+                existing.add(identity)
+                missing.append(record)
+
+        if missing:
+            self.append(spreadsheet, sheet_name, missing)
+        return len(missing)
+
+    def _run(self, spreadsheet):
+        delay = 0.0
+        while True:
+            try:
+                appended = self.replay_once(spreadsheet)
+            except Exception as e:
+                delay = self._next_delay(delay)
+                print(f"Could not replay check-ins to Google Sheets, retrying in {delay:.0f}s: {e}")
+            else:
+                if appended:
+                    print(f"✓ Replayed {appended} saved check-ins to Google Sheets")
+                if not self.pending_count():
+                    return
+                delay = 0.0
+
+            self._wake.wait(delay or self.base_delay)
+            self._wake.clear()
+
+    def _next_delay(self, delay):
+        # A 429 also blocks the quota bucket for Retry-After, so later calls wait anyway
+        delay = min(max(delay * 2, self.base_delay), self.max_delay)
+        return delay * random.uniform(1.0, 1.25)
+
+    def mark_synced(self, identities):
+        """Flag the pending check-ins with these ``record_identity`` values as saved to Sheets"""
+        with self.lock:
+            due = self.backup.mark_synced(identities)
+            if self._pending is not None:
+                self._pending.difference_update(identities)
+        if due:
+            # Called from the upload and replay threads, never the Tk thread
+            self.compact()
@@ -8,9 +8,14 @@ import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 import json
 import os
+import time
 from datetime import datetime
-import gspread
-from google.oauth2.service_account import Credentials
+from sheets_outbox import SheetsOutbox
+from tasktracker_shared.search_index import SearchIndex
+from tasktracker_shared.user_stats import UserStats
+from tasktracker_shared.sheets_quota import SheetsQuota
+from background import BackgroundRunner
+from tasktracker_shared.questionnaire import question_set
 
 class TaskTrackerApp:
     def __init__(self, root):
@@ -38,35 +43,56 @@ class TaskTrackerApp:
         self.current_question = 0
         self.responses = {}
         
-        # Questions
-        self.morning_questions = [
-            {"id": "energy_check", "question": "0️⃣ Energy Check:\nWhat's your energy drink or vibe this morning?", "label": "Energy Check"},
-            {"id": "progress", "question": "1️⃣ Progress:\nWhat key tasks did you complete yesterday?", "label": "Yesterday's Progress"},
-            {"id": "focus", "question": "2️⃣ Today's Focus:\nWhat are the top 1-3 priorities you're focusing on today?", "label": "Today's Priorities"},
-            {"id": "blockers", "question": "3️⃣ Blockers:\nAnything slowing you down or you need help with?", "label": "Blockers"},
-            {"id": "mood", "question": "4️⃣ State of Mind:\nOne word for how you're feeling as you start the day?", "label": "State of Mind"}
-        ]
-        
-        self.evening_questions = [
-            {"id": "wins", "question": "1️⃣ Wins:\nWhat did you accomplish today (big or small)?", "label": "Today's Wins"},
-            {"id": "learnings", "question": "2️⃣ Learnings:\nAnything new you learned or discovered?", "label": "Learnings"},
-            {"id": "challenges", "question": "3️⃣ Stuck Points:\nAny challenges you faced today?", "label": "Challenges"},
-            {"id": "tomorrow", "question": "4️⃣ Tomorrow Prep:\nWhat will be your focus tomorrow?", "label": "Tomorrow's Focus"},
-            {"id": "mood_end", "question": "5️⃣ Mood Check:\nHow are you ending the day?", "label": "Ending Mood"}
-        ]
-        
+        # Questions of the current check-in; the sets come from questions.json, shared with the web app
         self.questions = []
         
-        # Initialize Google Sheets
+        # Question screen widgets, built once per check-in and reused for every question
+        self.question_screen = None
+        
+        # Per-minute read/write budgets shared by every Sheets call
+        self.sheets_quota = SheetsQuota()
+        
+        # Local backup, which doubles as the outbox for check-ins that missed Sheets
+        self.outbox = SheetsOutbox(
+            os.path.join(os.path.dirname(__file__), 'checkins_backup.json'),
+            quota=self.sheets_quota
+        )
+        
+        # Full-text index of every answer; created from the backup on first use
+        self.search_index = SearchIndex(
+            os.path.join(os.path.dirname(__file__), 'checkins_search.db'),
+            backfill=self.outbox.records
+        )
+        
+        # Per-user streaks and counts, updated as check-ins are saved
+        self.user_stats = UserStats(
+            os.path.join(os.path.dirname(__file__), 'checkins_stats.db'),
+            backfill=self.outbox.records
+        )
+        
+        # Google Sheets is connected in the background once the window is up
+        self.background = BackgroundRunner(self.root)
         self.sheets_client = None
         self.spreadsheet = None
-        self.init_google_sheets()
+        self.sheets_connected = False
+        # Check-ins finished before the connection attempt completed; uploaded once it has
+        self.waiting_uploads = []
+        
+        # Saves go to the backup journal; fold earlier sessions' into checkins_backup.json
+        self.background.submit(self.outbox.compact)
         
         # Show welcome screen
         self.show_welcome_screen()
+        
+        # Give the welcome screen time to paint before loading the Google client libraries
+        self.root.after(200, self.connect_google_sheets)
+    
+    def connect_google_sheets(self):
+        """Start connecting to Google Sheets without blocking the UI"""
+        self.background.submit(self.init_google_sheets, on_done=self.on_sheets_connected)
     
     def init_google_sheets(self):
-        """Initialize Google Sheets connection"""
+        """Initialize Google Sheets connection (runs on a background thread)"""
         try:
             # Check for credentials file
             creds_file = os.path.join(os.path.dirname(__file__), 'credentials.json')
@@ -83,11 +109,18 @@ class TaskTrackerApp:
             with open(config_file, 'r') as f:
                 config = json.load(f)
             
+            # New date worksheets are sized for a morning and evening row per member
+            self.outbox.team_size = int(config.get('team_size', self.outbox.team_size))
+            
             spreadsheet_id = config.get('spreadsheet_id')
             if not spreadsheet_id:
                 print("Warning: spreadsheet_id not in config. Data will be saved locally only.")
                 return
             
+            # Imported here, not at module level: they take longer to load than the whole UI
+            import gspread
+            from google.oauth2.service_account import Credentials
+            
             # Setup credentials
             scope = [
                 'https://spreadsheets.google.com/feeds',
@@ -96,21 +129,35 @@ class TaskTrackerApp:
             
             credentials = Credentials.from_service_account_file(creds_file, scopes=scope)
             self.sheets_client = gspread.authorize(credentials)
-            self.spreadsheet = self.sheets_client.open_by_key(spreadsheet_id)
+            with self.sheets_quota.limit('read'):
+                self.spreadsheet = self.sheets_client.open_by_key(spreadsheet_id)
             print("✓ Connected to Google Sheets")
             
         except Exception as e:
             print(f"Warning: Could not connect to Google Sheets: {e}")
             print("Data will be saved to local file instead.")
+            raise
+    
+    def on_sheets_connected(self, result, error):
+        """Called on the Tk thread once the connection attempt has finished"""
+        self.sheets_connected = True
+        waiting, self.waiting_uploads = self.waiting_uploads, []
+        for data in waiting:
+            self.start_upload(data)
+        
+        if error is not None:
             # Show warning in GUI
-            import tkinter.messagebox as mb
-            mb.showwarning("Google Sheets", 
-                          "Could not connect to Google Sheets.\n"
-                          "Data will be saved locally only.\n\n"
-                          "Check:\n"
-                          "1. credentials.json is in the folder\n"
-                          "2. config.json has correct spreadsheet_id\n"
-                          "3. Spreadsheet is shared with service account")
+            messagebox.showwarning("Google Sheets", 
+                                   "Could not connect to Google Sheets.\n"
+                                   "Data will be saved locally only.\n\n"
+                                   "Check:\n"
+                                   "1. credentials.json is in the folder\n"
+                                   "2. config.json has correct spreadsheet_id\n"
+                                   "3. Spreadsheet is shared with service account")
+            return
+        
+        # Push check-ins saved while Sheets was unreachable
+        self.outbox.start(self.spreadsheet)
     
     def show_welcome_screen(self):
         """Display welcome screen"""
@@ -256,14 +303,20 @@ class TaskTrackerApp:
             return
         
         self.check_type = self.check_type_var.get()
-        self.questions = self.morning_questions if self.check_type == "morning" else self.evening_questions
+        self.questions = question_set(self.check_type).questions
         self.current_question = 0
         self.responses = {}
         
         self.show_question_screen()
     
     def show_question_screen(self):
-        """Display question screen"""
+        """Display question screen, building it only if it isn't already up"""
+        if self.question_screen is None or not self.question_screen.winfo_exists():
+            self.build_question_screen()
+        self.update_question_screen()
+    
+    def build_question_screen(self):
+        """Create the question screen widgets; update_question_screen fills them in"""
         # Clear window
         for widget in self.root.winfo_children():
             widget.destroy()
@@ -271,6 +324,7 @@ class TaskTrackerApp:
         # Main container
         main_container = tk.Frame(self.root, bg=self.light_bg)
         main_container.pack(fill='both', expand=True)
+        self.question_screen = main_container
         
         # Header
         header = tk.Frame(main_container, bg=self.bg_color, height=130)
@@ -286,19 +340,17 @@ class TaskTrackerApp:
                              bg=self.bg_color, fg=self.fg_color)
         type_label.pack(pady=2)
         
-        progress_text = f"Question {self.current_question + 1} of {len(self.questions)}"
-        progress_label = tk.Label(header, text=progress_text, font=("Helvetica", 11),
-                                 bg=self.bg_color, fg=self.fg_color)
-        progress_label.pack(pady=(5, 10))
+        self.progress_label = tk.Label(header, font=("Helvetica", 11),
+                                       bg=self.bg_color, fg=self.fg_color)
+        self.progress_label.pack(pady=(5, 10))
         
         # Progress bar
         progress_bar_container = tk.Frame(main_container, bg=self.border_color, height=6)
         progress_bar_container.pack(fill='x')
         progress_bar_container.pack_propagate(False)
         
-        progress_percent = (self.current_question + 1) / len(self.questions)
-        progress_bar = tk.Frame(progress_bar_container, bg=self.button_color)
-        progress_bar.place(x=0, y=0, relwidth=progress_percent, relheight=1)
+        self.progress_bar = tk.Frame(progress_bar_container, bg=self.button_color)
+        self.progress_bar.place(x=0, y=0, relwidth=0, relheight=1)
         
         # Content card
         content_outer = tk.Frame(main_container, bg=self.light_bg)
@@ -308,10 +360,9 @@ class TaskTrackerApp:
         content.pack(fill='both', expand=True, padx=5, pady=5)
         
         # Question
-        question = self.questions[self.current_question]
-        q_label = tk.Label(content, text=question['question'], font=("Helvetica", 15, "bold"),
-                          bg="white", justify='left', wraplength=520, fg="#333")
-        q_label.pack(pady=(30, 25), padx=30)
+        self.question_label = tk.Label(content, font=("Helvetica", 15, "bold"),
+                                       bg="white", justify='left', wraplength=520, fg="#333")
+        self.question_label.pack(pady=(30, 25), padx=30)
         
         # Answer input
         answer_label = tk.Label(content, text="Your answer:", font=("Helvetica", 12, "bold"),
@@ -332,7 +383,6 @@ class TaskTrackerApp:
                                                      bg="white",
                                                      padx=15, pady=12)
         self.answer_text.pack(fill='both', expand=True)
-        self.answer_text.focus()
         
         # Buttons with shadow
         btn_frame = tk.Frame(content, bg="white")
@@ -352,20 +402,36 @@ class TaskTrackerApp:
                             activebackground=self.button_hover)
         next_btn.pack()
         
+        # Back button with shadow, packed from the second question on
+        self.back_shadow = tk.Frame(btn_frame, bg="#9BA3C0")
+        
+        back_inner = tk.Frame(self.back_shadow, bg="#6c757d")
+        back_inner.pack(padx=2, pady=2)
+        
+        back_btn = tk.Button(back_inner, text="← Back", font=("Helvetica", 14),
+                            bg="#6c757d", fg="white", padx=35, pady=13,
+                            relief='flat', borderwidth=0,
+                            command=self.prev_question, cursor="hand2",
+                            activebackground="#5a6268")
+        back_btn.pack()
+    
+    def update_question_screen(self):
+        """Show the current question: only text, progress and the answer box change"""
+        question = self.questions[self.current_question]
+        self.progress_label.configure(text=f"Question {self.current_question + 1} of {len(self.questions)}")
+        self.progress_bar.place_configure(relwidth=(self.current_question + 1) / len(self.questions))
+        self.question_label.configure(text=question.question)
+        
+        # Restore the answer if this question was already answered
+        self.answer_text.delete("1.0", "end")
+        if question.id in self.responses:
+            self.answer_text.insert("1.0", self.responses[question.id]['answer'])
+        self.answer_text.focus()
+        
         if self.current_question > 0:
-            # Back button with shadow
-            back_shadow = tk.Frame(btn_frame, bg="#9BA3C0")
-            back_shadow.pack(side='left')
-            
-            back_inner = tk.Frame(back_shadow, bg="#6c757d")
-            back_inner.pack(padx=2, pady=2)
-            
-            back_btn = tk.Button(back_inner, text="← Back", font=("Helvetica", 14),
-                                bg="#6c757d", fg="white", padx=35, pady=13,
-                                relief='flat', borderwidth=0,
-                                command=self.prev_question, cursor="hand2",
-                                activebackground="#5a6268")
-            back_btn.pack()
+            self.back_shadow.pack(side='left')
+        else:
+            self.back_shadow.pack_forget()
     
     def next_question(self):
         """Move to next question"""
@@ -377,8 +443,8 @@ class TaskTrackerApp:
         
         # Save answer
         question = self.questions[self.current_question]
-        self.responses[question['id']] = {
-            'label': question['label'],
+        self.responses[question.id] = {
+            'label': question.label,
             'answer': answer,
             'timestamp': datetime.now().isoformat()
         }
@@ -395,12 +461,6 @@ class TaskTrackerApp:
         if self.current_question > 0:
             self.current_question -= 1
             self.show_question_screen()
-            
-            # Restore previous answer if exists
-            question = self.questions[self.current_question]
-            if question['id'] in self.responses:
-                self.answer_text.delete("1.0", "end")
-                self.answer_text.insert("1.0", self.responses[question['id']]['answer'])
     
     def finish_checkin(self):
         """Complete the check-in and save data"""
@@ -414,72 +474,66 @@ class TaskTrackerApp:
             'responses': self.responses
         }
         
-        # Try to save to Google Sheets
-        sheets_success = False
-        if self.spreadsheet:
-            try:
-                self.save_to_sheets(data)
-                sheets_success = True
-            except Exception as e:
-                print(f"Error saving to Google Sheets: {e}")
-        
-        # Always save locally as backup
+        # Save locally first so nothing is lost, then upload without blocking the UI
         self.save_locally(data)
+        self.show_completion_screen('saving')
+        if self.sheets_connected:
+            self.start_upload(data)
+        else:
+            # Waiting on the connection here would tie up a worker the index and stats need
+            self.waiting_uploads.append(data)
+    
+    def start_upload(self, data):
+        """Queue one check-in for upload on the background pool"""
+        self.background.submit(self.upload_checkin, data, on_done=self.on_upload_finished)
+    
+    def upload_checkin(self, data):
+        """Send one check-in to Google Sheets (runs on a background thread)"""
+        if not self.spreadsheet:
+            raise RuntimeError("Google Sheets connection not available")
+        self.save_to_sheets(data)
+    
+    def on_upload_finished(self, result, error):
+        """Called on the Tk thread when the upload has succeeded or failed"""
+        if error is None:
+            self.update_sync_status('synced')
+            return
         
-        # Show completion screen
-        self.show_completion_screen(sheets_success)
+        print(f"Error saving to Google Sheets: {error}")
+        if self.spreadsheet:
+            # Retried in the background until it goes through
+            self.outbox.start(self.spreadsheet)
+            self.update_sync_status('queued')
+        else:
+            self.update_sync_status('local')
     
     def save_to_sheets(self, data):
-        """Save data to Google Sheets"""
-        sheet_name = data['date']
-        
-        try:
-            worksheet = self.spreadsheet.worksheet(sheet_name)
-        except:
-            # Create new worksheet for this date
-            worksheet = self.spreadsheet.add_worksheet(title=sheet_name, rows=100, cols=20)
-            
-            # Add headers
-            headers = ['Timestamp', 'Name', 'Type']
-            for response in data['responses'].values():
-                headers.append(response['label'])
-            worksheet.append_row(headers)
-        
-        # Prepare row data
-        row = [
-            data['time'],
-            data['user_name'],
-            '🌅 Morning Check-in' if data['check_type'] == 'morning' else '🌇 Evening Check-out'
-        ]
-        
-        for response in data['responses'].values():
-            row.append(response['answer'])
-        
-        # Append the row
-        worksheet.append_row(row)
-        print("✓ Data saved to Google Sheets")
+        """Save data to Google Sheets, unless the outbox replay already has"""
+        if self.outbox.upload(self.spreadsheet, data):
+            print("✓ Data saved to Google Sheets")
     
-    def save_locally(self, data):
+    def save_locally(self, data, synced=False):
         """Save data to local JSON file as backup"""
-        backup_file = os.path.join(os.path.dirname(__file__), 'checkins_backup.json')
-        
-        # Load existing data
-        if os.path.exists(backup_file):
-            with open(backup_file, 'r') as f:
-                all_data = json.load(f)
-        else:
-            all_data = []
-        
-        # Append new data
-        all_data.append(data)
-        
-        # Save back to file
-        with open(backup_file, 'w') as f:
-            json.dump(all_data, f, indent=2)
-        
-        print(f"✓ Data saved locally to {backup_file}")
+        if self.outbox.save(data, synced):
+            # Folding the journal reads and rewrites the whole history
+            self.background.submit(self.outbox.compact)
+        self.background.submit(self.index_checkin, data)
+        self.background.submit(self.count_checkin, data, on_done=self.show_user_stats)
+        print(f"✓ Data saved locally to {self.outbox.backup_file}")
+    
+    def index_checkin(self, data):
+        """Add a check-in to the local search index (runs on a background thread)"""
+        try:
+            self.search_index.add(data)
+        except Exception as e:
+            print(f"Warning: Could not update the search index: {e}")
     
-    def show_completion_screen(self, sheets_success):
+    def count_checkin(self, data):
+        """Update the user's streak and counts; returns their summary (runs on a background thread)"""
+        self.user_stats.add(data)
+        return self.user_stats.summary(data['user_name'])
+    
+    def show_completion_screen(self, sync_status):
         """Display completion screen"""
         # Clear window
         for widget in self.root.winfo_children():
@@ -503,32 +557,24 @@ class TaskTrackerApp:
         content = tk.Frame(self.root, bg="white")
         content.pack(fill='both', expand=True, padx=40, pady=40)
         
-        # Success message
-        if sheets_success:
-            msg = "Your responses have been saved to Google Sheets!"
-            msg_icon = "✓"
-            msg_color = "#28a745"
-        else:
-            msg = "Your responses have been saved locally!\n(Google Sheets connection not available)"
-            msg_icon = "i"
-            msg_color = "#ffc107"
+        # Sync status, updated in place when the upload finishes
+        self.status_frame = tk.Frame(content, relief='flat')
+        self.status_frame.pack(pady=30, padx=40, fill='x')
         
-        msg_frame = tk.Frame(content, bg="#e8f5e9" if sheets_success else "#fff8e1",
-                            relief='flat')
-        msg_frame.pack(pady=30, padx=40, fill='x')
+        self.status_inner = tk.Frame(self.status_frame)
+        self.status_inner.pack(pady=20, padx=20)
         
-        msg_inner = tk.Frame(msg_frame, bg="#e8f5e9" if sheets_success else "#fff8e1")
-        msg_inner.pack(pady=20, padx=20)
+        self.status_icon = tk.Label(self.status_inner, font=("Helvetica", 30, "bold"))
+        self.status_icon.pack()
         
-        icon_label = tk.Label(msg_inner, text=msg_icon, font=("Helvetica", 30, "bold"),
-                             bg="#e8f5e9" if sheets_success else "#fff8e1",
-                             fg=msg_color)
-        icon_label.pack()
+        self.status_label = tk.Label(self.status_inner, font=("Helvetica", 14),
+                                     fg="#333", wraplength=450)
+        self.status_label.pack(pady=(10, 0))
+        self.update_sync_status(sync_status)
         
-        msg_label = tk.Label(msg_inner, text=msg, font=("Helvetica", 14),
-                            bg="#e8f5e9" if sheets_success else "#fff8e1",
-                            fg="#333", wraplength=450)
-        msg_label.pack(pady=(10, 0))
+        # Streak, filled in once the stats have been updated in the background
+        self.stats_label = tk.Label(content, font=("Helvetica", 12, "bold"), bg="white", fg=self.bg_color)
+        self.stats_label.pack()
         
         # Summary
         summary_frame = tk.Frame(content, bg="#f0f0f0", relief='solid', borderwidth=1)
@@ -577,9 +623,46 @@ class TaskTrackerApp:
         exit_btn.pack()
 
 
+    def update_sync_status(self, sync_status):
+        """Show the Google Sheets sync state on the completion screen, if it is still open"""
+        if not getattr(self, 'status_label', None) or not self.status_label.winfo_exists():
+            return
+        
+        icon, msg, color, bg = {
+            'saving': ("…", "Saving your responses to Google Sheets...", self.bg_color, "#eef0fc"),
+            'synced': ("✓", "Your responses have been saved to Google Sheets!", "#28a745", "#e8f5e9"),
+            'queued': ("i", "Your responses have been saved locally!\n"
+                            "(They will be sent to Google Sheets automatically)", "#ffc107", "#fff8e1"),
+            'local': ("i", "Your responses have been saved locally!\n"
+                           "(Google Sheets connection not available)", "#ffc107", "#fff8e1")
+        }[sync_status]
+        
+        for widget in (self.status_frame, self.status_inner, self.status_icon, self.status_label):
+            widget.configure(bg=bg)
+        self.status_icon.configure(text=icon, fg=color)
+        self.status_label.configure(text=msg)
+    
+    def show_user_stats(self, summary, error):
+        """Show the user's streak on the completion screen, if it is still open"""
+        if error is not None:
+            print(f"Warning: Could not update check-in stats: {error}")
+            return
+        if not summary or not getattr(self, 'stats_label', None) or not self.stats_label.winfo_exists():
+            return
+        
+        self.stats_label.configure(text=(
+            f"🔥 {summary['current_streak']}-day streak (best {summary['longest_streak']}) · "
+            f"{summary['morning_count']} check-ins, {summary['evening_count']} check-outs"
+        ))
+
+
 def main():
     root = tk.Tk()
     app = TaskTrackerApp(root)
+    if os.environ.get('TASKTRACKER_STARTUP_REPORT'):
+        # Read by benchmarks/startup_time.py to measure time to first paint
+        root.update()
+        print(f"first-paint {time.time():.6f}", flush=True)
     root.mainloop()
 
 
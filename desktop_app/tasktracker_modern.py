@@ -8,9 +8,14 @@ import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext, font as tkfont
 import json
 import os
+import time
 from datetime import datetime
-import gspread
-from google.oauth2.service_account import Credentials
+from sheets_outbox import SheetsOutbox
+from tasktracker_shared.search_index import SearchIndex
+from tasktracker_shared.user_stats import UserStats
+from tasktracker_shared.sheets_quota import SheetsQuota
+from background import BackgroundRunner
+from tasktracker_shared.questionnaire import question_set
 
 
 class RoundedButton(tk.Canvas):
@@ -85,6 +90,13 @@ class TaskTrackerApp:
         self.text_light = "#718096"
         self.border_color = "#e2e8f0"
         
+        # Header gradient bands, interpolated once and reused by every screen
+        steps = 50
+        self.gradient_colors = [
+            self._interpolate_color(self.primary_color, self.secondary_color, i / steps)
+            for i in range(steps)
+        ]
+        
         self.root.configure(bg=self.bg_light)
         
         # Data
@@ -93,35 +105,56 @@ class TaskTrackerApp:
         self.current_question = 0
         self.responses = {}
         
-        # Questions
-        self.morning_questions = [
-            {"id": "energy_check", "question": "Energy Check: What's your energy drink or vibe this morning?", "label": "Energy Check"},
-            {"id": "progress", "question": "Progress: What key tasks did you complete yesterday?", "label": "Yesterday's Progress"},
-            {"id": "focus", "question": "Today's Focus: What are the top 1-3 priorities you're focusing on today?", "label": "Today's Priorities"},
-            {"id": "blockers", "question": "Blockers: Anything slowing you down or you need help with?", "label": "Blockers"},
-            {"id": "mood", "question": "State of Mind: One word for how you're feeling as you start the day?", "label": "State of Mind"}
-        ]
+        # Questions of the current check-in; the sets come from questions.json, shared with the web app
+        self.questions = []
         
-        self.evening_questions = [
-            {"id": "wins", "question": "Wins: What did you accomplish today (big or small)?", "label": "Today's Wins"},
-            {"id": "learnings", "question": "Learnings: Anything new you learned or discovered?", "label": "Learnings"},
-            {"id": "challenges", "question": "Stuck Points: Any challenges you faced today?", "label": "Challenges"},
-            {"id": "tomorrow", "question": "Tomorrow Prep: What will be your focus tomorrow?", "label": "Tomorrow's Focus"},
-            {"id": "mood_end", "question": "Mood Check: How are you ending the day?", "label": "Ending Mood"}
-        ]
+        # Question screen widgets, built once per check-in and reused for every question
+        self.question_screen = None
         
-        self.questions = []
+        # Per-minute read/write budgets shared by every Sheets call
+        self.sheets_quota = SheetsQuota()
+        
+        # Local backup, which doubles as the outbox for check-ins that missed Sheets
+        self.outbox = SheetsOutbox(
+            os.path.join(os.path.dirname(__file__), 'checkins_backup.json'),
+            quota=self.sheets_quota
+        )
         
-        # Initialize Google Sheets
+        # Full-text index of every answer; created from the backup on first use
+        self.search_index = SearchIndex(
+            os.path.join(os.path.dirname(__file__), 'checkins_search.db'),
+            backfill=self.outbox.records
+        )
+        
+        # Per-user streaks and counts, updated as check-ins are saved
+        self.user_stats = UserStats(
+            os.path.join(os.path.dirname(__file__), 'checkins_stats.db'),
+            backfill=self.outbox.records
+        )
+        
+        # Google Sheets is connected in the background once the window is up
+        self.background = BackgroundRunner(self.root)
         self.sheets_client = None
         self.spreadsheet = None
-        self.init_google_sheets()
+        self.sheets_connected = False
+        # Check-ins finished before the connection attempt completed; uploaded once it has
+        self.waiting_uploads = []
+        
+        # Saves go to the backup journal; fold earlier sessions' into checkins_backup.json
+        self.background.submit(self.outbox.compact)
         
         # Show welcome screen
         self.show_welcome_screen()
+        
+        # Give the welcome screen time to paint before loading the Google client libraries
+        self.root.after(200, self.connect_google_sheets)
+    
+    def connect_google_sheets(self):
+        """Start connecting to Google Sheets without blocking the UI"""
+        self.background.submit(self.init_google_sheets, on_done=self.on_sheets_connected)
     
     def init_google_sheets(self):
-        """Initialize Google Sheets connection"""
+        """Initialize Google Sheets connection (runs on a background thread)"""
         try:
             creds_file = os.path.join(os.path.dirname(__file__), 'credentials.json')
             config_file = os.path.join(os.path.dirname(__file__), 'config.json')
@@ -132,10 +165,17 @@ class TaskTrackerApp:
             with open(config_file, 'r') as f:
                 config = json.load(f)
             
+            # New date worksheets are sized for a morning and evening row per member
+            self.outbox.team_size = int(config.get('team_size', self.outbox.team_size))
+            
             spreadsheet_id = config.get('spreadsheet_id')
             if not spreadsheet_id:
                 return
             
+            # Imported here, not at module level: they take longer to load than the whole UI
+            import gspread
+            from google.oauth2.service_account import Credentials
+            
             scope = [
                 'https://spreadsheets.google.com/feeds',
                 'https://www.googleapis.com/auth/drive'
@@ -143,22 +183,32 @@ class TaskTrackerApp:
             
             credentials = Credentials.from_service_account_file(creds_file, scopes=scope)
             self.sheets_client = gspread.authorize(credentials)
-            self.spreadsheet = self.sheets_client.open_by_key(spreadsheet_id)
+            with self.sheets_quota.limit('read'):
+                self.spreadsheet = self.sheets_client.open_by_key(spreadsheet_id)
             
         except Exception as e:
             print(f"Warning: Could not connect to Google Sheets: {e}")
     
+    def on_sheets_connected(self, result, error):
+        """Called on the Tk thread once the connection attempt has finished"""
+        self.sheets_connected = True
+        waiting, self.waiting_uploads = self.waiting_uploads, []
+        for data in waiting:
+            self.start_upload(data)
+        
+        # Push check-ins saved while Sheets was unreachable
+        self.outbox.start(self.spreadsheet)
+    
     def create_gradient_frame(self, parent, height):
         """Create a gradient-like frame"""
         canvas = tk.Canvas(parent, height=height, highlightthickness=0)
         canvas.pack(fill='x')
         
         # Create gradient effect with rectangles
-        steps = 50
-        for i in range(steps):
-            y = i * (height / steps)
-            color = self._interpolate_color(self.primary_color, self.secondary_color, i/steps)
-            canvas.create_rectangle(0, y, 1000, y + (height/steps) + 1, fill=color, outline=color)
+        band = height / len(self.gradient_colors)
+        for i, color in enumerate(self.gradient_colors):
+            y = i * band
+            canvas.create_rectangle(0, y, 1000, y + band + 1, fill=color, outline=color)
         
         return canvas
     
@@ -262,19 +312,27 @@ class TaskTrackerApp:
             return
         
         self.check_type = self.check_type_var.get()
-        self.questions = self.morning_questions if self.check_type == "morning" else self.evening_questions
+        self.questions = question_set(self.check_type).questions
         self.current_question = 0
         self.responses = {}
         
         self.show_question_screen()
     
     def show_question_screen(self):
-        """Display question screen"""
+        """Display question screen, building it only if it isn't already up"""
+        if self.question_screen is None or not self.question_screen.winfo_exists():
+            self.build_question_screen()
+        self.update_question_screen()
+    
+    def build_question_screen(self):
+        """Create the question screen widgets; update_question_screen fills them in"""
         for widget in self.root.winfo_children():
             widget.destroy()
         
         # Header
         header_canvas = self.create_gradient_frame(self.root, 140)
+        self.question_screen = header_canvas
+        self.header_canvas = header_canvas
         
         # Name and type
         header_canvas.create_text(350, 35, text=self.user_name, 
@@ -285,28 +343,23 @@ class TaskTrackerApp:
                                  font=("Arial", 16), fill="white")
         
         # Progress
-        progress_text = f"Question {self.current_question + 1} of {len(self.questions)}"
-        header_canvas.create_text(350, 100, text=progress_text, 
-                                 font=("Arial", 13), fill="white")
+        self.progress_text = header_canvas.create_text(350, 100, font=("Arial", 13), fill="white")
         
         # Progress bar
         header_canvas.create_rectangle(50, 125, 650, 135, 
                                        fill="#9BA3C0", outline="")
-        progress_width = 600 * ((self.current_question + 1) / len(self.questions))
-        header_canvas.create_rectangle(50, 125, 50 + progress_width, 135, 
-                                       fill="white", outline="")
+        self.progress_bar = header_canvas.create_rectangle(50, 125, 50, 135, 
+                                                           fill="white", outline="")
         
         # Content
         content = tk.Frame(self.root, bg="white")
         content.pack(fill='both', expand=True, padx=40, pady=30)
         
         # Question
-        question = self.questions[self.current_question]
-        q_label = tk.Label(content, text=question['question'], 
-                          font=("Arial", 16, "bold"),
-                          bg="white", fg=self.text_dark, justify='left',
-                          wraplength=600)
-        q_label.pack(pady=(20, 20), anchor='w')
+        self.question_label = tk.Label(content, font=("Arial", 16, "bold"),
+                                       bg="white", fg=self.text_dark, justify='left',
+                                       wraplength=600)
+        self.question_label.pack(pady=(20, 20), anchor='w')
         
         # Answer label
         answer_label = tk.Label(content, text="Your answer:", 
@@ -326,22 +379,19 @@ class TaskTrackerApp:
                                                      height=10,
                                                      padx=15, pady=15)
         self.answer_text.pack(fill='x')
-        self.answer_text.focus()
         
         # Buttons
         btn_frame = tk.Frame(content, bg="white")
         btn_frame.pack(pady=25, fill='x')
         
-        # Back button
-        if self.current_question > 0:
-            back_btn = tk.Button(btn_frame, text="← Back", 
-                                font=("Arial", 15, "bold"),
-                                bg="#6c757d", fg="white",
-                                padx=30, pady=12,
-                                relief='flat', borderwidth=0,
-                                cursor="hand2",
-                                command=self.prev_question)
-            back_btn.pack(side='left')
+        # Back button, packed from the second question on
+        self.back_btn = tk.Button(btn_frame, text="← Back", 
+                                 font=("Arial", 15, "bold"),
+                                 bg="#6c757d", fg="white",
+                                 padx=30, pady=12,
+                                 relief='flat', borderwidth=0,
+                                 cursor="hand2",
+                                 command=self.prev_question)
         
         # Next button
         next_btn = tk.Button(btn_frame, text="Next →", 
@@ -353,6 +403,26 @@ class TaskTrackerApp:
                             command=self.next_question)
         next_btn.pack(side='right')
     
+    def update_question_screen(self):
+        """Show the current question: only text, progress and the answer box change"""
+        question = self.questions[self.current_question]
+        progress = (self.current_question + 1) / len(self.questions)
+        self.header_canvas.itemconfigure(
+            self.progress_text, text=f"Question {self.current_question + 1} of {len(self.questions)}")
+        self.header_canvas.coords(self.progress_bar, 50, 125, 50 + 600 * progress, 135)
+        self.question_label.configure(text=question.question)
+        
+        # Restore the answer if this question was already answered
+        self.answer_text.delete("1.0", "end")
+        if question.id in self.responses:
+            self.answer_text.insert("1.0", self.responses[question.id]['answer'])
+        self.answer_text.focus()
+        
+        if self.current_question > 0:
+            self.back_btn.pack(side='left')
+        else:
+            self.back_btn.pack_forget()
+    
     def next_question(self):
         """Move to next question"""
         answer = self.answer_text.get("1.0", "end-1c").strip()
@@ -362,8 +432,8 @@ class TaskTrackerApp:
             return
         
         question = self.questions[self.current_question]
-        self.responses[question['id']] = {
-            'label': question['label'],
+        self.responses[question.id] = {
+            'label': question.label,
             'answer': answer,
             'timestamp': datetime.now().isoformat()
         }
@@ -379,11 +449,6 @@ class TaskTrackerApp:
         if self.current_question > 0:
             self.current_question -= 1
             self.show_question_screen()
-            
-            question = self.questions[self.current_question]
-            if question['id'] in self.responses:
-                self.answer_text.delete("1.0", "end")
-                self.answer_text.insert("1.0", self.responses[question['id']]['answer'])
     
     def finish_checkin(self):
         """Complete the check-in and save data"""
@@ -396,57 +461,64 @@ class TaskTrackerApp:
             'responses': self.responses
         }
         
-        sheets_success = False
-        if self.spreadsheet:
-            try:
-                self.save_to_sheets(data)
-                sheets_success = True
-            except Exception as e:
-                print(f"Error saving to Google Sheets: {e}")
-        
+        # Save locally first so nothing is lost, then upload without blocking the UI
         self.save_locally(data)
-        self.show_completion_screen(sheets_success)
+        self.show_completion_screen('saving')
+        if self.sheets_connected:
+            self.start_upload(data)
+        else:
+            # Waiting on the connection here would tie up a worker the index and stats need
+            self.waiting_uploads.append(data)
     
-    def save_to_sheets(self, data):
-        """Save data to Google Sheets"""
-        sheet_name = data['date']
-        
-        try:
-            worksheet = self.spreadsheet.worksheet(sheet_name)
-        except:
-            worksheet = self.spreadsheet.add_worksheet(title=sheet_name, rows=100, cols=20)
-            headers = ['Timestamp', 'Name', 'Type']
-            for response in data['responses'].values():
-                headers.append(response['label'])
-            worksheet.append_row(headers)
-        
-        row = [
-            data['time'],
-            data['user_name'],
-            'Morning Check-in' if data['check_type'] == 'morning' else 'Evening Check-out'
-        ]
-        
-        for response in data['responses'].values():
-            row.append(response['answer'])
-        
-        worksheet.append_row(row)
+    def start_upload(self, data):
+        """Queue one check-in for upload on the background pool"""
+        self.background.submit(self.upload_checkin, data, on_done=self.on_upload_finished)
     
-    def save_locally(self, data):
-        """Save data to local JSON file as backup"""
-        backup_file = os.path.join(os.path.dirname(__file__), 'checkins_backup.json')
+    def upload_checkin(self, data):
+        """Send one check-in to Google Sheets (runs on a background thread)"""
+        if not self.spreadsheet:
+            raise RuntimeError("Google Sheets connection not available")
+        self.save_to_sheets(data)
+    
+    def on_upload_finished(self, result, error):
+        """Called on the Tk thread when the upload has succeeded or failed"""
+        if error is None:
+            self.update_sync_status('synced')
+            return
         
-        if os.path.exists(backup_file):
-            with open(backup_file, 'r') as f:
-                all_data = json.load(f)
+        print(f"Error saving to Google Sheets: {error}")
+        if self.spreadsheet:
+            # Retried in the background until it goes through
+            self.outbox.start(self.spreadsheet)
+            self.update_sync_status('queued')
         else:
-            all_data = []
-        
-        all_data.append(data)
-        
-        with open(backup_file, 'w') as f:
-            json.dump(all_data, f, indent=2)
+            self.update_sync_status('local')
+    
+    def save_to_sheets(self, data):
+        """Save data to Google Sheets, unless the outbox replay already has"""
+        self.outbox.upload(self.spreadsheet, data)
+    
+    def save_locally(self, data, synced=False):
+        """Save data to local JSON file as backup"""
+        if self.outbox.save(data, synced):
+            # Folding the journal reads and rewrites the whole history
+            self.background.submit(self.outbox.compact)
+        self.background.submit(self.index_checkin, data)
+        self.background.submit(self.count_checkin, data, on_done=self.show_user_stats)
     
-    def show_completion_screen(self, sheets_success):
+    def index_checkin(self, data):
+        """Add a check-in to the local search index (runs on a background thread)"""
+        try:
+            self.search_index.add(data)
+        except Exception as e:
+            print(f"Warning: Could not update the search index: {e}")
+    
+    def count_checkin(self, data):
+        """Update the user's streak and counts; returns their summary (runs on a background thread)"""
+        self.user_stats.add(data)
+        return self.user_stats.summary(data['user_name'])
+    
+    def show_completion_screen(self, sync_status):
         """Display completion screen"""
         for widget in self.root.winfo_children():
             widget.destroy()
@@ -460,28 +532,23 @@ class TaskTrackerApp:
         content = tk.Frame(self.root, bg="white")
         content.pack(fill='both', expand=True, padx=50, pady=40)
         
-        # Success message
-        if sheets_success:
-            msg = "Your responses have been saved to Google Sheets!"
-            msg_bg = "#d4edda"
-            msg_fg = "#155724"
-        else:
-            msg = "Your responses have been saved locally!"
-            msg_bg = "#fff3cd"
-            msg_fg = "#856404"
-        
-        msg_frame = tk.Frame(content, bg=msg_bg, padx=30, pady=25)
-        msg_frame.pack(fill='x', pady=30)
+        # Sync status, updated in place when the upload finishes
+        self.status_frame = tk.Frame(content, padx=30, pady=25)
+        self.status_frame.pack(fill='x', pady=30)
         
-        msg_label = tk.Label(msg_frame, text=msg, font=("Arial", 16),
-                            bg=msg_bg, fg=msg_fg)
-        msg_label.pack()
+        self.status_label = tk.Label(self.status_frame, font=("Arial", 16))
+        self.status_label.pack()
+        self.update_sync_status(sync_status)
         
         # Summary
         summary_label = tk.Label(content, text="Your responses have been recorded.",
                                 font=("Arial", 14), bg="white", fg=self.text_light)
         summary_label.pack(pady=20)
         
+        # Streak, filled in once the stats have been updated in the background
+        self.stats_label = tk.Label(content, font=("Arial", 13, "bold"), bg="white", fg=self.secondary_color)
+        self.stats_label.pack()
+        
         # Buttons
         btn_frame = tk.Frame(content, bg="white")
         btn_frame.pack(pady=40)
@@ -503,11 +570,43 @@ class TaskTrackerApp:
                             cursor="hand2",
                             command=self.root.quit)
         exit_btn.pack(side='left', padx=10)
+    
+    def update_sync_status(self, sync_status):
+        """Show the Google Sheets sync state on the completion screen, if it is still open"""
+        if not getattr(self, 'status_label', None) or not self.status_label.winfo_exists():
+            return
+        
+        msg, msg_bg, msg_fg = {
+            'saving': ("Saving your responses to Google Sheets...", "#e8eaf6", "#3f51b5"),
+            'synced': ("Your responses have been saved to Google Sheets!", "#d4edda", "#155724"),
+            'queued': ("Saved locally - will be sent to Google Sheets automatically", "#fff3cd", "#856404"),
+            'local': ("Your responses have been saved locally!", "#fff3cd", "#856404")
+        }[sync_status]
+        
+        self.status_frame.configure(bg=msg_bg)
+        self.status_label.configure(text=msg, bg=msg_bg, fg=msg_fg)
+    
+    def show_user_stats(self, summary, error):
+        """Show the user's streak on the completion screen, if it is still open"""
+        if error is not None:
+            print(f"Warning: Could not update check-in stats: {error}")
+            return
+        if not summary or not getattr(self, 'stats_label', None) or not self.stats_label.winfo_exists():
+            return
+        
+        self.stats_label.configure(text=(
+            f"🔥 {summary['current_streak']}-day streak (best {summary['longest_streak']}) · "
+            f"{summary['morning_count']} check-ins, {summary['evening_count']} check-outs"
+        ))
 
 
 def main():
     root = tk.Tk()
     app = TaskTrackerApp(root)
+    if os.environ.get('TASKTRACKER_STARTUP_REPORT'):
+        # Read by benchmarks/startup_time.py to measure time to first paint
+        root.update()
+        print(f"first-paint {time.time():.6f}", flush=True)
     root.mainloop()
 
 
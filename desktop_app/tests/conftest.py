@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The app's modules are imported top-level, as when it runs from desktop_app/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
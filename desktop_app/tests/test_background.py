@@ -0,0 +1,76 @@
+import threading
+
+from background import BackgroundRunner
+
+
+class FakeRoot:
+    """Stands in for Tk: ``after`` callbacks run when the test calls ``tick``"""
+
+    def __init__(self):
+        self.scheduled = []
+        self.thread = None
+
+    def after(self, ms, callback):
+        self.scheduled.append(callback)
+
+    def tick(self):
+        self.thread = threading.current_thread()
+        callbacks, self.scheduled = self.scheduled, []
+        for callback in callbacks:
+            callback()
+
+
+def test_callbacks_run_on_the_polling_thread():
+    root = FakeRoot()
+    runner = BackgroundRunner(root)
+    results = []
+
+    def on_done(result, error):
+        results.append((result, error, threading.current_thread()))
+
+    runner.submit(lambda: threading.current_thread(), on_done=on_done).result(5)
+    root.tick()
+    runner.shutdown()
+
+    worker, error, caller = results[0]
+    assert error is None
+    assert worker is not caller
+    assert caller is root.thread
+
+
+def test_errors_are_passed_to_the_callback():
+    root = FakeRoot()
+    runner = BackgroundRunner(root)
+    results = []
+
+    def fail():
+        raise OSError("offline")
+
+    runner.submit(fail, on_done=lambda result, error: results.append((result, error))).exception(5)
+    root.tick()
+    runner.shutdown()
+
+    result, error = results[0]
+    assert result is None
+    assert isinstance(error, OSError)
+
+
+def test_keeps_polling_after_a_callback_raises():
+    root = FakeRoot()
+    runner = BackgroundRunner(root)
+    results = []
+
+    def broken(result, error):
+        raise RuntimeError("bug in callback")
+
+    runner.submit(lambda: 1, on_done=broken).result(5)
+    try:
+        root.tick()
+    except RuntimeError:
+        pass
+    assert len(root.scheduled) == 1
+
+    runner.submit(lambda: 2, on_done=lambda result, error: results.append(result)).result(5)
+    root.tick()
+    runner.shutdown()
+    assert results == [2]
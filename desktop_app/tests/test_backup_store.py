@@ -0,0 +1,95 @@
+import os
+import json
+import shutil
+
+from backup_store import BackupStore
+
+
+def checkin(name, timestamp='2025-01-06T09:00:00', status='pending'):
+    return {'user_name': name, 'check_type': 'morning', 'timestamp': timestamp, 'sheets_status': status}
+
+
+def test_torn_journal_line(tmp_path):
+    store = BackupStore(str(tmp_path / 'checkins_backup.json'))
+    store.append(checkin('Ann'))
+    with open(store.journal_path, 'ab') as f:
+        f.write(b'{"add":{"user_name":"Bo')
+
+    store.append(checkin('Cy', '2025-01-06T09:05:00'))
+    assert [record['user_name'] for record in store.load()] == ['Ann', 'Cy']
+
+
+def test_duplicate_appends_keep_one_record(tmp_path):
+    store = BackupStore(str(tmp_path / 'checkins_backup.json'))
+    store.append(checkin('Ann'))
+    store.append(checkin('Ann'))
+    store.compact()
+    store.append(checkin('Ann'))
+
+    assert store.load() == [checkin('Ann')]
+
+
+def test_mark_synced(tmp_path):
+    store = BackupStore(str(tmp_path / 'checkins_backup.json'))
+    store.append(checkin('Ann'))
+    store.append(checkin('Bob', '2025-01-06T09:05:00'))
+    store.mark_synced({('Ann', 'morning', '2025-01-06T09:00:00')})
+
+    assert [record['sheets_status'] for record in store.load()] == ['synced', 'pending']
+
+
+def test_mark_synced_matches_the_whole_identity(tmp_path):
+    store = BackupStore(str(tmp_path / 'checkins_backup.json'))
+    store.append(checkin('Ann'))
+    store.append(checkin('Bob'))
+    store.mark_synced({('Bob', 'morning', '2025-01-06T09:00:00')})
+
+    assert [record['sheets_status'] for record in store.load()] == ['pending', 'synced']
+    store.compact()
+    assert [record['sheets_status'] for record in store.load()] == ['pending', 'synced']
+
+
+def test_append_reports_when_compaction_is_due(tmp_path):
+    store = BackupStore(str(tmp_path / 'checkins_backup.json'), compact_bytes=200)
+    due = [store.append(checkin(f'User {n}', f'2025-01-06T09:0{n}:00')) for n in range(5)]
+
+    # Appending never compacts by itself; the caller does it off the Tk thread
+    assert due[0] is False and due[-1] is True
+    assert not os.path.exists(store.path)
+
+    store.compact()
+    assert not os.path.exists(store.journal_path)
+    with open(store.path, encoding='utf-8') as f:
+        assert len(json.load(f)) == 5
+    assert store.append(checkin('User 5', '2025-01-06T09:05:00')) is False
+
+
+def test_crash_between_snapshot_and_journal_removal(tmp_path):
+    store = BackupStore(str(tmp_path / 'checkins_backup.json'))
+    store.append(checkin('Ann'))
+    store.append(checkin('Bob', '2025-01-06T09:05:00'))
+    store.mark_synced({('Ann', 'morning', '2025-01-06T09:00:00')})
+    expected = store.load()
+
+    # The snapshot was renamed into place but the journal was never removed
+    journal = shutil.copy(store.journal_path, str(tmp_path / 'journal.bak'))
+    store.compact()
+    os.replace(journal, store.journal_path)
+
+    assert store.load() == expected
+    store.compact()
+    assert store.load() == expected
+
+
+def test_crash_before_snapshot_rename(tmp_path):
+    store = BackupStore(str(tmp_path / 'checkins_backup.json'))
+    store.append(checkin('Ann'))
+    store.compact()
+    store.append(checkin('Bob', '2025-01-06T09:05:00'))
+
+    # A half-written temp snapshot is ignored and overwritten by the next compaction
+    with open(store.path + '.tmp', 'w', encoding='utf-8') as f:
+        f.write('[{"user_name": "A')
+    assert [record['user_name'] for record in store.load()] == ['Ann', 'Bob']
+    store.compact()
+    assert [record['user_name'] for record in store.load()] == ['Ann', 'Bob']
@@ -0,0 +1,69 @@
+import pytest
+
+import tasktracker_app
+import tasktracker_modern
+from background import BackgroundRunner
+from test_background import FakeRoot
+
+
+class FakeOutbox:
+    def __init__(self):
+        self.uploaded = []
+        self.started = 0
+
+    def upload(self, spreadsheet, data):
+        self.uploaded.append(data['user_name'])
+        return True
+
+    def start(self, spreadsheet):
+        self.started += 1
+
+
+@pytest.fixture(params=[tasktracker_app, tasktracker_modern], ids=['classic', 'modern'])
+def app(request):
+    # The check-in flow without building any Tk widgets
+    app = object.__new__(request.param.TaskTrackerApp)
+    app.root = FakeRoot()
+    # One worker, so a no-op job finishing means everything queued before it has too
+    app.background = BackgroundRunner(app.root, max_workers=1)
+    app.outbox = FakeOutbox()
+    app.spreadsheet = None
+    app.sheets_connected = False
+    app.waiting_uploads = []
+    app.user_name, app.check_type, app.responses = 'Ann', 'morning', {}
+    app.saved, app.statuses = [], []
+    app.save_locally = app.saved.append
+    app.show_completion_screen = app.statuses.append
+    app.update_sync_status = app.statuses.append
+    yield app
+    app.background.shutdown()
+
+
+def settle(app):
+    app.background.submit(lambda: None).result(5)
+    app.root.tick()
+
+
+def test_check_in_before_sheets_connects_waits_without_a_worker(app):
+    app.finish_checkin()
+    settle(app)
+    assert app.waiting_uploads and app.outbox.uploaded == []
+
+    app.spreadsheet = object()
+    app.on_sheets_connected(None, None)
+    assert app.waiting_uploads == []
+    assert app.outbox.started == 1
+
+    settle(app)
+    assert app.outbox.uploaded == ['Ann']
+    assert app.statuses == ['saving', 'synced']
+
+
+def test_check_in_after_sheets_connects_uploads_right_away(app):
+    app.spreadsheet = object()
+    app.on_sheets_connected(None, None)
+    app.finish_checkin()
+
+    settle(app)
+    assert app.outbox.uploaded == ['Ann']
+    assert app.statuses == ['saving', 'synced']
@@ -0,0 +1,151 @@
+import threading
+
+import gspread
+import pytest
+
+from sheets_outbox import SheetsOutbox
+
+
+class FakeWorksheet:
+    def __init__(self, title, cols):
+        self.title = title
+        self.col_count = cols
+        self.rows = []
+        self.appends = 0
+
+    def row_values(self, row):
+        return list(self.rows[row - 1]) if len(self.rows) >= row else []
+
+    def update(self, range_name, values):
+        assert range_name == 'A1' or range_name.endswith('1')
+        if not self.rows:
+            self.rows.append([])
+        header = self.rows[0]
+        start = ord(range_name[0]) - ord('A')
+        header[start:start + len(values[0])] = values[0]
+
+    def get_values(self, range_name):
+        return [row[:3] for row in self.rows]
+
+    def append_rows(self, rows, table_range=None):
+        self.appends += 1
+        self.rows.extend([str(cell) for cell in row] for row in rows)
+
+    def add_cols(self, cols):
+        self.col_count += cols
+
+
+class FakeSpreadsheet:
+    def __init__(self):
+        self.worksheets = {}
+
+    def worksheet(self, title):
+        if title not in self.worksheets:
+            raise gspread.exceptions.WorksheetNotFound(title)
+        return self.worksheets[title]
+
+    def add_worksheet(self, title, rows, cols):
+        worksheet = self.worksheets[title] = FakeWorksheet(title, cols)
+        return worksheet
+
+
+def checkin(user_name='Alice', time='09:15:00'):
+    return {
+        'user_name': user_name,
+        'check_type': 'morning',
+        'date': '2025-01-06',
+        'time': time,
+        'timestamp': f'2025-01-06T{time}.000001',
+        'responses': {'blockers': {'label': 'Blockers', 'answer': 'none'}}
+    }
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return SheetsOutbox(str(tmp_path / 'checkins_backup.json'))
+
+
+def data_rows(spreadsheet):
+    return spreadsheet.worksheets['2025-01-06'].rows[1:]
+
+
+def test_upload_pushes_pending_checkin_once(outbox):
+    spreadsheet = FakeSpreadsheet()
+    record = checkin()
+    outbox.save(record, synced=False)
+
+    assert outbox.upload(spreadsheet, record)
+    assert not outbox.is_pending(record)
+    assert outbox.replay_once(spreadsheet) == 0
+    assert len(data_rows(spreadsheet)) == 1
+
+
+def test_upload_after_replay_does_not_duplicate(outbox):
+    spreadsheet = FakeSpreadsheet()
+    record = checkin()
+    outbox.save(record, synced=False)
+
+    # The replay thread takes sync_lock before the live upload does
+    assert outbox.replay_once(spreadsheet) == 1
+    assert not outbox.upload(spreadsheet, record)
+    assert len(data_rows(spreadsheet)) == 1
+
+
+def test_concurrent_upload_and_replay_write_each_checkin_once(outbox):
+    spreadsheet = FakeSpreadsheet()
+    records = [checkin(f'User {n}', f'09:{n:02d}:00') for n in range(20)]
+    for record in records:
+        outbox.save(record, synced=False)
+
+    start = threading.Barrier(len(records) + 1)
+
+    def upload(record):
+        start.wait()
+        outbox.upload(spreadsheet, record)
+
+    def replay():
+        start.wait()
+        outbox.replay_once(spreadsheet)
+
+    threads = [threading.Thread(target=upload, args=(record,)) for record in records]
+    threads.append(threading.Thread(target=replay))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(row[1] for row in data_rows(spreadsheet)) == sorted(r['user_name'] for r in records)
+    assert outbox.pending_count() == 0
+
+
+def test_replay_skips_rows_the_worksheet_already_has(outbox):
+    spreadsheet = FakeSpreadsheet()
+    record = checkin()
+    outbox.append(spreadsheet, record['date'], [record])
+    # Crashed after the append, before the backup was marked synced
+    outbox.save(record, synced=False)
+
+    assert outbox.replay_once(spreadsheet) == 0
+    assert len(data_rows(spreadsheet)) == 1
+    assert outbox.pending_count() == 0
+
+
+def test_pending_checks_do_not_reread_the_backup(outbox, monkeypatch):
+    spreadsheet = FakeSpreadsheet()
+    first = checkin()
+    outbox.save(first, synced=False)
+    assert outbox.pending_count() == 1
+
+    loads = []
+    real_load = outbox.backup.load
+    monkeypatch.setattr(outbox.backup, 'load', lambda: loads.append(1) or real_load())
+    second = checkin('Bob')
+    outbox.save(second, synced=False)
+    assert outbox.upload(spreadsheet, second)
+    assert outbox.is_pending(first) and not outbox.is_pending(second)
+    assert outbox.pending_count() == 1
+    assert loads == []
+
+    # Same timestamp, different user: only Bob's check-in is synced
+    statuses = {record['user_name']: record['sheets_status'] for record in outbox.records()}
+    assert statuses == {'Alice': 'pending', 'Bob': 'synced'}
@@ -0,0 +1,11 @@
+"""
+Modules used by both the web app (backend/) and the desktop apps (desktop_app/)
+
+questionnaire    question sets from questions.json
+sheet_layout     worksheet column layout
+sheets_quota     Sheets API read/write budgets
+search_index     full-text index of answers
+user_stats       streaks and team participation
+records          identity of a stored check-in
+json_stream      streaming readers for JSON and JSON Lines backups
+"""
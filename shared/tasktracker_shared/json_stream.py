@@ -0,0 +1,77 @@
+"""
+Streaming readers for JSON backups
+
+Yield the elements of a JSON array (checkins_backup.json, fallback_data.json)
+or the lines of a JSON Lines file one at a time, so importing a multi-GB
+backup keeps memory flat.
+"""
+
+import json
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _truncated(error, length):
+    """Whether a decode error could be the end of the buffer cutting an element short"""
+    if error.msg.startswith('Unterminated string'):
+        return True
+    # The longest tokens that fail part-way are literals and \\uXXXX escapes
+    return length - error.pos <= 6
+
+
+def iter_json_array(stream, chunk_size=CHUNK_SIZE):
+    """Yield the elements of a top-level JSON array without loading it whole
+
+    Raises ValueError at the first element that is not valid JSON rather than
+    reading the rest of the input looking for its end.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+    started = False
+
+    while True:
+        # Skip whitespace and separators between elements
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+            pos += 1
+        if not started and pos < len(buffer):
+            if buffer[pos] != '[':
+                raise ValueError("Expected a JSON array")
+            started = True
+            pos += 1
+            continue
+        if started and pos < len(buffer) and buffer[pos] == ']':
+            return
+
+        if pos < len(buffer):
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                # Only an element cut off by the end of the buffer can be fixed by reading more
+                if eof or not _truncated(e, len(buffer)):
+                    raise
+            else:
+                # A number at the end of the buffer may continue in the next chunk
+                if end < len(buffer) or eof:
+                    yield record
+                    pos = end
+                    continue
+
+        if eof:
+            if started:
+                raise ValueError("Unterminated JSON array")
+            return
+
+        # Need more input: drop what was consumed and read the next chunk
+        chunk = stream.read(chunk_size)
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        eof = not chunk
+
+
+def iter_jsonl(stream):
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
@@ -0,0 +1,145 @@
+"""
+Check-in questionnaire shared by the web app and the desktop apps
+
+The morning ('start') and evening ('end') question sets are defined once in
+questions.json. It is loaded and validated at first import and compiled into
+immutable namedtuples with interned ids and labels, which every session and
+window shares. Question ids that older clients stored (the desktop app used
+'progress', 'focus', ...) are kept as aliases so old records map onto the
+current ids.
+"""
+
+import os
+import re
+import sys
+import json
+from types import MappingProxyType
+from collections import namedtuple
+
+Question = namedtuple('Question', ['id', 'question', 'label'])
+QuestionSet = namedtuple('QuestionSet', ['id', 'greeting', 'type_label', 'questions', 'aliases'])
+
+DEFINITION_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'questions.json')
+
+_IDENTIFIER = re.compile(r'[a-z][a-z0-9_]*')
+
+
+class QuestionnaireError(ValueError):
+    """questions.json is malformed"""
+
+
+def _text(entry, key, where):
+    value = entry.get(key)
+    if not isinstance(value, str) or not value.strip():
+        raise QuestionnaireError(f"{where}: '{key}' must be a non-empty string")
+    return value
+
+
+def _identifier(value, where):
+    if not isinstance(value, str) or not _IDENTIFIER.fullmatch(value):
+        raise QuestionnaireError(f"{where}: {value!r} is not a valid id (lowercase letters, digits, _)")
+    return sys.intern(value)
+
+
+def _plain(label):
+    """A type label without its emoji, as some clients used to write it"""
+    return label.encode('ascii', 'ignore').decode().strip()
+
+
+def compile_questionnaire(definition, source='questions.json'):
+    """Validate a parsed definition; returns (question sets by id, check type aliases)"""
+    if not isinstance(definition, dict) or definition.get('version') != 1:
+        raise QuestionnaireError(f"{source}: expected an object with \"version\": 1")
+
+    sets = {}
+    check_types = {}
+    type_labels = set()
+    for n, entry in enumerate(definition.get('question_sets') or ()):
+        where = f"{source}: question_sets[{n}]"
+        set_id = _identifier(entry.get('id'), where)
+        where = f"{source}: {set_id}"
+        type_label = sys.intern(_text(entry, 'type_label', where))
+        greeting = _text(entry, 'greeting', where)
+        try:
+            greeting.format(user_name='')
+        except (KeyError, IndexError, ValueError) as e:
+            raise QuestionnaireError(f"{where}: greeting may only use {{user_name}} ({e!r})")
+
+        for check_type in (set_id, *entry.get('aliases', ())):
+            check_type = _identifier(check_type, where)
+            if check_type in check_types:
+                raise QuestionnaireError(f"{where}: check type {check_type!r} is defined twice")
+            check_types[check_type] = set_id
+        if type_label in type_labels or _plain(type_label) in type_labels:
+            raise QuestionnaireError(f"{where}: type_label {type_label!r} is used by another set")
+        type_labels.update((type_label, _plain(type_label)))
+
+        questions = []
+        aliases = {}
+        labels = set()
+        for m, item in enumerate(entry.get('questions') or ()):
+            question_where = f"{where}.questions[{m}]"
+            question = Question(
+                id=_identifier(item.get('id'), question_where),
+                question=_text(item, 'question', question_where),
+                label=sys.intern(_text(item, 'label', question_where))
+            )
+            if question.label in labels:
+                # Labels are the worksheet column headers
+                raise QuestionnaireError(f"{question_where}: label {question.label!r} is used twice")
+            labels.add(question.label)
+            for question_id in (question.id, *item.get('aliases', ())):
+                question_id = _identifier(question_id, question_where)
+                if question_id in aliases:
+                    raise QuestionnaireError(f"{question_where}: id {question_id!r} is used twice")
+                aliases[question_id] = question.id
+            questions.append(question)
+        if not questions:
+            raise QuestionnaireError(f"{where}: no questions")
+
+        sets[set_id] = QuestionSet(
+            id=set_id,
+            greeting=greeting,
+            type_label=type_label,
+            questions=tuple(questions),
+            aliases=MappingProxyType({old: new for old, new in aliases.items() if old != new})
+        )
+
+    if not sets:
+        raise QuestionnaireError(f"{source}: no question_sets")
+    return MappingProxyType(sets), MappingProxyType(check_types)
+
+
+def load_questionnaire(path=DEFINITION_FILE):
+    with open(path, 'r', encoding='utf-8') as f:
+        try:
+            definition = json.load(f)
+        except ValueError as e:
+            raise QuestionnaireError(f"{path}: {e}") from None
+    return compile_questionnaire(definition, os.path.basename(path))
+
+
+# Compiled once at import and shared by every session and window
+QUESTION_SETS, CHECK_TYPES = load_questionnaire()
+
+_TYPE_BY_LABEL = {}
+for _set in QUESTION_SETS.values():
+    _TYPE_BY_LABEL[_set.type_label] = _TYPE_BY_LABEL[_plain(_set.type_label)] = _set.id
+
+
+def question_set(check_type):
+    """The QuestionSet for 'start'/'end' or an alias such as 'morning'; anything else is 'end'"""
+    return QUESTION_SETS[CHECK_TYPES.get(check_type, 'end')]
+
+
+def check_type_for_label(label):
+    """Check type written as a worksheet Type cell, with or without its emoji; None if unknown"""
+    return _TYPE_BY_LABEL.get(label.strip()) or _TYPE_BY_LABEL.get(_plain(label))
+
+
+def canonical_responses(check_type, responses):
+    """Responses keyed by current question ids, renaming ids older clients stored"""
+    aliases = question_set(check_type).aliases
+    if not any(question_id in aliases for question_id in responses):
+        return responses
+    return {aliases.get(question_id, question_id): response for question_id, response in responses.items()}
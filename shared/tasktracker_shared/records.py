@@ -0,0 +1,11 @@
+"""
+Identity of a stored check-in
+
+The CheckinStore, the search index, the stats tables and the fallback
+replayer all skip check-ins they already have, and key them the same way.
+"""
+
+
+def record_key(record):
+    """Identity of a check-in, used to skip duplicates on re-import"""
+    return f"{record.get('user_name', '')}|{record.get('check_type', '')}|{record.get('timestamp', '')}"
@@ -0,0 +1,266 @@
+"""
+Full-text search over check-in answers
+
+An SQLite FTS5 inverted index of every answer, next to a small table of the
+check-ins they belong to (user, date, time, type), so a query never loads a
+full record. Queries are plain words, which must all appear; ``word*``
+matches any word starting with ``word`` and ``"two words"`` matches the
+exact phrase. Results can be filtered by user and date range and come back
+newest first, each with a highlighted snippet of the matching answer.
+
+The backend keeps the index in the CheckinStore database and updates it with
+every new check-in; the desktop app keeps a SearchIndex file next to
+checkins_backup.json and adds each check-in as it is saved locally.
+
+Usage:
+    python -m tasktracker_shared.search_index --db checkins.db search 'auth* "deploy pipeline"' --user Alice
+    python -m tasktracker_shared.search_index --db search.db import ../desktop_app/checkins_backup.json
+"""
+
+import os
+import re
+import sys
+import json
+import sqlite3
+import argparse
+import threading
+import unicodedata
+from itertools import islice
+
+from .questionnaire import CHECK_TYPES
+from .records import record_key
+from .json_stream import iter_json_array, iter_jsonl
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+_TERM = re.compile(r'"([^"]*)"?|(\S+)')
+_WORD = re.compile(r'\w+')
+
+
+class SearchError(ValueError):
+    pass
+
+
+def _fold(word):
+    """A word as the index stores it: lower case without accents"""
+    decomposed = unicodedata.normalize('NFKD', word.lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def parse_query(text):
+    """Query terms as (words, prefix) pairs; a prefix applies to the last word"""
+    terms = []
+    for phrase, word in _TERM.findall(text or ''):
+        words = [_fold(w) for w in _WORD.findall(phrase or word)]
+        if words:
+            terms.append((words, word.endswith('*')))
+    if not terms:
+        raise SearchError("query must contain at least one word")
+    return terms
+
+
+def match_expression(terms):
+    """FTS5 MATCH expression for parsed terms; every term is quoted, so no query is a syntax error"""
+    # Words the tokenizer would split (auth-service) are searched as a phrase
+    return ' AND '.join('"' + ' '.join(words) + '"' + (' *' if prefix else '') for words, prefix in terms)
+
+
+def snippet(text, terms, width=16):
+    """Up to ``width`` words of an answer around its first match, matches in [brackets]"""
+    exact = {word for words, prefix in terms for word in (words[:-1] if prefix else words)}
+    prefixes = tuple(words[-1] for words, prefix in terms if prefix)
+    tokens = list(_WORD.finditer(text))
+    hits = [i for i, token in enumerate(tokens)
+            if _fold(token.group()) in exact or _fold(token.group()).startswith(prefixes or ('\0',))]
+    if not tokens:
+        return text
+    start = max(0, min(hits[0] - width // 4, len(tokens) - width)) if hits else 0
+    end = min(len(tokens), start + width)
+
+    parts = ['…' if start else '']
+    position = tokens[start].start()
+    for i in hits:
+        if start <= i < end:
+            token = tokens[i]
+            parts.extend((text[position:token.start()], '[', token.group(), ']'))
+            position = token.end()
+    parts.append(text[position:tokens[end - 1].end() if end < len(tokens) else len(text)])
+    if end < len(tokens):
+        parts.append('…')
+    return ''.join(parts)
+
+
+def ensure_schema(conn):
+    """Create the index tables; returns True if they did not exist yet"""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_docs'"
+    ).fetchone()
+    if exists:
+        return False
+    with conn:
+        # First, so an SQLite without FTS5 fails before anything is created
+        conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS search_answers USING fts5("
+            "answer, doc UNINDEXED, question UNINDEXED, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS search_docs ("
+            "id INTEGER PRIMARY KEY, "
+            "record_key TEXT NOT NULL UNIQUE, "
+            "user_name TEXT NOT NULL, "
+            "user_key TEXT NOT NULL, "
+            "date TEXT NOT NULL, "
+            "time TEXT, "
+            "check_type TEXT)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS search_docs_user_date ON search_docs (user_key, date)")
+        conn.execute("CREATE INDEX IF NOT EXISTS search_docs_date ON search_docs (date)")
+    return True
+
+
+def index_record(conn, record, key=None):
+    """Index the answers of one check-in inside the caller's transaction; False if already indexed"""
+    user_name = record.get('user_name', '')
+    cursor = conn.execute(
+        "INSERT OR IGNORE INTO search_docs (record_key, user_name, user_key, date, time, check_type) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (key or record_key(record), user_name, user_name.strip().lower(),
+         record.get('date') or record.get('timestamp', '')[:10], record.get('time'),
+         CHECK_TYPES.get(record.get('check_type'), record.get('check_type')))
+    )
+    if cursor.rowcount <= 0:
+        return False
+    answers = []
+    for question_id, response in (record.get('responses') or {}).items():
+        if isinstance(response, dict) and response.get('answer'):
+            answers.append((str(response['answer']), cursor.lastrowid, question_id))
+    conn.executemany("INSERT INTO search_answers (answer, doc, question) VALUES (?, ?, ?)", answers)
+    return True
+
+
+def search(conn, query, user=None, since=None, until=None, limit=DEFAULT_LIMIT):
+    """Matching answers, newest first, as dicts with a highlighted snippet"""
+    terms = parse_query(query)
+    clauses = ["search_answers MATCH ?"]
+    params = [match_expression(terms)]
+    if user:
+        clauses.append("d.user_key = ?")
+        params.append(user.strip().lower())
+    if since:
+        clauses.append("d.date >= ?")
+        params.append(since)
+    if until:
+        clauses.append("d.date <= ?")
+        params.append(until)
+    try:
+        params.append(min(max(int(limit), 1), MAX_LIMIT))
+    except (TypeError, ValueError):
+        raise SearchError("limit must be an integer")
+
+    # Only the index and the small docs table are read; answer text is fetched
+    # for the page alone, since FTS5 would build a snippet for every match
+    rows = conn.execute(
+        "SELECT a.rowid, d.user_name, d.date, d.time, d.check_type, a.question "
+        "FROM search_answers a JOIN search_docs d ON d.id = a.doc "
+        f"WHERE {' AND '.join(clauses)} "
+        "ORDER BY d.date DESC, coalesce(d.time, '') DESC, a.rowid LIMIT ?",
+        params
+    ).fetchall()
+    answers = dict(conn.execute(
+        f"SELECT rowid, answer FROM search_answers WHERE rowid IN ({', '.join('?' * len(rows))})",
+        [row[0] for row in rows]
+    )) if rows else {}
+    return [
+        {'user_name': user_name, 'date': date, 'time': time_, 'check_type': check_type,
+         'question': question, 'snippet': snippet(answers.get(rowid, ''), terms)}
+        for rowid, user_name, date, time_, check_type, question in rows
+    ]
+
+
+class SearchIndex:
+    """A standalone index file, opened on first use
+
+    ``backfill`` is called once, when the file is first created, and should
+    return the check-ins saved before the index existed.
+    """
+
+    def __init__(self, path, backfill=None):
+        self.path = path
+        self.backfill = backfill
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+
+    def add(self, record):
+        """Index one check-in; returns False if it was already indexed"""
+        return self.add_many([record]) > 0
+
+    def add_many(self, records):
+        conn = self._conn()
+        with conn:
+            return sum(index_record(conn, record) for record in records)
+
+    def import_file(self, path, batch_size=1000):
+        """Index a JSON array or JSON Lines backup in batches; returns how many were new"""
+        added = 0
+        with open(path, 'r', encoding='utf-8') as f:
+            records = iter_jsonl(f) if path.endswith(('.jsonl', '.ndjson')) else iter_json_array(f)
+            while True:
+                batch = list(islice(records, batch_size))
+                if not batch:
+                    return added
+                added += self.add_many(batch)
+
+    def search(self, query, user=None, since=None, until=None, limit=DEFAULT_LIMIT):
+        return search(self._conn(), query, user, since, until, limit)
+
+    def _conn(self):
+        # sqlite3 connections can't be shared between threads, so keep one per thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._schema_lock:
+                if ensure_schema(conn) and self.backfill:
+                    self._local.conn = conn
+                    self.add_many(self.backfill())
+            self._local.conn = conn
+        return conn
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Full-text search over check-in answers')
+    parser.add_argument('--db', default=os.environ.get('CHECKIN_DB', 'checkins.db'))
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    import_cmd = commands.add_parser('import', help='index JSON array or JSON Lines backups')
+    import_cmd.add_argument('paths', nargs='+')
+
+    search_cmd = commands.add_parser('search', help='print matching answers as JSON Lines')
+    search_cmd.add_argument('query', help='words, prefix* and "exact phrases"')
+    search_cmd.add_argument('--user')
+    search_cmd.add_argument('--since', help='first date, YYYY-MM-DD')
+    search_cmd.add_argument('--until', help='last date, YYYY-MM-DD')
+    search_cmd.add_argument('--limit', type=int, default=DEFAULT_LIMIT)
+
+    args = parser.parse_args()
+    index = SearchIndex(args.db)
+
+    if args.command == 'import':
+        for path in args.paths:
+            added = index.import_file(path)
+            print(f"{path}: {added} new check-ins indexed")
+        return
+
+    try:
+        results = index.search(args.query, args.user, args.since, args.until, args.limit)
+    except SearchError as e:
+        parser.error(str(e))
+    for result in results:
+        sys.stdout.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Column layout of the per-date check-in worksheets
+
+A worksheet's header row is Timestamp, Name, Type and then one column per
+question label. New worksheets get a column for every question of every
+question set, so morning and evening rows share one stable layout and a
+column always holds answers to the same question. Worksheets created before
+that keep their header; labels they lack are appended on the right. Rows are
+placed by looking each answer's label up in the header once, never by the
+order of the responses.
+"""
+
+from .questionnaire import QUESTION_SETS, question_set
+
+SHEET_HEADERS = ('Timestamp', 'Name', 'Type')
+
+DEFAULT_HEADERS = SHEET_HEADERS + tuple(dict.fromkeys(
+    question.label for questions in QUESTION_SETS.values() for question in questions.questions
+))
+
+
+def worksheet_rows(team_size):
+    """Rows to create a date's worksheet with: a header plus a morning and evening row per member"""
+    return 1 + max(1, team_size) * len(QUESTION_SETS)
+
+
+def column_letter(index):
+    """A1 column letters for a 0-based column index"""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+class SheetLayout:
+    """Immutable column positions of one worksheet, read from its header row"""
+
+    __slots__ = ('headers', 'columns')
+
+    def __init__(self, headers=DEFAULT_HEADERS):
+        self.headers = tuple(headers)
+        self.columns = {}
+        for index, label in enumerate(self.headers):
+            if index >= len(SHEET_HEADERS) and label:
+                self.columns.setdefault(label, index)
+
+    def missing_labels(self, records):
+        """Answer labels of ``records`` that have no column yet, in first-seen order"""
+        missing = {}
+        for data in records:
+            for response in data['responses'].values():
+                label = response.get('label')
+                if label and label not in self.columns:
+                    missing[label] = None
+        return list(missing)
+
+    def extended(self, labels):
+        """A new layout with ``labels`` added as columns on the right"""
+        return SheetLayout(self.headers + tuple(labels))
+
+    def row(self, data):
+        """Lay out one check-in: time, name, type, then each answer in its label's column"""
+        row = [data['time'], data['user_name'], question_set(data['check_type']).type_label]
+        for response in data['responses'].values():
+            index = self.columns.get(response.get('label'))
+            if index is None:
+                continue
+            if index >= len(row):
+                # Cells between answers stay empty; trailing empty cells are never sent
+                row.extend([''] * (index + 1 - len(row)))
+            row[index] = response['answer']
+        return row
+
+
+_DEFAULT_LAYOUT = SheetLayout()
+
+
+def build_sheet_row(data):
+    """Lay out one check-in as a row of a new worksheet: time, name, type, then answers by column"""
+    return _DEFAULT_LAYOUT.row(data)
@@ -0,0 +1,154 @@
+"""
+Client-side budgeting for Google Sheets API calls
+
+Sheets allows a fixed number of read and write requests per minute. Calls
+take a token from the read or write bucket first and wait for one to refill
+instead of being rejected with a 429; a 429 that still happens (another
+client sharing the quota) empties the bucket for Retry-After seconds.
+Concurrent lookups of the same key can be coalesced into one call.
+"""
+
+import time
+import threading
+
+
+class TokenBucket:
+    """``rate`` tokens per second, holding at most ``capacity``"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available; returns seconds waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self.blocked_until:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return waited
+                    delay = (1 - self.tokens) / self.rate
+                else:
+                    delay = self.blocked_until - now
+            time.sleep(delay)
+            waited += delay
+
+    def block(self, seconds):
+        """Hand out no tokens for ``seconds`` and start empty afterwards"""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = 0
+            self.updated = self.blocked_until
+
+
+class SheetsQuota:
+    """Separate read and write budgets, in requests per minute"""
+
+    def __init__(self, reads_per_minute=60, writes_per_minute=60, burst=10, on_throttle=None):
+        self.buckets = {
+            'read': TokenBucket(reads_per_minute / 60.0, min(burst, reads_per_minute)),
+            'write': TokenBucket(writes_per_minute / 60.0, min(burst, writes_per_minute))
+        }
+        self.on_throttle = on_throttle
+        self.calls = {'read': 0, 'write': 0}
+        self.throttled = {'read': 0, 'write': 0}
+        self.waited = {'read': 0.0, 'write': 0.0}
+        self.rate_limited = {'read': 0, 'write': 0}
+        self._lock = threading.Lock()
+
+    def limit(self, kind):
+        """Context manager: wait for a ``kind`` ('read'/'write') token, then run the call"""
+        return _Limited(self, kind)
+
+    def acquire(self, kind):
+        waited = self.buckets[kind].acquire()
+        with self._lock:
+            self.calls[kind] += 1
+            if waited:
+                self.throttled[kind] += 1
+                self.waited[kind] += waited
+        if waited and self.on_throttle:
+            self.on_throttle(kind, waited)
+
+    def rate_limited_by_server(self, kind, error):
+        """Back off after a 429 despite budgeting"""
+        response = getattr(error, 'response', None)
+        retry_after = getattr(response, 'headers', {}).get('Retry-After', '')
+        self.buckets[kind].block(float(retry_after) if retry_after.isdigit() else 60.0)
+        with self._lock:
+            self.rate_limited[kind] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                kind: {
+                    'calls': self.calls[kind],
+                    'throttled': self.throttled[kind],
+                    'wait_seconds': round(self.waited[kind], 3),
+                    'rate_limited': self.rate_limited[kind]
+                }
+                for kind in self.buckets
+            }
+
+
+class _Limited:
+    __slots__ = ('quota', 'kind')
+
+    def __init__(self, quota, kind):
+        self.quota = quota
+        self.kind = kind
+
+    def __enter__(self):
+        self.quota.acquire(self.kind)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None and getattr(getattr(exc, 'response', None), 'status_code', None) == 429:
+            self.quota.rate_limited_by_server(self.kind, exc)
+        return False
+
+
+class Coalescer:
+    """Single-flight calls: concurrent callers with the same key share one result"""
+
+    def __init__(self, on_coalesce=None):
+        self.on_coalesce = on_coalesce
+        self.coalesced = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def run(self, key, func):
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = {'done': threading.Event(), 'result': None, 'error': None}
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            if self.on_coalesce:
+                self.on_coalesce()
+            call['done'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+
+        try:
+            call['result'] = func()
+            return call['result']
+        except BaseException as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            call['done'].set()
@@ -0,0 +1,290 @@
+"""
+Per-user check-in streaks and team participation
+
+Each user has one summary row (last check-in, current and longest streak,
+morning and evening counts) and each date one row with how many people
+checked in, all updated as every check-in is saved. Reading a user's summary
+or the day's participation is a primary-key lookup, never a scan of history.
+
+A streak counts consecutive working days with a check-in. Weekends neither
+break nor extend it: Friday followed by Monday continues it, and a Saturday
+or Sunday check-in counts towards the totals and the day's participation but
+leaves the streak as it was. A streak is current
+while its last day is today or the previous working day. A check-in dated
+before the user's latest day (an import of old backups) recounts that user's
+streaks from their own days.
+
+The backend keeps these tables in the CheckinStore database; the desktop app
+keeps a UserStats file next to checkins_backup.json.
+
+Usage:
+    python -m tasktracker_shared.user_stats --db checkins.db user Alice
+    python -m tasktracker_shared.user_stats --db checkins.db team
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import argparse
+import threading
+from datetime import date as Date, datetime, timedelta
+
+from .questionnaire import CHECK_TYPES
+from .records import record_key
+
+# Working days in the trailing participation report
+RECENT_DAYS = 7
+# Users who checked in within this many days count as the team
+ACTIVE_DAYS = 30
+
+
+def _day(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def next_workday(day):
+    day += timedelta(days=1)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+
+def ensure_schema(conn):
+    """Create the stats tables; returns True if they did not exist yet"""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'user_stats'"
+    ).fetchone()
+    if exists:
+        return False
+    with conn:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS user_days ("
+            "user_key TEXT NOT NULL, "
+            "date TEXT NOT NULL, "
+            "PRIMARY KEY (user_key, date)) WITHOUT ROWID"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS team_days ("
+            "date TEXT PRIMARY KEY, "
+            "users INTEGER NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS user_stats ("
+            "user_key TEXT PRIMARY KEY, "
+            "user_name TEXT NOT NULL, "
+            "last_date TEXT, "
+            "last_time TEXT, "
+            "last_check_type TEXT, "
+            "streak_end TEXT, "
+            "current_streak INTEGER NOT NULL DEFAULT 0, "
+            "longest_streak INTEGER NOT NULL DEFAULT 0, "
+            "morning_count INTEGER NOT NULL DEFAULT 0, "
+            "evening_count INTEGER NOT NULL DEFAULT 0)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS user_stats_last_date ON user_stats (last_date)")
+        # Check-ins a standalone UserStats has counted; the CheckinStore skips duplicates itself
+        conn.execute("CREATE TABLE IF NOT EXISTS counted (record_key TEXT PRIMARY KEY) WITHOUT ROWID")
+    return True
+
+
+def record_checkin(conn, record):
+    """Count one newly saved check-in, inside the caller's transaction"""
+    user_name = record.get('user_name', '').strip()
+    day = record.get('date') or record.get('timestamp', '')[:10]
+    if not user_name or not day:
+        return
+    try:
+        _day(day)
+    except ValueError:
+        return
+    user_key = user_name.lower()
+    check_type = CHECK_TYPES.get(record.get('check_type'), record.get('check_type'))
+    checked_time = record.get('time') or ''
+
+    conn.execute("INSERT OR IGNORE INTO user_stats (user_key, user_name) VALUES (?, ?)", (user_key, user_name))
+    conn.execute(
+        "UPDATE user_stats SET morning_count = morning_count + ?, evening_count = evening_count + ? "
+        "WHERE user_key = ?",
+        (int(check_type == 'start'), int(check_type == 'end'), user_key)
+    )
+    last_date, last_time = conn.execute(
+        "SELECT last_date, last_time FROM user_stats WHERE user_key = ?", (user_key,)
+    ).fetchone()
+    if (day, checked_time) >= (last_date or '', last_time or ''):
+        conn.execute(
+            "UPDATE user_stats SET user_name = ?, last_date = ?, last_time = ?, last_check_type = ? "
+            "WHERE user_key = ?",
+            (user_name, day, checked_time, check_type, user_key)
+        )
+
+    if conn.execute("INSERT OR IGNORE INTO user_days (user_key, date) VALUES (?, ?)",
+                    (user_key, day)).rowcount <= 0:
+        return  # Not the user's first check-in of the day
+    conn.execute(
+        "INSERT INTO team_days (date, users) VALUES (?, 1) "
+        "ON CONFLICT (date) DO UPDATE SET users = users + 1",
+        (day,)
+    )
+    if _day(day).weekday() >= 5:
+        return  # Weekends neither break nor extend a streak
+
+    streak_end, current, longest = conn.execute(
+        "SELECT streak_end, current_streak, longest_streak FROM user_stats WHERE user_key = ?",
+        (user_key,)
+    ).fetchone()
+    if streak_end and day < streak_end:
+        current, longest, day = _recount(conn, user_key)
+    elif streak_end and _day(day) <= next_workday(_day(streak_end)):
+        current += 1
+    else:
+        current = 1
+    conn.execute(
+        "UPDATE user_stats SET streak_end = ?, current_streak = ?, longest_streak = ? WHERE user_key = ?",
+        (day, current, max(longest, current), user_key)
+    )
+
+
+def _recount(conn, user_key):
+    """(current, longest, last day) of a user's streaks, counted from all their days"""
+    current = longest = 0
+    previous = None
+    for (value,) in conn.execute("SELECT date FROM user_days WHERE user_key = ? ORDER BY date", (user_key,)):
+        day = _day(value)
+        if day.weekday() >= 5:
+            continue
+        current = current + 1 if previous and day <= next_workday(previous) else 1
+        longest = max(longest, current)
+        previous = day
+    return current, longest, previous.isoformat() if previous else None
+
+
+def user_summary(conn, user, today=None):
+    """A user's summary, or None if they never checked in"""
+    row = conn.execute(
+        "SELECT user_name, last_date, last_time, last_check_type, streak_end, current_streak, "
+        "longest_streak, morning_count, evening_count FROM user_stats WHERE user_key = ?",
+        (user.strip().lower(),)
+    ).fetchone()
+    return _summary(row, today or Date.today()) if row else None
+
+
+def all_users(conn, today=None):
+    today = today or Date.today()
+    rows = conn.execute(
+        "SELECT user_name, last_date, last_time, last_check_type, streak_end, current_streak, "
+        "longest_streak, morning_count, evening_count FROM user_stats ORDER BY user_key"
+    )
+    return [_summary(row, today) for row in rows]
+
+
+def _summary(row, today):
+    (user_name, last_date, last_time, last_check_type, streak_end,
+     current, longest, morning_count, evening_count) = row
+    if not streak_end or next_workday(_day(streak_end)) < today:
+        current = 0  # Missed a working day since
+    return {
+        'user_name': user_name,
+        'last_date': last_date,
+        'last_time': last_time,
+        'last_check_type': last_check_type,
+        'current_streak': current,
+        'longest_streak': longest,
+        'morning_count': morning_count,
+        'evening_count': evening_count
+    }
+
+
+def team_participation(conn, today=None):
+    """Share of the active team that checked in today and on the last few working days"""
+    today = today or Date.today()
+    team_size = conn.execute(
+        "SELECT COUNT(*) FROM user_stats WHERE last_date >= ?",
+        ((today - timedelta(days=ACTIVE_DAYS)).isoformat(),)
+    ).fetchone()[0]
+
+    days = []
+    day = today
+    while len(days) < RECENT_DAYS:
+        if day.weekday() < 5:
+            days.append(day.isoformat())
+        day -= timedelta(days=1)
+    queried = sorted(set(days) | {today.isoformat()})
+    counts = dict(conn.execute(
+        f"SELECT date, users FROM team_days WHERE date IN ({', '.join('?' * len(queried))})", queried
+    ))
+
+    def participation(value):
+        users = counts.get(value, 0)
+        return {'date': value, 'checked_in': users,
+                'rate': round(users / team_size, 3) if team_size else 0.0}
+
+    return dict(participation(today.isoformat()), team_size=team_size,
+                recent=[participation(value) for value in days])
+
+
+class UserStats:
+    """A standalone stats file, opened on first use
+
+    ``backfill`` is called once, when the file is first created, and should
+    return the check-ins saved before the stats existed.
+    """
+
+    def __init__(self, path, backfill=None):
+        self.path = path
+        self.backfill = backfill
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+
+    def add(self, record):
+        self.add_many([record])
+
+    def add_many(self, records):
+        """Count check-ins, skipping any already counted"""
+        conn = self._conn()
+        with conn:
+            for record in records:
+                key = record_key(record)
+                if conn.execute("INSERT OR IGNORE INTO counted (record_key) VALUES (?)", (key,)).rowcount > 0:
+                    record_checkin(conn, record)
+
+    def summary(self, user, today=None):
+        return user_summary(self._conn(), user, today)
+
+    def team(self, today=None):
+        return team_participation(self._conn(), today)
+
+    def _conn(self):
+        # sqlite3 connections can't be shared between threads, so keep one per thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._schema_lock:
+                if ensure_schema(conn) and self.backfill:
+                    self._local.conn = conn
+                    self.add_many(self.backfill())
+            self._local.conn = conn
+        return conn
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check-in streaks and participation')
+    parser.add_argument('--db', default=os.environ.get('CHECKIN_DB', 'checkins.db'))
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    user_cmd = commands.add_parser('user', help="print a user's summary")
+    user_cmd.add_argument('name')
+    commands.add_parser('team', help="print today's participation")
+
+    args = parser.parse_args()
+    stats = UserStats(args.db)
+    result = stats.summary(args.name) if args.command == 'user' else stats.team()
+    if result is None:
+        sys.exit(f"{args.name} has no check-ins")
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+import io
+import json
+
+import pytest
+
+from tasktracker_shared.json_stream import iter_json_array, iter_jsonl
+
+
+class CountingStream(io.StringIO):
+    def __init__(self, text):
+        super().__init__(text)
+        self.reads = 0
+
+    def read(self, size=-1):
+        self.reads += 1
+        return super().read(size)
+
+
+RECORDS = [
+    {'user_name': 'Zoë', 'check_type': 'morning', 'date': '2025-01-06', 'time': '09:00:00',
+     'timestamp': '2025-01-06T09:00:00', 'score': -12.5e3, 'late': False, 'note': None,
+     'responses': {'q1': {'label': 'Plan "A" \\ 😀', 'answer': 'ship it'}}},
+    12345,
+    'text',
+    [],
+]
+
+
+@pytest.mark.parametrize('ensure_ascii', [True, False])
+def test_iter_json_array_across_chunk_boundaries(ensure_ascii):
+    text = json.dumps(RECORDS, ensure_ascii=ensure_ascii, indent=1)
+    for chunk_size in range(1, 24):
+        assert list(iter_json_array(io.StringIO(text), chunk_size)) == RECORDS
+
+
+def test_iter_json_array_stops_at_first_malformed_element():
+    text = '[{"user_name": "A"}, {"user_name": B}, ' + ', '.join(['{"user_name": "C"}'] * 10000) + ']'
+    stream = CountingStream(text)
+    records = iter_json_array(stream, chunk_size=64)
+
+    assert next(records) == {'user_name': 'A'}
+    with pytest.raises(ValueError):
+        next(records)
+    assert stream.reads < 5
+
+
+def test_iter_json_array_unterminated():
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO('[{"user_name": "A"}, {"user_name": "B'), 8))
+
+
+def test_iter_jsonl_skips_blank_lines():
+    text = '{"user_name": "A"}\n\n  \n{"user_name": "B"}\n'
+    assert list(iter_jsonl(io.StringIO(text))) == [{'user_name': 'A'}, {'user_name': 'B'}]
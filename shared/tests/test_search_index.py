@@ -0,0 +1,32 @@
+import json
+
+from tasktracker_shared.search_index import SearchIndex
+
+
+def checkin(n):
+    return {'user_name': f'User {n}', 'check_type': 'start', 'date': '2025-01-06',
+            'time': '09:00:00', 'timestamp': f'2025-01-06T09:00:{n:02d}',
+            'responses': {'q1': {'label': 'Plan', 'answer': f'deploy pipeline {n}'}}}
+
+
+def test_import_file_indexes_in_batches(tmp_path, monkeypatch):
+    path = tmp_path / 'checkins_backup.json'
+    path.write_text(json.dumps([checkin(n) for n in range(5)]))
+    index = SearchIndex(str(tmp_path / 'search.db'))
+    batches = []
+    add_many = index.add_many
+    monkeypatch.setattr(index, 'add_many', lambda records: batches.append(len(records)) or add_many(records))
+
+    assert index.import_file(str(path), batch_size=2) == 5
+    assert batches == [2, 2, 1]
+    assert index.import_file(str(path), batch_size=2) == 0
+    assert len(index.search('deploy')) == 5
+
+
+def test_import_file_reads_json_lines(tmp_path):
+    path = tmp_path / 'history.jsonl'
+    path.write_text(''.join(json.dumps(checkin(n)) + '\n' for n in range(3)))
+    index = SearchIndex(str(tmp_path / 'search.db'))
+
+    assert index.import_file(str(path)) == 3
+    assert [result['user_name'] for result in index.search('pipeline', user='User 1')] == ['User 1']
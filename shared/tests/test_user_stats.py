@@ -0,0 +1,58 @@
+from datetime import date
+
+import pytest
+
+from tasktracker_shared.user_stats import UserStats
+
+# 2025-01-03 is a Friday
+FRIDAY, SATURDAY, SUNDAY, MONDAY, TUESDAY = (f'2025-01-{day:02d}' for day in (3, 4, 5, 6, 7))
+
+
+def checkin(day, user_name='Alice', check_type='start', time='09:00:00'):
+    return {'user_name': user_name, 'check_type': check_type, 'date': day, 'time': time,
+            'timestamp': f'{day}T{time}'}
+
+
+@pytest.fixture
+def stats(tmp_path):
+    return UserStats(str(tmp_path / 'stats.db'))
+
+
+def summary(stats, today=TUESDAY):
+    return stats.summary('alice', today=date.fromisoformat(today))
+
+
+def test_weekend_checkin_does_not_extend_the_streak(stats):
+    stats.add_many([checkin(FRIDAY), checkin(SATURDAY), checkin(MONDAY)])
+
+    result = summary(stats)
+    assert (result['current_streak'], result['longest_streak']) == (2, 2)
+    assert result['morning_count'] == 3
+    assert result['last_date'] == MONDAY
+
+
+def test_weekend_only_checkins_leave_the_streak_alone(stats):
+    stats.add_many([checkin(FRIDAY), checkin(SATURDAY), checkin(SUNDAY)])
+
+    result = summary(stats, today=MONDAY)
+    assert (result['current_streak'], result['longest_streak']) == (1, 1)
+
+
+def test_out_of_order_import_recounts_without_weekends(stats):
+    stats.add_many([checkin(MONDAY), checkin(TUESDAY), checkin(SATURDAY), checkin(FRIDAY)])
+
+    result = summary(stats)
+    assert (result['current_streak'], result['longest_streak']) == (3, 3)
+
+
+def test_weekend_checkin_counts_towards_participation(stats):
+    stats.add_many([checkin(SATURDAY), checkin(SATURDAY, 'Bob')])
+
+    assert stats.team(today=date.fromisoformat(SATURDAY))['checked_in'] == 2
+
+
+def test_the_same_checkin_is_counted_once(stats):
+    stats.add(checkin(MONDAY))
+    stats.add(checkin(MONDAY))
+
+    assert summary(stats)['morning_count'] == 1